@@ -11,5 +11,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'kitchen.settings')
+# Under ASGI the read paths run as coroutines, see kitchen_app.async_views.
+os.environ.setdefault('ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
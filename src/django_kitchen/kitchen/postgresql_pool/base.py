@@ -0,0 +1,82 @@
+"""PostgreSQL backend with a psycopg 3 connection pool per worker process.
+
+Django 5.0 has no pool of its own, so this backend reads `OPTIONS['pool']` the way
+Django 5.1 does: `True` or a dict of `psycopg_pool.ConnectionPool` arguments such as
+`min_size`, `max_size`, `max_lifetime` and `timeout`. Connections are checked out when
+a request first touches the database and returned when Django closes them at the end
+of the request, so `CONN_MAX_AGE` must be 0. `CONN_HEALTH_CHECKS` makes the pool check
+a connection before handing it out. Without `OPTIONS['pool']` this is the stock backend.
+"""
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel, is_psycopg3
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    # (alias, database name) -> pool, shared by the threads of this process. The test
+    # runner renames the database, which so gets a pool of its own.
+    _connection_pools = {}
+    _pools_lock = threading.Lock()
+
+    @property
+    def pool(self):
+        pool_options = self.settings_dict['OPTIONS'].get('pool')
+        if not pool_options:
+            return None
+
+        key = (self.alias, self.settings_dict['NAME'])
+        pool = self._connection_pools.get(key)
+        if pool is not None:
+            return pool
+
+        if not is_psycopg3:
+            raise ImproperlyConfigured("OPTIONS['pool'] requires psycopg 3 and psycopg-pool.")
+        if self.settings_dict['CONN_MAX_AGE'] != 0:
+            raise ImproperlyConfigured("OPTIONS['pool'] cannot be combined with CONN_MAX_AGE.")
+        if 'isolation_level' in self.settings_dict['OPTIONS']:
+            raise ImproperlyConfigured("OPTIONS['pool'] does not support OPTIONS['isolation_level'].")
+
+        from psycopg_pool import ConnectionPool
+
+        with self._pools_lock:
+            if key not in self._connection_pools:
+                conn_params = self.get_connection_params()
+                # Django switches autocommit off itself inside atomic blocks.
+                conn_params['autocommit'] = True
+                self._connection_pools[key] = ConnectionPool(
+                    kwargs=conn_params,
+                    check=ConnectionPool.check_connection if self.settings_dict['CONN_HEALTH_CHECKS'] else None,
+                    name=f'kitchen-{self.alias}',
+                    open=True,
+                    **({} if pool_options is True else pool_options),
+                )
+            return self._connection_pools[key]
+
+    @classmethod
+    def close_pools(cls):
+        with cls._pools_lock:
+            pools = list(cls._connection_pools.values())
+            cls._connection_pools.clear()
+        for pool in pools:
+            pool.close()
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop('pool', None)
+        return conn_params
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        self.isolation_level = IsolationLevel.READ_COMMITTED
+        return pool.getconn()
+
+    def _close(self):
+        if self.connection is None or self.pool is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            # The pool rolls back what is left open and drops broken connections.
+            self.connection._pool.putconn(self.connection)
@@ -9,6 +9,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import importlib.util
 import os
 from pathlib import Path
 
@@ -40,6 +41,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'kitchen_app',
     'drf_spectacular',
     'rest_framework.authtoken',
@@ -47,6 +49,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so the SQL of every other middleware is counted too.
+    'kitchen_app.instrumentation.SQLInstrumentationMiddleware',
+    'kitchen_app.metrics.MetricsMiddleware',
+    # Before anything reads the database, sessions included.
+    'kitchen_app.routers.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -80,14 +87,74 @@ WSGI_APPLICATION = 'kitchen.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
+# Serve the read paths from kitchen_app.async_views; kitchen/asgi.py turns it on by default.
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', '0') == '1'
+
+# DB_POOL=1 checks connections out of a per-process psycopg 3 pool, see kitchen.postgresql_pool.
+# Otherwise WSGI workers keep one connection per thread for CONN_MAX_AGE seconds; under
+# ASGI every request runs in its own context, so connections are not kept there.
+DB_POOL = os.getenv('DB_POOL', '0') == '1'
+# DB_PGBOUNCER=1 is safe behind pgbouncer in transaction pooling mode: no server-side
+# cursors, and no prepared statements (psycopg 3 only; psycopg2 never prepares).
+DB_PGBOUNCER = os.getenv('DB_PGBOUNCER', '0') == '1'
+
+DB_OPTIONS = {}
+if DB_POOL:
+    DB_OPTIONS['pool'] = {
+        'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+        'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+        # Recycle connections after this many seconds, whatever their health.
+        'max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME', '1800')),
+        # Seconds a request waits for a free connection before failing.
+        'timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+    }
+if DB_PGBOUNCER and importlib.util.find_spec('psycopg') is not None:
+    DB_OPTIONS['prepare_threshold'] = None
+
 DATABASES = {
     "default": {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'kitchen.postgresql_pool' if DB_POOL else 'django.db.backends.postgresql',
         'NAME': os.getenv('PG_DBNAME', "postgres"),
         'USER': os.getenv('PG_USER', "postgres"),
         'PASSWORD': os.getenv('PG_PASSWORD', "postgres"),
         'HOST': os.getenv('PG_HOST', "localhost"),
         'PORT': os.getenv('PG_PORT', 5432),
+        'CONN_MAX_AGE': 0 if DB_POOL or ASYNC_VIEWS else int(os.getenv('CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
+        'DISABLE_SERVER_SIDE_CURSORS': DB_PGBOUNCER,
+        'OPTIONS': DB_OPTIONS,
+    }
+}
+
+# Streaming replicas of the primary as comma-separated host[:port], e.g. replica-1,replica-2:5433.
+# Safe requests read from one of them, see kitchen_app.routers.
+REPLICAS = []
+for number, replica in enumerate(filter(None, os.getenv('PG_REPLICA_HOSTS', '').split(',')), start=1):
+    host, _, port = replica.strip().partition(':')
+    REPLICAS.append(f'replica_{number}')
+    DATABASES[f'replica_{number}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'OPTIONS': {**DB_OPTIONS},
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['kitchen_app.routers.ReplicaRouter']
+
+# See kitchen_app.routers.DEFAULTS
+REPLICA_ROUTING = {
+    'REPLICAS': REPLICAS,
+    'STICKY_SECONDS': int(os.getenv('REPLICA_STICKY_SECONDS', '5')),
+}
+
+# Cache, locmem by default; set CACHE_BACKEND and CACHE_LOCATION to share it between workers
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'kitchen'),
     }
 }
 
@@ -95,11 +162,36 @@ REST_FRAMEWORK = {
     # YOUR SETTINGS
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'kitchen_app.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
 }
 
+# See kitchen_app.authentication.DEFAULTS
+TOKEN_AUTH_CACHE = {
+    'ENABLED': os.getenv('TOKEN_AUTH_CACHE', '1') == '1',
+    'CACHE_ALIAS': os.getenv('TOKEN_AUTH_CACHE_ALIAS') or None,
+}
+
+# See kitchen_app.instrumentation.DEFAULTS
+SQL_INSTRUMENTATION = {
+    'SAMPLE_RATE': float(os.getenv('SQL_INSTRUMENTATION_SAMPLE_RATE', '0.01')),
+    'BUDGET_MS': int(os.getenv('SQL_INSTRUMENTATION_BUDGET_MS', '500')),
+}
+
+# See kitchen_app.metrics.DEFAULTS; set METRICS_MULTIPROC_DIR when running several workers.
+METRICS = {
+    'MULTIPROCESS_DIR': os.getenv('METRICS_MULTIPROC_DIR') or None,
+    # Comma-separated addresses or networks allowed to scrape /metrics, e.g. 10.0.0.0/8.
+    'ALLOWED_NETWORKS': os.getenv('METRICS_ALLOWED_NETWORKS', '127.0.0.1,::1').split(','),
+}
+
+# See kitchen_app.planner.DEFAULTS
+MENU_PLANNER = {
+    'BEAM_WIDTH': int(os.getenv('MENU_PLANNER_BEAM_WIDTH', '64')),
+    'POOL_SIZE': int(os.getenv('MENU_PLANNER_POOL_SIZE', '200')),
+}
+
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Kitchen API',
     'DESCRIPTION': 'bla bla',
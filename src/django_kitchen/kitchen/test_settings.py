@@ -0,0 +1,6 @@
+"""Settings for the test suite: `python manage.py test --settings=kitchen.test_settings`."""
+from .settings import *  # noqa: F403
+from .settings import DATABASES
+
+# A second connection to the test database, standing in for a replica in tests.test_routers.
+DATABASES['replica'] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
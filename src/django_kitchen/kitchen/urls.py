@@ -16,6 +16,7 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import include, path
 from drf_spectacular.views import (
@@ -24,9 +25,12 @@ from drf_spectacular.views import (
     SpectacularSwaggerView,
 )
 
+from kitchen_app.metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('', include('kitchen_app.urls')),
+    path('', include('kitchen_app.async_urls' if settings.ASYNC_VIEWS else 'kitchen_app.urls')),
+    path('metrics', metrics_view, name='metrics'),
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
     # Optional UI:
     path('api/schema/swagger-ui/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
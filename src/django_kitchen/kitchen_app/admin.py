@@ -19,7 +19,7 @@ class RecipeIngredientInline(admin.TabularInline):
 class RecipeAdmin(admin.ModelAdmin):
     model = Recipe
     inlines = (RecipeIngredientInline, )
-    readonly_fields = ("created_at", )
+    readonly_fields = ("created_at", "cost")
 
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class RecipesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'kitchen_app'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .instrumentation import install_on_open_connections
+
+        install_on_open_connections()
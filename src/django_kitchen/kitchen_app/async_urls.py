@@ -0,0 +1,21 @@
+from django.urls import include, path
+from rest_framework.routers import DefaultRouter
+
+from . import async_views
+
+# Matched before kitchen_app.urls, which serves everything without an async version.
+router = DefaultRouter()
+router.register(r'recipes', async_views.RecipeViewSet, basename='api-recipes')
+router.register(r'ingredients', async_views.IngredientViewSet)
+router.register(r'recipe-categories', async_views.RecipeCategoryViewSet)
+router.register(r'ingredient-categories', async_views.IngredientCategoryViewSet)
+router.register(r'comments', async_views.CommentViewSet)
+
+urlpatterns = [
+    path('', async_views.home_page, name='homepage'),
+    path('recipes/', async_views.recipe_list_view, name='recipes'),
+    path('recipe/', async_views.recipe_view, name='recipe'),
+    path('ingredient/', async_views.ingredient_view, name='ingredient'),
+    path('api/', include(router.urls)),
+    path('', include('kitchen_app.urls')),
+]
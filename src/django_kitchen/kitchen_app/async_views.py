@@ -0,0 +1,242 @@
+"""Async versions of the read-heavy pages and API reads, served under ASGI.
+
+`kitchen_app.async_urls` routes the requests here when `settings.ASYNC_VIEWS` is on,
+which `kitchen/asgi.py` does by default. Writes are handed to the sync views in
+`kitchen_app.views`, so there is a single implementation of every POST.
+
+Django 5.0 runs each async ORM query through `sync_to_async` on the request's
+connection, so queries fired together with `asyncio.gather()` still reach PostgreSQL
+one after another. What the event loop saves is the thread a sync worker would keep
+blocked for the whole request.
+"""
+import asyncio
+import functools
+
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from django.shortcuts import redirect, render
+from django.utils.decorators import classonlymethod
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.response import Response
+
+from . import views
+from .cache import aread_through
+from .models import (
+    Counter,
+    Ingredient,
+    Recipe,
+    RecipeCategory,
+)
+
+
+async def _alist(queryset):
+    return [obj async for obj in queryset]
+
+
+async def _resolve_user(request):
+    # Resolved once up front, so the templates never load the lazy request.user from the event loop.
+    request.user = await request.auser()
+    return request.user
+
+
+async def home_page(request):
+    _, counts = await asyncio.gather(
+        _resolve_user(request),
+        Counter.objects.avalues_for(Counter.key_for(Recipe), Counter.key_for(Ingredient)),
+    )
+    return render(
+        request,
+        'index.html',
+        context={
+            'recipes': counts[Counter.key_for(Recipe)],
+            'ingredients': counts[Counter.key_for(Ingredient)],
+        }
+    )
+
+
+async def recipe_list_view(request):
+    if not (await _resolve_user(request)).is_authenticated:
+        return redirect('homepage')
+
+    target_category_id = int(request.GET.get('category_id', ''))
+
+    async def load():
+        return await asyncio.gather(
+            RecipeCategory.objects.aget(id=target_category_id),
+            _alist(
+                Recipe.objects.filter(
+                    category_id=target_category_id,
+                ).select_related('user').order_by('-created_at', '-id'),
+            ),
+        )
+
+    # Same key and value as the sync view, so both serve each other's entries.
+    category_inst, target_instances = await aread_through(
+        f'recipes:category:{target_category_id}', (RecipeCategory, Recipe), load,
+    )
+    return render(
+        request,
+        "collections/recipes.html",
+        {"recipes_list": target_instances, "category": category_inst},
+    )
+
+
+async def comment_page(recipe_id, cursor=None, page_size=views.COMMENTS_PAGE_SIZE):
+    queryset, ordering = views.comments_after(recipe_id, cursor)
+    return views.split_page(await _alist(queryset[:page_size + 1]), ordering, page_size)
+
+
+async def recipe_view(request):
+    if not (await _resolve_user(request)).is_authenticated:
+        return redirect('homepage')
+    if request.method == 'POST':
+        return await sync_to_async(views.recipe_view)(request)
+
+    try:
+        recipe_id = int(request.GET.get('id', ''))
+        # The reads only need the id, so none of them waits for another.
+        recipe, recipe_ingredients, (comments, next_cursor), similar_recipes = await asyncio.gather(
+            Recipe.objects.select_related('category', 'user').aget(id=recipe_id),
+            _alist(Ingredient.objects.filter(recipe=recipe_id)),
+            comment_page(recipe_id),
+            sync_to_async(views.similar_recipes)(recipe_id),
+        )
+    except (ValueError, Recipe.DoesNotExist):
+        return render(request, 'entities/recipe.html', {})
+
+    comment_form = views.CreateCommentForm()
+    comment_form.fields['recipe'].choices = [(recipe.id, recipe)]
+    return render(
+        request,
+        'entities/recipe.html',
+        {
+            'recipe': recipe,
+            'recipe_ingredients': recipe_ingredients,
+            'comment_form': comment_form,
+            'comments': comments,
+            'next_cursor': next_cursor,
+            'similar_recipes': similar_recipes,
+        },
+    )
+
+
+async def ingredient_view(request):
+    if not (await _resolve_user(request)).is_authenticated:
+        return redirect('homepage')
+    if request.method == 'POST':
+        return await sync_to_async(views.ingredient_view)(request)
+
+    try:
+        target_instance = await Ingredient.objects.select_related('category').aget(id=int(request.GET.get('id', '')))
+    except (ValueError, Ingredient.DoesNotExist):
+        return render(request, 'entities/ingredient.html', {})
+    return render(request, 'entities/ingredient.html', {'ingredient': target_instance})
+
+
+class AsyncReadMixin:
+    """Serves the `list` and `retrieve` actions of a viewset from coroutines.
+
+    Authentication, permissions and throttling still run in a thread, as DRF only has
+    sync hooks for them; the queries of the action itself are awaited. Every other
+    action is dispatched to the sync view.
+    """
+    async_actions = ('list', 'retrieve')
+
+    @classonlymethod
+    def as_view(cls, actions=None, **initkwargs):
+        sync_view = super().as_view(actions, **initkwargs)
+        methods = {method for method, action in actions.items() if action in cls.async_actions}
+        if not methods:
+            return sync_view
+        if 'get' in methods and 'head' not in actions:
+            methods.add('head')
+        sync_handler = sync_to_async(sync_view)
+
+        async def view(request, *args, **kwargs):
+            if request.method.lower() not in methods:
+                return await sync_handler(request, *args, **kwargs)
+
+            # The same set-up as ViewSetMixin.as_view() does for the sync view.
+            self = cls(**initkwargs)
+            self.action_map = {**actions, 'head': actions.get('head', actions.get('get'))}
+            for method, action in self.action_map.items():
+                if action is not None:
+                    setattr(self, method, getattr(self, action))
+            self.request = request
+            self.args = args
+            self.kwargs = kwargs
+            return await self.adispatch(request, *args, **kwargs)
+
+        functools.update_wrapper(view, cls, updated=())
+        view.cls = cls
+        view.initkwargs = initkwargs
+        view.actions = actions
+        return csrf_exempt(view)
+
+    async def adispatch(self, request, *args, **kwargs):
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            response = await getattr(self, f'a{self.action}')(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def alist(self, request, *args, **kwargs):
+        etag = self.list_etag(request, await self.table_version_queryset().afirst() or 0)
+        response = self.conditional_response(request, etag, None)
+        if response is not None:
+            return response
+
+        queryset = self.filter_queryset(self.get_queryset())
+        page = await self.paginator.apaginate_queryset(queryset, request, view=self)
+        data = self.get_serializer(page, many=True).data
+        return self.with_validators(self.get_paginated_response(data), etag, None)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        pk = self.lookup_pk()
+        if pk is None:
+            raise Http404
+
+        if self.last_modified_field is None:
+            value = await self.table_version_queryset().afirst() or 0
+        else:
+            value = await self.last_modified_queryset(pk).afirst()
+        etag, last_modified = self.detail_validators(pk, value)
+        response = self.conditional_response(request, etag, last_modified)
+        if response is not None:
+            return response
+
+        queryset = self.filter_queryset(self.get_queryset())
+        try:
+            instance = await queryset.aget(**{self.lookup_field: pk})
+        except queryset.model.DoesNotExist:
+            raise Http404
+        self.check_object_permissions(request, instance)
+        data = self.get_serializer(instance).data
+        return self.with_validators(Response(data), etag, last_modified)
+
+
+class RecipeViewSet(AsyncReadMixin, views.RecipeViewSet):
+    pass
+
+
+class IngredientViewSet(AsyncReadMixin, views.IngredientViewSet):
+    pass
+
+
+class RecipeCategoryViewSet(AsyncReadMixin, views.RecipeCategoryViewSet):
+    pass
+
+
+class IngredientCategoryViewSet(AsyncReadMixin, views.IngredientCategoryViewSet):
+    pass
+
+
+class CommentViewSet(AsyncReadMixin, views.CommentViewSet):
+    pass
@@ -0,0 +1,123 @@
+import collections
+import copy
+import functools
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from rest_framework.authentication import TokenAuthentication
+
+from .metrics import cache_result
+from .routers import primary_reads
+
+DEFAULTS = {
+    'ENABLED': True,
+    # Entries kept per process, least recently used evicted first.
+    'MAX_SIZE': 10000,
+    # Bounds how long another process may keep accepting a revoked token.
+    'TTL': 60,
+    # Django cache alias shared between processes, or None for the local LRU only.
+    'CACHE_ALIAS': None,
+}
+
+
+class TokenCache:
+    """Thread-safe LRU of `key -> (user, token)` whose entries expire after `ttl` seconds."""
+
+    def __init__(self, max_size, ttl, shared=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.shared = shared
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def shared_key(key):
+        # Never put the raw credential into a cache key.
+        return 'auth-token:' + hashlib.sha256(key.encode()).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    return value
+                del self._entries[key]
+
+        if self.shared is None:
+            return None
+        value = self.shared.get(self.shared_key(key))
+        if value is not None:
+            self._store(key, value)
+        return value
+
+    def set(self, key, value):
+        self._store(key, value)
+        if self.shared is not None:
+            self.shared.set(self.shared_key(key), value, timeout=self.ttl)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.shared is not None:
+            self.shared.delete(self.shared_key(key))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _store(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+def token_auth_settings():
+    return {**DEFAULTS, **getattr(settings, 'TOKEN_AUTH_CACHE', {})}
+
+
+@functools.cache
+def get_token_cache():
+    options = token_auth_settings()
+    shared = caches[options['CACHE_ALIAS']] if options['CACHE_ALIAS'] else None
+    return TokenCache(options['MAX_SIZE'], options['TTL'], shared)
+
+
+@receiver(setting_changed)
+def reset_token_cache(setting, **kwargs):
+    if setting in ('TOKEN_AUTH_CACHE', 'CACHES'):
+        get_token_cache.cache_clear()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """`TokenAuthentication` that skips the `authtoken_token` + `auth_user` query on a hit.
+
+    Tokens are cached after a successful lookup only, so unknown keys and inactive users
+    always reach the database. Entries are evicted by the signals in `kitchen_app.signals`
+    when a token is deleted or its user is saved, e.g. deactivated; other processes drop
+    them after `TTL` seconds. Configured with `settings.TOKEN_AUTH_CACHE`, see `DEFAULTS`.
+    """
+
+    def authenticate_credentials(self, key):
+        if not token_auth_settings()['ENABLED']:
+            return super().authenticate_credentials(key)
+
+        token_cache = get_token_cache()
+        cached = token_cache.get(key)
+        cache_result('token', cached is not None)
+        if cached is None:
+            # A token issued a moment ago may not have reached the replicas yet.
+            with primary_reads():
+                cached = super().authenticate_credentials(key)
+            token_cache.set(key, cached)
+        # Every request gets its own copy, so nothing a view sets on request.user leaks.
+        user, token = cached
+        return copy.copy(user), token
@@ -0,0 +1,150 @@
+"""Read-through cache for near-static listings, keyed on per-model generation numbers.
+
+Every write to a model bumps its generation (see `Counter.objects.bump_versions()`),
+which changes the keys of all entries computed from that model at once, so nothing is
+ever scanned or deleted. Only the Django cache API is used, so any backend works,
+locmem and file-based included.
+"""
+import asyncio
+import time
+import uuid
+
+from django.core.cache import cache
+
+from .metrics import cache_result
+from .routers import primary_reads
+
+DEFAULT_TIMEOUT = 300
+# How long one worker may hold the right to recompute an entry.
+LOCK_TIMEOUT = 10
+# How long the other workers wait for it before computing the value themselves.
+WAIT_TIMEOUT = 2
+WAIT_INTERVAL = 0.05
+
+_missing = object()
+
+
+def generation_key(model):
+    return f'generation:{model._meta.db_table}'
+
+
+def get_generations(models):
+    keys = [generation_key(model) for model in models]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            # Start from the clock rather than 1, so a generation evicted from the cache
+            # cannot come back with a value that old entries are still stored under.
+            cache.add(key, time.time_ns(), timeout=None)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def bump_generations(*models):
+    cache.set_many({generation_key(model): time.time_ns() for model in models}, timeout=None)
+
+
+def _acquire(lock_key):
+    # add() is not atomic on every backend (FileBasedCache checks, then writes), so the
+    # token is read back and only the last of several racing writers wins the lock.
+    # That narrows the race there rather than closing it: rarely, two workers recompute.
+    token = uuid.uuid4().hex
+    return cache.add(lock_key, token, timeout=LOCK_TIMEOUT) and cache.get(lock_key) == token
+
+
+def read_through(key, models, compute, timeout=DEFAULT_TIMEOUT):
+    """Return the cached value of `compute()` for the current generations of `models`.
+
+    On a miss a single worker recomputes the value, guarded by a `cache.add()` lock.
+    The others serve the previous value while it does, or wait for the new one if
+    there is none, and compute it themselves if the lock holder does not deliver.
+    """
+    generations = '.'.join(str(generation) for generation in get_generations(models))
+    current_key = f'{key}:{generations}'
+    latest_key = f'{key}:latest'
+
+    value = cache.get(current_key, _missing)
+    cache_result('listing', value is not _missing)
+    if value is not _missing:
+        return value
+
+    if _acquire(f'lock:{current_key}'):
+        try:
+            # The previous holder may have stored the value between the lookup and the lock.
+            value = cache.get(current_key, _missing)
+            if value is _missing:
+                # From the primary: a lagging replica would store old rows under the new generation.
+                with primary_reads():
+                    value = compute()
+                cache.set_many({current_key: value, latest_key: value}, timeout=timeout)
+        finally:
+            cache.delete(f'lock:{current_key}')
+        return value
+
+    value = cache.get(latest_key, _missing)
+    if value is not _missing:
+        return value
+
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_INTERVAL)
+        value = cache.get(current_key, _missing)
+        if value is not _missing:
+            return value
+    with primary_reads():
+        return compute()
+
+
+async def aget_generations(models):
+    keys = [generation_key(model) for model in models]
+    generations = await cache.aget_many(keys)
+    for key in keys:
+        if key not in generations:
+            await cache.aadd(key, time.time_ns(), timeout=None)
+            generations[key] = await cache.aget(key)
+    return [generations[key] for key in keys]
+
+
+async def _aacquire(lock_key):
+    token = uuid.uuid4().hex
+    return await cache.aadd(lock_key, token, timeout=LOCK_TIMEOUT) and await cache.aget(lock_key) == token
+
+
+async def aread_through(key, models, compute, timeout=DEFAULT_TIMEOUT):
+    """Async `read_through()` for the views in `kitchen_app.async_views`.
+
+    `compute` is a coroutine function. The entries are shared with `read_through()`,
+    so sync and async workers serve each other's values.
+    """
+    generations = '.'.join(str(generation) for generation in await aget_generations(models))
+    current_key = f'{key}:{generations}'
+    latest_key = f'{key}:latest'
+
+    value = await cache.aget(current_key, _missing)
+    cache_result('listing', value is not _missing)
+    if value is not _missing:
+        return value
+
+    if await _aacquire(f'lock:{current_key}'):
+        try:
+            value = await cache.aget(current_key, _missing)
+            if value is _missing:
+                with primary_reads():
+                    value = await compute()
+                await cache.aset_many({current_key: value, latest_key: value}, timeout=timeout)
+        finally:
+            await cache.adelete(f'lock:{current_key}')
+        return value
+
+    value = await cache.aget(latest_key, _missing)
+    if value is not _missing:
+        return value
+
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(WAIT_INTERVAL)
+        value = await cache.aget(current_key, _missing)
+        if value is not _missing:
+            return value
+    with primary_reads():
+        return await compute()
@@ -0,0 +1,95 @@
+import hashlib
+
+from django.http import HttpResponseNotModified
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+from .models import Counter
+
+
+class ConditionalGetMixin:
+    """ETag / Last-Modified handling for the list and retrieve actions of a viewset.
+
+    Validators are read before anything is serialized: a list is tagged with the version
+    of its table from the counters table, a single object with its `last_modified_field`
+    or, for models without one, the table version. A matching `If-None-Match` or
+    `If-Modified-Since` is answered with `304 Not Modified` after that one lookup.
+    """
+    last_modified_field = None
+
+    def list(self, request, *args, **kwargs):
+        etag = self.list_etag(request, self.table_version())
+        return self.conditional_response(request, etag, None) or self.with_validators(
+            super().list(request, *args, **kwargs), etag, None,
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        pk = self.lookup_pk()
+        if pk is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        if self.last_modified_field is None:
+            etag, last_modified = self.detail_validators(pk, self.table_version())
+        else:
+            etag, last_modified = self.detail_validators(pk, self.last_modified_queryset(pk).first())
+
+        return self.conditional_response(request, etag, last_modified) or self.with_validators(
+            super().retrieve(request, *args, **kwargs), etag, last_modified,
+        )
+
+    # The lookups below are querysets, so the async read path can await the same queries.
+
+    def table_version_queryset(self):
+        return Counter.objects.filter(
+            key=Counter.version_key(self.queryset.model),
+        ).values_list('value', flat=True)
+
+    def table_version(self):
+        return self.table_version_queryset().first() or 0
+
+    def last_modified_queryset(self, pk):
+        return self.queryset.model.objects.filter(
+            **{self.lookup_field: pk},
+        ).values_list(self.last_modified_field, flat=True)
+
+    def lookup_pk(self):
+        try:
+            return int(self.kwargs[self.lookup_url_kwarg or self.lookup_field])
+        except ValueError:
+            return None
+
+    @staticmethod
+    def list_etag(request, version):
+        # The same table version renders differently per query string and media type.
+        variant = hashlib.md5(
+            f'{request.get_full_path()} {request.accepted_media_type}'.encode(),
+        ).hexdigest()[:16]
+        return f'{version}-{variant}'
+
+    def detail_validators(self, pk, value):
+        """Return `(etag, last_modified)` from the table version or the last-modified time."""
+        # The same object renders differently per media type, e.g. JSON and the browsable API.
+        variant = hashlib.md5(self.request.accepted_media_type.encode()).hexdigest()[:8]
+        if self.last_modified_field is None:
+            return f'{value}-{pk}-{variant}', None
+        return (f'{pk}-{value.timestamp()}-{variant}' if value else None), value
+
+    def conditional_response(self, request, etag, last_modified):
+        if etag is None:
+            return None
+        response = get_conditional_response(
+            request,
+            etag=quote_etag(etag),
+            last_modified=last_modified and int(last_modified.timestamp()),
+        )
+        if isinstance(response, HttpResponseNotModified):
+            return self.with_validators(response, etag, last_modified)
+        return None
+
+    @staticmethod
+    def with_validators(response, etag, last_modified):
+        if etag is not None and response.status_code in (200, 304):
+            response['ETag'] = quote_etag(etag)
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified.timestamp())
+        return response
@@ -0,0 +1,130 @@
+import csv
+import json
+import zlib
+
+from asgiref.sync import sync_to_async
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q, Value
+
+from .models import Comment, Ingredient, Recipe
+
+CHUNK_SIZE = 2000
+# Rows are grouped into blocks of roughly this size before they are yielded or compressed.
+BLOCK_SIZE = 64 * 1024
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def _recipe_rows():
+    has_ingredients = Q(recipeingredient__isnull=False)
+    ordering = 'recipeingredient__ingredient_id'
+    rows = Recipe.objects.annotate(
+        ingredient_ids=ArrayAgg(
+            'recipeingredient__ingredient_id', filter=has_ingredients, ordering=ordering, default=Value([]),
+        ),
+        quantities=ArrayAgg(
+            'recipeingredient__quantity', filter=has_ingredients, ordering=ordering, default=Value([]),
+        ),
+    ).order_by('id').values(
+        'id', 'name', 'description', 'category_id', 'user_id', 'created_at', 'cost',
+        'ingredient_ids', 'quantities',
+    )
+
+    for row in rows.iterator(chunk_size=CHUNK_SIZE):
+        row['ingredients'] = [
+            {'ingredient_id': pk, 'quantity': quantity}
+            for pk, quantity in zip(row.pop('ingredient_ids'), row.pop('quantities'))
+        ]
+        yield row
+
+
+def _ingredient_rows():
+    rows = Ingredient.objects.order_by('id').values('id', 'name', 'category_id', 'price')
+    return rows.iterator(chunk_size=CHUNK_SIZE)
+
+
+def _comment_rows():
+    rows = Comment.objects.order_by('id').values('id', 'text', 'user_id', 'recipe_id', 'published_on')
+    return rows.iterator(chunk_size=CHUNK_SIZE)
+
+
+ENTITIES = {
+    'recipes': (
+        _recipe_rows,
+        ['id', 'name', 'description', 'category_id', 'user_id', 'created_at', 'cost', 'ingredients'],
+    ),
+    'ingredients': (_ingredient_rows, ['id', 'name', 'category_id', 'price']),
+    'comments': (_comment_rows, ['id', 'text', 'user_id', 'recipe_id', 'published_on']),
+}
+
+
+def _ndjson_lines(rows, columns):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def _csv_lines(rows, columns):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        if 'ingredients' in row:
+            row['ingredients'] = ';'.join(
+                f'{item["ingredient_id"]}:{item["quantity"]}' for item in row['ingredients']
+            )
+        yield writer.writerow([row[column] for column in columns])
+
+
+def _blocks(lines):
+    block, size = [], 0
+    for line in lines:
+        data = line.encode()
+        block.append(data)
+        size += len(data)
+        if size >= BLOCK_SIZE:
+            yield b''.join(block)
+            block, size = [], 0
+    if block:
+        yield b''.join(block)
+
+
+def _gzip(blocks):
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for block in blocks:
+        data = compressor.compress(block)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export(entity, fmt, compress=False):
+    """Return an iterator of encoded chunks with every row of `entity` in `fmt`.
+
+    Rows come from a server-side cursor and are never all held in memory, which makes the
+    result suitable for StreamingHttpResponse or for writing straight to a file.
+    """
+    rows, columns = ENTITIES[entity]
+    lines = _ndjson_lines if fmt == 'ndjson' else _csv_lines
+    blocks = _blocks(lines(rows(), columns))
+    return _gzip(blocks) if compress else blocks
+
+
+async def aiterate(chunks):
+    """Yield the chunks of `export()` under ASGI, each one read in the ORM's sync thread.
+
+    Django would otherwise turn a sync iterator into a list before sending anything.
+    """
+    next_chunk = sync_to_async(next)
+    try:
+        while (chunk := await next_chunk(chunks, None)) is not None:
+            yield chunk
+    finally:
+        # Closes the server-side cursor when the client goes away.
+        await sync_to_async(chunks.close)()
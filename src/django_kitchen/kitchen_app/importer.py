@@ -0,0 +1,124 @@
+import itertools
+import json
+from dataclasses import dataclass, field
+
+from django.db import DatabaseError, transaction
+
+from .models import Ingredient, Recipe, RecipeCategory, RecipeIngredient
+from .serializers import RecipeImportSerializer
+
+DEFAULT_CHUNK_SIZE = 1000
+# Only the first errors are kept, so a broken file cannot grow the report without bound.
+MAX_REPORTED_ERRORS = 1000
+
+
+@dataclass
+class ImportReport:
+    created: int = 0
+    failed: int = 0
+    errors: list = field(default_factory=list)
+
+    def add_error(self, line, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'errors': errors})
+
+    def as_dict(self):
+        return {'created': self.created, 'failed': self.failed, 'errors': self.errors}
+
+
+def import_recipes(lines, user, chunk_size=None):
+    """Import recipes from an iterable of NDJSON lines, one recipe per line.
+
+    Lines are consumed lazily and written `chunk_size` at a time, each chunk in its own
+    transaction, so memory stays flat and a bad line only rejects itself.
+    """
+    chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+    report = ImportReport()
+    numbered = ((number, line) for number, line in enumerate(lines, start=1) if line.strip())
+    while chunk := list(itertools.islice(numbered, chunk_size)):
+        _import_chunk(chunk, user, report)
+
+    report.errors.sort(key=lambda error: error['line'])
+    return report
+
+
+def _parse(chunk, report):
+    parsed = []
+    for number, line in chunk:
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            report.add_error(number, {'non_field_errors': [f'Invalid JSON: {e}']})
+            continue
+
+        serializer = RecipeImportSerializer(data=data)
+        if not serializer.is_valid():
+            report.add_error(number, serializer.errors)
+            continue
+        parsed.append((number, serializer.validated_data))
+    return parsed
+
+
+def _resolve(parsed, report):
+    categories = RecipeCategory.objects.in_bulk(
+        {data['category'] for _, data in parsed if data.get('category') is not None}
+    )
+    ingredients = Ingredient.objects.in_bulk(
+        {item['ingredient_id'] for _, data in parsed for item in data['ingredients']}
+    )
+
+    resolved = []
+    for number, data in parsed:
+        category_id = data.get('category')
+        ids = [item['ingredient_id'] for item in data['ingredients']]
+        if category_id is not None and category_id not in categories:
+            report.add_error(number, {'category': [f'Invalid pk "{category_id}" - object does not exist.']})
+        elif len(set(ids)) != len(ids):
+            report.add_error(number, {'ingredients': ['Duplicate ingredients.']})
+        elif missing := [pk for pk in ids if pk not in ingredients]:
+            report.add_error(number, {'ingredients': [f'Invalid pk "{missing[0]}" - object does not exist.']})
+        else:
+            resolved.append((number, data))
+    return resolved
+
+
+def _import_chunk(chunk, user, report):
+    resolved = _resolve(_parse(chunk, report), report)
+    if not resolved:
+        return
+
+    try:
+        _write(resolved, user)
+    except DatabaseError:
+        # One row the database refuses rolls back the chunk: write its lines one by
+        # one, so only that line is reported.
+        for number, data in resolved:
+            try:
+                _write([(number, data)], user)
+            except DatabaseError as e:
+                report.add_error(number, {'non_field_errors': [f'Rejected by the database: {e}']})
+            else:
+                report.created += 1
+        return
+
+    report.created += len(resolved)
+
+
+def _write(resolved, user):
+    recipes = [
+        Recipe(
+            name=data['name'],
+            description=data['description'],
+            category_id=data.get('category'),
+            user=user,
+        )
+        for _, data in resolved
+    ]
+    with transaction.atomic():
+        Recipe.objects.bulk_create(recipes)
+        RecipeIngredient.objects.bulk_create([
+            RecipeIngredient(recipe=recipe, ingredient_id=item['ingredient_id'], quantity=item['quantity'])
+            for recipe, (_, data) in zip(recipes, resolved)
+            for item in data['ingredients']
+        ])
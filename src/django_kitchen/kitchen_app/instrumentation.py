@@ -0,0 +1,224 @@
+"""Per-request SQL instrumentation, independent of `DEBUG`.
+
+`SQLInstrumentationMiddleware` collects the statements of a sample of the requests,
+reports the query count, SQL time and repeated statements in a `Server-Timing`
+header and logs the requests over budget. Requests outside the sample only pay for
+one `random.random()` call.
+
+Every connection gets `dispatch` as an execute wrapper when it is opened. It hands
+each statement to the collectors of the current request, kept in a contextvar, so
+queries are seen whichever thread runs them: under ASGI the ORM runs in the
+`sync_to_async` executor, on connections other than the event loop thread's.
+"""
+import contextlib
+import contextvars
+import functools
+import logging
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    # Fraction of the requests that are instrumented, 0 turns the middleware off.
+    'SAMPLE_RATE': 0.01,
+    # Instrumented requests slower than this are logged with their worst statements.
+    'BUDGET_MS': 500,
+    # Statements listed per category in the log record.
+    'TOP': 5,
+    # Who gets the Server-Timing header: True for every client, False for none, or
+    # 'staff' for staff users, and every client when DEBUG is on.
+    'HEADER': 'staff',
+}
+
+
+@functools.cache
+def instrumentation_settings():
+    return {**DEFAULTS, **getattr(settings, 'SQL_INSTRUMENTATION', {})}
+
+
+@receiver(setting_changed)
+def reset_instrumentation_settings(setting, **kwargs):
+    if setting == 'SQL_INSTRUMENTATION':
+        instrumentation_settings.cache_clear()
+
+
+# Collectors of the current request; sync_to_async() copies the context into its threads.
+_collectors = contextvars.ContextVar('sql_collectors', default=())
+
+
+def dispatch(execute, sql, params, many, context):
+    collectors = _collectors.get()
+    if not collectors:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        for collector in collectors:
+            collector.record(sql, elapsed)
+
+
+def install(connection):
+    # First in the list, so an execute_wrapper() block around the connect pops its own wrapper.
+    if dispatch not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, dispatch)
+
+
+@receiver(connection_created)
+def install_on_connect(sender, connection, **kwargs):
+    install(connection)
+
+
+def install_on_open_connections():
+    # For the connections opened before this module was imported, see RecipesConfig.ready().
+    for connection in connections.all(initialized_only=True):
+        install(connection)
+
+
+@contextlib.contextmanager
+def collect_queries(collector):
+    """Pass every statement run inside the block to `collector.record(sql, seconds)`."""
+    token = _collectors.set((*_collectors.get(), collector))
+    try:
+        yield collector
+    finally:
+        _collectors.reset(token)
+
+
+class QueryStats:
+    """Counts and times the statements run through it, grouped by their SQL text.
+
+    Statements only differing in their parameters share the SQL text, so a statement
+    run once per row of a list shows up as repeated.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        # sql -> [executions, total seconds, slowest execution]
+        self.statements = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.record(sql, time.perf_counter() - started)
+
+    def record(self, sql, elapsed):
+        self.count += 1
+        self.duration += elapsed
+        entry = self.statements.get(sql)
+        if entry is None:
+            self.statements[sql] = [1, elapsed, elapsed]
+        else:
+            entry[0] += 1
+            entry[1] += elapsed
+            entry[2] = max(entry[2], elapsed)
+
+    @property
+    def repeated(self):
+        """Executions of a statement beyond its first one."""
+        return self.count - len(self.statements)
+
+    def slowest(self, top):
+        ranked = sorted(self.statements.items(), key=lambda item: item[1][2], reverse=True)
+        return [(sql, slowest) for sql, (_, _, slowest) in ranked[:top]]
+
+    def most_repeated(self, top):
+        ranked = sorted(self.statements.items(), key=lambda item: item[1][0], reverse=True)
+        return [(sql, executions) for sql, (executions, _, _) in ranked[:top] if executions > 1]
+
+    def wrap(self):
+        return collect_queries(self)
+
+
+class SQLInstrumentationMiddleware:
+    """Reports the SQL of a sample of the requests, see `DEFAULTS`.
+
+    Listed first in `MIDDLEWARE`, so the session and user lookups are counted too.
+    Queries of a streaming response body run after the view returns and are not.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        options = instrumentation_settings()
+        if not self.sampled(options):
+            return self.get_response(request)
+
+        started = time.perf_counter()
+        with QueryStats().wrap() as stats:
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+        header = self.header_allowed(options, lambda: getattr(request, 'user', None))
+        self.report(request, response, stats, elapsed, options, header)
+        return response
+
+    async def __acall__(self, request):
+        options = instrumentation_settings()
+        if not self.sampled(options):
+            return await self.get_response(request)
+
+        started = time.perf_counter()
+        with QueryStats().wrap() as stats:
+            response = await self.get_response(request)
+        elapsed = time.perf_counter() - started
+        user = None
+        if options['HEADER'] == 'staff' and not settings.DEBUG and hasattr(request, 'auser'):
+            # request.user would load the user synchronously on the event loop.
+            user = await request.auser()
+        self.report(request, response, stats, elapsed, options, self.header_allowed(options, lambda: user))
+        return response
+
+    @staticmethod
+    def sampled(options):
+        rate = options['SAMPLE_RATE']
+        return rate >= 1 or (rate > 0 and random.random() < rate)
+
+    @staticmethod
+    def header_allowed(options, get_user):
+        if options['HEADER'] != 'staff':
+            return bool(options['HEADER'])
+        if settings.DEBUG:
+            return True
+        user = get_user()
+        return bool(user is not None and user.is_staff)
+
+    def report(self, request, response, stats, elapsed, options, header):
+        if header:
+            timing = (
+                f'sql;dur={stats.duration * 1000:.2f};desc="{stats.count} queries, {stats.repeated} repeated", '
+                f'total;dur={elapsed * 1000:.2f}'
+            )
+            existing = response.get('Server-Timing')
+            response['Server-Timing'] = f'{existing}, {timing}' if existing else timing
+
+        if elapsed * 1000 <= options['BUDGET_MS']:
+            return
+        lines = [
+            f'{request.method} {request.get_full_path()} took {elapsed * 1000:.1f} ms over the '
+            f'{options["BUDGET_MS"]} ms budget: {stats.count} queries in {stats.duration * 1000:.1f} ms, '
+            f'{stats.repeated} repeated',
+        ]
+        lines += [f'  slowest {slowest * 1000:.1f} ms: {sql}' for sql, slowest in stats.slowest(options['TOP'])]
+        lines += [f'  repeated {executions}x: {sql}' for sql, executions in stats.most_repeated(options['TOP'])]
+        logger.warning('\n'.join(lines))
@@ -0,0 +1,149 @@
+import asyncio
+import io
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare requests per second and p99 latency of the sync views behind the WSGI handler '
+        'and the async views behind the ASGI handler, with many slow clients at once.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('-n', '--requests', type=int, default=2000)
+        parser.add_argument('-c', '--concurrency', type=int, default=200, help='Clients sending requests at once.')
+        parser.add_argument(
+            '--threads', type=int, default=16,
+            help='WSGI worker threads, like gunicorn --threads; the ASGI handler needs none per request.',
+        )
+        parser.add_argument(
+            '--client-delay', type=float, default=20,
+            help='Milliseconds each client takes to read a response, holding the worker meanwhile.',
+        )
+        parser.add_argument('--url', default='/api/recipes/')
+
+    def handle(self, *args, **options):
+        if options['requests'] < options['concurrency']:
+            raise CommandError('--requests must be at least --concurrency.')
+
+        # Both handlers run in this process and open their own connections, so the
+        # benchmark user is committed and deleted afterwards, token included.
+        user = User.objects.create(username=f'bench-asgi-{time.time_ns()}')
+        try:
+            token = Token.objects.create(user=user)
+            headers = {'host': 'testserver', 'authorization': f'Token {token.key}'}
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                results = {
+                    'WSGI': self.run_wsgi(headers, options),
+                    'ASGI': self.run_asgi(headers, options),
+                }
+        finally:
+            user.delete()
+
+        for label, (rate, latencies) in results.items():
+            p50 = statistics.median(latencies)
+            p99 = statistics.quantiles(latencies, n=100)[98]
+            self.stdout.write(
+                f'{label}: {rate:8.1f} requests/s, p50 {p50 * 1000:7.1f} ms, p99 {p99 * 1000:7.1f} ms'
+            )
+        self.stdout.write(self.style.SUCCESS(f'Speedup: {results["ASGI"][0] / results["WSGI"][0]:.2f}x'))
+
+    @staticmethod
+    def split(options):
+        # Every client sends its share of the requests back to back.
+        share, extra = divmod(options['requests'], options['concurrency'])
+        return [share + (client < extra) for client in range(options['concurrency'])]
+
+    def run_wsgi(self, headers, options):
+        path, _, query = options['url'].partition('?')
+        environ = {
+            'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query, 'SCRIPT_NAME': '',
+            'SERVER_NAME': 'testserver', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+            'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(), 'wsgi.errors': self.stderr,
+            **{f'HTTP_{name.upper()}': value for name, value in headers.items()},
+        }
+        delay = options['client_delay'] / 1000
+        workers = threading.BoundedSemaphore(options['threads'])
+
+        with override_settings(ROOT_URLCONF='kitchen_app.urls'):
+            app = WSGIHandler()
+
+            def request():
+                started = time.perf_counter()
+                # Waiting for a free worker counts towards the latency, as behind gunicorn.
+                with workers:
+                    status = []
+                    response = app(dict(environ), lambda line, _: status.append(line))
+                    for _ in response:
+                        time.sleep(delay)
+                    response.close()
+                if not status[0].startswith('200'):
+                    raise CommandError(f'{options["url"]} returned {status[0]}')
+                return time.perf_counter() - started
+
+            def client(count):
+                return [request() for _ in range(count)]
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(options['concurrency']) as pool:
+                latencies = [latency for share in pool.map(client, self.split(options)) for latency in share]
+            return len(latencies) / (time.perf_counter() - started), latencies
+
+    def run_asgi(self, headers, options):
+        path, _, query = options['url'].partition('?')
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+            'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': query.encode(),
+            'root_path': '', 'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+            'headers': [(name.encode(), value.encode()) for name, value in headers.items()],
+        }
+        delay = options['client_delay'] / 1000
+
+        async def request(app):
+            started = time.perf_counter()
+            status = []
+            body_sent = False
+
+            async def receive():
+                nonlocal body_sent
+                if not body_sent:
+                    body_sent = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                # The client stays connected; Django cancels this wait once it has responded.
+                await asyncio.Event().wait()
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+                else:
+                    await asyncio.sleep(delay)
+
+            await app(dict(scope), receive, send)
+            if status[0] != 200:
+                raise CommandError(f'{options["url"]} returned {status[0]}')
+            return time.perf_counter() - started
+
+        async def run():
+            app = ASGIHandler()
+
+            async def client(count):
+                return [await request(app) for _ in range(count)]
+
+            started = time.perf_counter()
+            shares = await asyncio.gather(*(client(count) for count in self.split(options)))
+            latencies = [latency for share in shares for latency in share]
+            return len(latencies) / (time.perf_counter() - started), latencies
+
+        with override_settings(ROOT_URLCONF='kitchen_app.async_urls'):
+            return asyncio.run(run())
@@ -0,0 +1,57 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from rest_framework.authtoken.models import Token
+
+from kitchen_app.authentication import get_token_cache, token_auth_settings
+
+
+class Command(BaseCommand):
+    help = 'Compare the throughput of token-authenticated API requests with the token cache on and off.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('-n', '--requests', type=int, default=2000)
+        parser.add_argument('--url', default='/api/recipe-categories/')
+
+    def handle(self, *args, **options):
+        # The benchmark user and token are rolled back afterwards.
+        with transaction.atomic(), override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            user = User.objects.create(username=f'bench-auth-{time.time_ns()}')
+            token = Token.objects.create(user=user)
+            client = Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+            results = {}
+            for enabled in (False, True):
+                with override_settings(TOKEN_AUTH_CACHE={**token_auth_settings(), 'ENABLED': enabled}):
+                    get_token_cache().clear()
+                    results[enabled] = self.run(client, options['url'], options['requests'])
+            transaction.set_rollback(True)
+
+        for enabled, (rate, queries) in results.items():
+            label = 'cache on ' if enabled else 'cache off'
+            self.stdout.write(f'{label}: {rate:8.1f} requests/s, {queries:.2f} queries/request')
+        self.stdout.write(self.style.SUCCESS(f'Speedup: {results[True][0] / results[False][0]:.2f}x'))
+
+    def run(self, client, url, requests):
+        # Warm up, so the cache-on run is measured with the token already cached.
+        client.get(url)
+
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            started = time.perf_counter()
+            for _ in range(requests):
+                response = client.get(url)
+                if response.status_code != 200:
+                    raise RuntimeError(f'{url} returned {response.status_code}')
+            elapsed = time.perf_counter() - started
+        return requests / elapsed, queries / requests
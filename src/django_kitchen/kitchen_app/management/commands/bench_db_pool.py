@@ -0,0 +1,97 @@
+import copy
+import io
+import statistics
+import time
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.backends.postgresql.psycopg_any import is_psycopg3
+from django.db.utils import load_backend
+from django.test import override_settings
+
+POOL_ENGINE = 'kitchen.postgresql_pool'
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare request latency with a new database connection per request, persistent '
+        'connections and the psycopg 3 pool of kitchen.postgresql_pool.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('-n', '--requests', type=int, default=500)
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument('--url', default='/')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 2:
+            raise CommandError('--requests must be at least 2 to compute percentiles.')
+
+        base = copy.deepcopy(connections['default'].settings_dict)
+        base['OPTIONS'].pop('pool', None)
+        modes = {
+            'new connection': {**base, 'ENGINE': 'django.db.backends.postgresql', 'CONN_MAX_AGE': 0},
+            'persistent': {**base, 'ENGINE': 'django.db.backends.postgresql', 'CONN_MAX_AGE': None},
+        }
+        if is_psycopg3:
+            modes['pool'] = {
+                **base, 'ENGINE': POOL_ENGINE, 'CONN_MAX_AGE': 0,
+                'OPTIONS': {**base['OPTIONS'], 'pool': {'min_size': 1, 'max_size': 2}},
+            }
+        else:
+            self.stdout.write(self.style.WARNING('psycopg 3 is not installed, skipping the pool.'))
+
+        # Each mode gets its own connection object in place of the configured one; the
+        # handler closes or returns it at the end of every request like in production.
+        original = connections['default']
+        results = {}
+        try:
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                for label, settings_dict in modes.items():
+                    wrapper = load_backend(settings_dict['ENGINE']).DatabaseWrapper(
+                        copy.deepcopy(settings_dict), 'default',
+                    )
+                    connections['default'] = wrapper
+                    try:
+                        results[label] = self.run(options)
+                    finally:
+                        wrapper.close()
+                        if settings_dict['ENGINE'] == POOL_ENGINE:
+                            wrapper.close_pools()
+        finally:
+            connections['default'] = original
+
+        for label, latencies in results.items():
+            p50 = statistics.median(latencies)
+            p99 = statistics.quantiles(latencies, n=100)[98]
+            self.stdout.write(f'{label:15} p50 {p50 * 1000:7.2f} ms, p99 {p99 * 1000:7.2f} ms')
+        if 'pool' in results:
+            speedup = statistics.median(results['new connection']) / statistics.median(results['pool'])
+            self.stdout.write(self.style.SUCCESS(f'Pool speedup at p50: {speedup:.2f}x'))
+
+    def run(self, options):
+        path, _, query = options['url'].partition('?')
+        environ = {
+            'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query, 'SCRIPT_NAME': '',
+            'SERVER_NAME': 'testserver', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+            'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(), 'wsgi.errors': self.stderr,
+        }
+        app = WSGIHandler()
+
+        def request():
+            started = time.perf_counter()
+            status = []
+            response = app(dict(environ), lambda line, _: status.append(line))
+            for _ in response:
+                pass
+            # Sends request_finished, which closes the connection or hands it back.
+            response.close()
+            if not status[0].startswith('200'):
+                raise CommandError(f'{options["url"]} returned {status[0]}')
+            return time.perf_counter() - started
+
+        for _ in range(options['warmup']):
+            request()
+        return [request() for _ in range(options['requests'])]
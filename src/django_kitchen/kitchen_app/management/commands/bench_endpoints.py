@@ -0,0 +1,265 @@
+import dataclasses
+import json
+import statistics
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from kitchen_app import urls
+from kitchen_app.models import (
+    Comment,
+    Ingredient,
+    IngredientCategory,
+    Recipe,
+    RecipeCategory,
+)
+from kitchen_app.planner import np
+from kitchen_app.seeding import SeedSize, seed_catalog
+
+# URL names that only accept writes, so there is nothing to benchmark with a GET.
+WRITE_ONLY = {'comment', 'api-recipes-bulk-import'}
+
+# Metrics compared against the baseline. Timings and sizes may grow by --threshold,
+# the query count is deterministic and may not grow at all.
+TIMED_METRICS = ('p50_ms', 'p95_ms', 'p99_ms', 'sql_ms')
+COMPARED_METRICS = (*TIMED_METRICS, 'queries', 'bytes')
+
+
+def url_names():
+    """Return the names of every URL of kitchen_app.urls, router endpoints included."""
+    names = {pattern.name for pattern in urls.urlpatterns if getattr(pattern, 'name', None)}
+    names.update(pattern.name for pattern in urls.router.urls if pattern.name)
+    return names - WRITE_ONLY
+
+
+def endpoints():
+    """Return `{url name: (path, query)}` for the GET requests of the benchmark.
+
+    The ids are taken from the most recently inserted rows, the seeded ones unless
+    --no-seed is given.
+    """
+    comment = Comment.objects.order_by('-id').first()
+    ingredient = Ingredient.objects.order_by('-id').first()
+    r_cat = RecipeCategory.objects.order_by('-id').first()
+    i_cat = IngredientCategory.objects.order_by('-id').first()
+    # The largest category, so there are recipes for every slot of the menu.
+    largest = Recipe.objects.exclude(category=None).values_list('category_id').annotate(
+        total=Count('pk'),
+    ).order_by('-total').first()
+    if None in (comment, ingredient, r_cat, i_cat, largest):
+        raise CommandError('No catalog to benchmark, run without --no-seed.')
+
+    recipe_id = comment.recipe_id
+    recipe_ids = Recipe.objects.order_by('-id').values_list('id', flat=True)[:50]
+    have = ','.join(str(pk) for pk in Ingredient.objects.order_by('-id').values_list('id', flat=True)[:20])
+    requests = {
+        'homepage': ([], {}),
+        'recipes': ([], {'category_id': r_cat.id}),
+        'recipe_categories': ([], {}),
+        'recipe': ([], {'id': recipe_id}),
+        'recipe_comments': ([], {'id': recipe_id}),
+        'ingredient_categories': ([], {}),
+        'ingredients': ([], {'category_id': i_cat.id}),
+        'ingredient': ([], {'id': ingredient.id}),
+        'register': ([], {}),
+        'profile': ([], {}),
+        'swagger-ui': ([], {}),
+        'export': (['ingredients'], {}),
+        'api-root': ([], {}),
+        'api-recipes-list': ([], {}),
+        'api-recipes-detail': ([recipe_id], {}),
+        'api-recipes-cookable': ([], {'have': have}),
+        'api-recipes-menu': ([], {'slots': f'{largest[0]}:2'}),
+        'api-recipes-similar': ([recipe_id], {}),
+        'api-recipes-shopping-list': ([], {'recipes': ','.join(f'{pk}:2' for pk in recipe_ids)}),
+        'ingredient-list': ([], {}),
+        'ingredient-detail': ([ingredient.id], {}),
+        'ingredient-autocomplete': ([], {'q': ingredient.name[:4]}),
+        'recipecategory-list': ([], {}),
+        'recipecategory-detail': ([r_cat.id], {}),
+        'ingredientcategory-list': ([], {}),
+        'ingredientcategory-detail': ([i_cat.id], {}),
+        'comment-list': ([], {}),
+        'comment-detail': ([comment.id], {}),
+    }
+
+    missing = url_names() - requests.keys()
+    if missing:
+        raise CommandError(f'No benchmark request for: {", ".join(sorted(missing))}.')
+    # The menu planner needs the optional NumPy dependency.
+    unavailable = set() if np is not None else {'api-recipes-menu'}
+    return {
+        name: (reverse(name, args=args), query)
+        for name, (args, query) in requests.items()
+        if name not in unavailable
+    }
+
+
+def regressions(baseline, results, threshold, min_delta_ms):
+    """Yield `(endpoint, metric, before, after)` for every metric worse than the baseline."""
+    for name, metrics in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        for metric in COMPARED_METRICS:
+            old, new = before[metric], metrics[metric]
+            if metric == 'queries':
+                worse = new > old
+            elif metric in TIMED_METRICS:
+                # Sub-millisecond jitter is not a regression, however large in relative terms.
+                worse = new > old * (1 + threshold) and new - old > min_delta_ms
+            else:
+                worse = new > old * (1 + threshold)
+            if worse:
+                yield name, metric, old, new
+
+
+class Command(BaseCommand):
+    help = (
+        'Request every page and API endpoint against a seeded dataset, record latency '
+        'percentiles, query count, SQL time and response size, and fail on regressions '
+        'against a stored JSON baseline.'
+    )
+
+    def add_arguments(self, parser):
+        for field in dataclasses.fields(SeedSize):
+            parser.add_argument(f'--{field.name.replace("_", "-")}', type=int, default=field.default)
+        parser.add_argument(
+            '--no-seed', action='store_true',
+            help='Benchmark the data already in the database instead of seeding.',
+        )
+        parser.add_argument('-n', '--requests', type=int, default=50, help='Measured requests per endpoint.')
+        parser.add_argument('--warmup', type=int, default=3, help='Unmeasured requests per endpoint.')
+        parser.add_argument('--only', action='append', default=[], help='URL name to benchmark, repeatable.')
+        parser.add_argument('--baseline', type=Path, default=settings.BASE_DIR / 'bench_baseline.json')
+        parser.add_argument('--save', action='store_true', help='Write the results as the new baseline.')
+        parser.add_argument(
+            '--threshold', type=float, default=0.2,
+            help='Allowed relative growth of timings and response sizes, 0.2 is 20%%.',
+        )
+        parser.add_argument(
+            '--min-delta-ms', type=float, default=1.0,
+            help='Timings that grew by less than this many milliseconds never count as regressions.',
+        )
+
+    def handle(self, *args, **options):
+        if options['requests'] < 2:
+            raise CommandError('--requests must be at least 2 to compute percentiles.')
+
+        size = None
+        if not options['no_seed']:
+            size = SeedSize(**{field.name: options[field.name] for field in dataclasses.fields(SeedSize)})
+        meta = {'size': dataclasses.asdict(size) if size else None, 'requests': options['requests']}
+
+        baseline = None
+        if options['baseline'].exists() and not options['save']:
+            baseline = json.loads(options['baseline'].read_text())
+            if baseline['meta'] != meta:
+                raise CommandError(
+                    f'{options["baseline"]} was recorded with {baseline["meta"]}, not {meta}; '
+                    'rerun with the same options or record a new baseline with --save.'
+                )
+
+        # Everything runs in one transaction that is rolled back, seeded rows included; the
+        # replicas cannot see its rows, so every request reads from the primary.
+        with (
+            transaction.atomic(),
+            override_settings(
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+                REPLICA_ROUTING={**settings.REPLICA_ROUTING, 'REPLICAS': []},
+            ),
+        ):
+            if size is not None:
+                self.stdout.write(f'Seeding {size}...')
+                seed_catalog(size)
+
+            user = User.objects.create(username=f'bench-endpoints-{time.time_ns()}', is_superuser=True)
+            client = Client()
+            client.force_login(user)
+
+            targets = endpoints()
+            unknown = set(options['only']) - targets.keys()
+            if unknown:
+                raise CommandError(f'Unknown URL name: {", ".join(sorted(unknown))}.')
+
+            results = {}
+            for name, (path, query) in targets.items():
+                if options['only'] and name not in options['only']:
+                    continue
+                results[name] = self.measure(client, path, query, options)
+                self.stdout.write(self.format(name, results[name]))
+            transaction.set_rollback(True)
+
+        if options['save']:
+            options['baseline'].write_text(json.dumps({'meta': meta, 'endpoints': results}, indent=2) + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Baseline written to {options["baseline"]}.'))
+            return
+        if baseline is None:
+            self.stdout.write(self.style.WARNING(f'No baseline at {options["baseline"]}, record one with --save.'))
+            return
+
+        found = list(regressions(baseline['endpoints'], results, options['threshold'], options['min_delta_ms']))
+        for name, metric, old, new in found:
+            self.stdout.write(self.style.ERROR(f'{name}: {metric} {old} -> {new}'))
+        if found:
+            raise CommandError(f'{len(found)} metric(s) regressed against {options["baseline"]}.')
+        self.stdout.write(self.style.SUCCESS('No regressions against the baseline.'))
+
+    def measure(self, client, path, query, options):
+        for _ in range(options['warmup']):
+            self.get(client, path, query)
+
+        queries = 0
+        sql_time = 0.0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries, sql_time
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                queries += 1
+                sql_time += time.perf_counter() - started
+
+        latencies = []
+        with connection.execute_wrapper(count):
+            for _ in range(options['requests']):
+                started = time.perf_counter()
+                size = self.get(client, path, query)
+                latencies.append(time.perf_counter() - started)
+
+        requests = options['requests']
+        percentiles = statistics.quantiles(latencies, n=100)
+        return {
+            'p50_ms': round(statistics.median(latencies) * 1000, 3),
+            'p95_ms': round(percentiles[94] * 1000, 3),
+            'p99_ms': round(percentiles[98] * 1000, 3),
+            'queries': round(queries / requests, 2),
+            'sql_ms': round(sql_time / requests * 1000, 3),
+            'bytes': size,
+        }
+
+    @staticmethod
+    def get(client, path, query):
+        """Request `path` and return the size of the body, streamed ones read to the end."""
+        response = client.get(path, query)
+        if response.status_code != 200:
+            raise CommandError(f'{path} returned {response.status_code}')
+        if response.streaming:
+            return sum(len(chunk) for chunk in response.streaming_content)
+        return len(response.content)
+
+    @staticmethod
+    def format(name, metrics):
+        return (
+            f'{name:26} p50 {metrics["p50_ms"]:8.2f} ms  p95 {metrics["p95_ms"]:8.2f} ms  '
+            f'p99 {metrics["p99_ms"]:8.2f} ms  {metrics["queries"]:6.2f} queries  '
+            f'{metrics["sql_ms"]:7.2f} ms SQL  {metrics["bytes"]:8} bytes'
+        )
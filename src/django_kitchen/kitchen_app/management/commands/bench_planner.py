@@ -0,0 +1,94 @@
+import dataclasses
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from kitchen_app.planner import load_catalog, np, parse_slots, plan
+from kitchen_app.seeding import SeedSize, seed_catalog
+
+# A catalog the size the planner is meant for; comments play no part in it.
+DEFAULT_SIZE = SeedSize(recipes=100_000, comments=0)
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the weekly menu planner on a seeded catalog, 100k recipes by default: loading '
+        'the recipe × ingredient arrays, as every write to recipes or ingredients reloads them, '
+        'then planning menus from them.'
+    )
+
+    def add_arguments(self, parser):
+        for field in dataclasses.fields(SeedSize):
+            parser.add_argument(
+                f'--{field.name.replace("_", "-")}', type=int, default=getattr(DEFAULT_SIZE, field.name),
+            )
+        parser.add_argument(
+            '--no-seed', action='store_true',
+            help='Plan over the recipes already in the database instead of seeding.',
+        )
+        parser.add_argument('-n', '--runs', type=int, default=20, help='Menus planned.')
+        parser.add_argument('--reloads', type=int, default=5, help='Times the catalog is loaded.')
+        parser.add_argument(
+            '--slots', default='',
+            help='category_id:count pairs as in the API, by default 3, 2 and 2 recipes of the largest categories.',
+        )
+        parser.add_argument('--waste', type=float, default=1.0)
+        parser.add_argument('--beam-width', type=int, default=None)
+        parser.add_argument('--pool-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        if np is None:
+            raise CommandError("The menu planner requires NumPy, install the 'planner' extra.")
+        if options['runs'] < 2:
+            raise CommandError('--runs must be at least 2 to compute percentiles.')
+        if options['reloads'] < 1:
+            raise CommandError('--reloads must be at least 1.')
+        try:
+            slots = parse_slots(options['slots'])
+        except ValueError:
+            raise CommandError('--slots must be a comma-separated list of category_id[:count].')
+
+        # The seeded rows are rolled back.
+        with transaction.atomic():
+            if not options['no_seed']:
+                size = SeedSize(**{field.name: options[field.name] for field in dataclasses.fields(SeedSize)})
+                self.stdout.write(f'Seeding {size}...')
+                seed_catalog(size)
+
+            loads = []
+            for _ in range(options['reloads']):
+                started = time.perf_counter()
+                catalog = load_catalog()
+                loads.append(time.perf_counter() - started)
+            transaction.set_rollback(True)
+
+        if not slots:
+            categories, counts = np.unique(catalog.categories[catalog.categories >= 0], return_counts=True)
+            largest = categories[np.argsort(-counts, kind='stable')][:3]
+            slots = dict(zip(largest.tolist(), (3, 2, 2)))
+        # Menus are planned on the previous catalog while a worker reloads it.
+        self.stdout.write(
+            f'Catalog of {len(catalog.recipe_ids)} recipes and {len(catalog.indices)} recipe ingredients '
+            f'reloaded in p50 {statistics.median(loads) * 1000:.1f} ms, max {max(loads) * 1000:.1f} ms.'
+        )
+
+        timings = []
+        for _ in range(options['runs']):
+            started = time.perf_counter()
+            menu = plan(
+                catalog, slots, waste=options['waste'],
+                beam_width=options['beam_width'], pool_size=options['pool_size'],
+            )
+            timings.append(time.perf_counter() - started)
+        if menu is None:
+            raise CommandError(f'The catalog has too few recipes for {slots}.')
+
+        p50 = statistics.median(timings)
+        p99 = statistics.quantiles(timings, n=100)[98]
+        self.stdout.write(f'Menu for {slots}: recipes {menu.recipe_ids}')
+        self.stdout.write(
+            f'cost {menu.cost}, leftovers {menu.leftovers:.0f}, {menu.shared_ingredients} shared ingredients'
+        )
+        self.stdout.write(self.style.SUCCESS(f'Planning p50 {p50 * 1000:.2f} ms, p99 {p99 * 1000:.2f} ms'))
@@ -0,0 +1,74 @@
+import dataclasses
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from kitchen_app.models import Comment, Recipe, RecipeCategory
+from kitchen_app.seeding import SeedSize, seed_catalog
+from kitchen_app.views import PROFILE_RECIPES_SQL
+
+
+def view_queries():
+    """Yield `(label, index, sql, params)` for the hot queries of the HTML views.
+
+    `index` is the index the plan is expected to read. Small result sets may still be
+    fetched with a bitmap scan and sorted in memory, which the planner rightly prefers.
+    """
+    recipe = Recipe.objects.order_by('id').first()
+    category = RecipeCategory.objects.order_by('id').first()
+    if recipe is None or category is None:
+        raise CommandError('No recipes to explain, run without --no-seed.')
+
+    querysets = (
+        ('recipe_list_view: recipes of a category', 'recipes_category_created_idx',
+         Recipe.objects.filter(category_id=category.id).order_by('-created_at', '-id')),
+        ('recipe_view: comments of a recipe', 'comments_recipe_published_idx',
+         Comment.objects.filter(recipe_id=recipe.id).order_by('-published_on', '-id')),
+        ('recipe_view: ingredients of a recipe', 'recipes_ingredients_recipe_id_ingredient_id',
+         recipe.ingredients.all()),
+    )
+    for label, index, queryset in querysets:
+        yield (label, index, *queryset.query.sql_with_params())
+    yield 'profile: recipes of a user', 'recipes_user_created_idx', PROFILE_RECIPES_SQL, (recipe.user_id,)
+
+
+class Command(BaseCommand):
+    help = 'Run EXPLAIN (ANALYZE, BUFFERS) for the queries of the HTML views against a seeded dataset.'
+
+    def add_arguments(self, parser):
+        for field in dataclasses.fields(SeedSize):
+            parser.add_argument(f'--{field.name.replace("_", "-")}', type=int, default=field.default)
+        parser.add_argument(
+            '--no-seed', action='store_true',
+            help='Explain against the data already in the database instead of seeding.',
+        )
+
+    def handle(self, *args, **options):
+        missing = 0
+        # Everything runs in one transaction that is rolled back, seeded rows included.
+        with transaction.atomic():
+            if not options['no_seed']:
+                size = SeedSize(**{field.name: options[field.name] for field in dataclasses.fields(SeedSize)})
+                self.stdout.write(f'Seeding {size}...')
+                seed_catalog(size)
+
+            for label, index, sql, params in view_queries():
+                plan = self.explain(sql, params)
+
+                self.stdout.write(self.style.MIGRATE_HEADING(label))
+                self.stdout.write(plan)
+                if index not in plan:
+                    missing += 1
+                    self.stdout.write(self.style.WARNING(f'Expected a scan on {index}.'))
+                self.stdout.write('')
+            transaction.set_rollback(True)
+
+        if missing:
+            self.stdout.write(self.style.WARNING(f'{missing} plan(s) do not use the expected index.'))
+        else:
+            self.stdout.write(self.style.SUCCESS('All plans use the expected indexes.'))
+
+    def explain(self, sql, params):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS) {sql}', params)
+            return '\n'.join(row[0] for row in cursor.fetchall())
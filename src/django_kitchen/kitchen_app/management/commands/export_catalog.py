@@ -0,0 +1,28 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from kitchen_app.exporter import ENTITIES, FORMATS, export
+
+
+class Command(BaseCommand):
+    help = 'Stream every recipe, ingredient or comment to a file as NDJSON or CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('entity', choices=sorted(ENTITIES))
+        parser.add_argument('--format', choices=sorted(FORMATS), default='ndjson')
+        parser.add_argument('--gzip', action='store_true', help='Compress the output with gzip.')
+        parser.add_argument('-o', '--output', default='-', help='File to write, or "-" for stdout.')
+
+    def handle(self, *args, **options):
+        chunks = export(options['entity'], options['format'], compress=options['gzip'])
+
+        if options['output'] == '-':
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+            return
+
+        with open(options['output'], 'wb') as file:
+            for chunk in chunks:
+                file.write(chunk)
@@ -0,0 +1,33 @@
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from kitchen_app.importer import DEFAULT_CHUNK_SIZE, import_recipes
+
+
+class Command(BaseCommand):
+    help = 'Import recipes from an NDJSON file, one recipe per line.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='NDJSON file to read, or "-" for stdin.')
+        parser.add_argument('--user', required=True, help='Username the recipes are created for.')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f'User "{options["user"]}" does not exist.')
+
+        if options['path'] == '-':
+            report = import_recipes(sys.stdin, user, options['chunk_size'])
+        else:
+            with open(options['path'], encoding='utf-8') as lines:
+                report = import_recipes(lines, user, options['chunk_size'])
+
+        for error in report.errors:
+            self.stderr.write(f'line {error["line"]}: {error["errors"]}')
+        if report.failed > len(report.errors):
+            self.stderr.write(f'... {report.failed - len(report.errors)} more errors not shown')
+        self.stdout.write(self.style.SUCCESS(f'Imported {report.created} recipes, {report.failed} failed.'))
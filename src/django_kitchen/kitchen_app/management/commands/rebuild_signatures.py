@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from kitchen_app.models import RecipeSignature
+
+
+class Command(BaseCommand):
+    help = 'Recompute the MinHash signatures and LSH band keys behind the similar recipes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Recipes per statement.')
+
+    def handle(self, *args, **options):
+        count = RecipeSignature.objects.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt the signatures of {count} recipes.'))
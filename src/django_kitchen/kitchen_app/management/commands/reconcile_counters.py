@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from kitchen_app.models import Counter
+
+
+class Command(BaseCommand):
+    help = 'Recount recipes and ingredients and fix any drift in the counters table.'
+
+    def handle(self, *args, **options):
+        drift = Counter.objects.reconcile()
+        for key, delta in sorted(drift.items()):
+            self.stdout.write(f'{key}: {delta:+d}')
+        self.stdout.write(self.style.SUCCESS(f'Reconciled counters, {len(drift)} drifted.'))
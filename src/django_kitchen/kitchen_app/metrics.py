@@ -0,0 +1,449 @@
+"""In-process metrics in the Prometheus text format.
+
+Every metric keeps its values in a plain dict guarded by its own lock, which is
+uncontended but for the rare moment two threads record the same metric at once.
+With `settings.METRICS['MULTIPROCESS_DIR']` set, every process writes a snapshot of
+its registry to `<dir>/<pid>-<token>.json` at most every `FLUSH_INTERVAL` seconds, the
+token telling apart processes that got the same pid. The `/metrics` view sums the
+snapshots of all processes: counters and histograms over every process that ever
+ran, gauges over the live ones only. Snapshots of exited processes are folded into
+`<dir>/archive.json` on collection, so neither their files nor their counts pile up.
+
+`/metrics` answers staff users and the addresses of `ALLOWED_NETWORKS` only, as it
+lists every route with its latency and query profile.
+"""
+import fcntl
+import functools
+import ipaddress
+import json
+import os
+import re
+import threading
+import time
+import uuid
+import weakref
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+
+from .instrumentation import collect_queries
+
+DEFAULTS = {
+    # Directory shared by the worker processes of one host, or None for this process only.
+    'MULTIPROCESS_DIR': None,
+    'FLUSH_INTERVAL': 1.0,
+    # Addresses or networks the scraper connects from; staff users are let in from anywhere.
+    'ALLOWED_NETWORKS': ['127.0.0.1', '::1'],
+}
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+ARCHIVE = 'archive.json'
+# `<pid>-<token>.json`; files from before the token was added have none.
+SNAPSHOT_NAME = re.compile(r'^(\d+)(?:-\w+)?\.json$')
+
+# Any other method is counted as `other`, so clients cannot add series at will.
+METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+@functools.cache
+def metrics_settings():
+    return {**DEFAULTS, **getattr(settings, 'METRICS', {})}
+
+
+@receiver(setting_changed)
+def reset_metrics_settings(setting, **kwargs):
+    if setting == 'METRICS':
+        metrics_settings.cache_clear()
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in pairs) + '}'
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def snapshot(self):
+        with self._lock:
+            return {json.dumps(key): self.copy_value(value) for key, value in self._values.items()}
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    @staticmethod
+    def copy_value(value):
+        return value
+
+    @staticmethod
+    def merge(values, snapshot):
+        """Add the values of one process' `snapshot` to the `values` of the others."""
+        for key, value in snapshot.items():
+            values[key] = values.get(key, 0) + value
+
+    def exposition(self, values):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+        for key, value in sorted(values.items()):
+            lines.append(f'{self.name}{format_labels(self.labelnames, json.loads(key))} {value}')
+        return lines
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    """A value set by this process, or computed by `function` when it is collected."""
+    type = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), function=None):
+        super().__init__(name, documentation, labelnames)
+        self.function = function
+
+    def set(self, *labels, value):
+        with self._lock:
+            self._values[labels] = value
+
+    def snapshot(self):
+        if self.function is not None:
+            return {json.dumps(list(labels)): value for labels, value in self.function().items()}
+        return super().snapshot()
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, *labels, value):
+        # Counts per bucket, not cumulative; the last one is +Inf.
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    @staticmethod
+    def copy_value(value):
+        return [list(value[0]), value[1]]
+
+    @staticmethod
+    def merge(values, snapshot):
+        for key, (counts, total) in snapshot.items():
+            if key not in values:
+                values[key] = [list(counts), total]
+                continue
+            entry = values[key]
+            entry[0] = [a + b for a, b in zip(entry[0], counts)]
+            entry[1] += total
+
+    def exposition(self, values):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+        for key, (counts, total) in sorted(values.items()):
+            labels = json.loads(key)
+            cumulative = 0
+            for bound, count in zip([*self.buckets, '+Inf'], counts):
+                cumulative += count
+                lines.append(
+                    f'{self.name}_bucket{format_labels(self.labelnames, labels, [("le", bound)])} {cumulative}'
+                )
+            lines.append(f'{self.name}_sum{format_labels(self.labelnames, labels)} {total}')
+            lines.append(f'{self.name}_count{format_labels(self.labelnames, labels)} {cumulative}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self._next_flush = 0.0
+        self._flush_lock = threading.Lock()
+        self.token = uuid.uuid4().hex[:12]
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def reset(self):
+        for metric in self.metrics.values():
+            metric.reset()
+        self._next_flush = 0.0
+        self.token = uuid.uuid4().hex[:12]
+
+    def snapshot(self):
+        return {name: metric.snapshot() for name, metric in self.metrics.items()}
+
+    def maybe_flush(self):
+        directory = metrics_settings()['MULTIPROCESS_DIR']
+        if directory is None or time.monotonic() < self._next_flush:
+            return
+        # A concurrent request flushes already, this one need not wait for it.
+        if self._flush_lock.acquire(blocking=False):
+            try:
+                self.flush(directory)
+            finally:
+                self._flush_lock.release()
+
+    def flush(self, directory):
+        self._next_flush = time.monotonic() + metrics_settings()['FLUSH_INTERVAL']
+        path = os.path.join(directory, f'{os.getpid()}-{self.token}.json')
+        # Written aside and renamed, so a scrape never reads half a snapshot.
+        with open(f'{path}.tmp', 'w') as file:
+            json.dump(self.snapshot(), file)
+        os.replace(f'{path}.tmp', path)
+
+    def collect(self):
+        """Return `{metric name: values}` over this process, or every process of the directory."""
+        directory = metrics_settings()['MULTIPROCESS_DIR']
+        if directory is None:
+            return self.snapshot()
+
+        with self._flush_lock:
+            self.flush(directory)
+        self.archive_exited(directory)
+
+        collected = {name: {} for name in self.metrics}
+        for filename in os.listdir(directory):
+            if filename != ARCHIVE and not SNAPSHOT_NAME.match(filename):
+                continue
+            try:
+                with open(os.path.join(directory, filename)) as file:
+                    snapshot = json.load(file)
+            except (OSError, ValueError):
+                continue
+            for name, values in snapshot.items():
+                metric = self.metrics.get(name)
+                if metric is None or (metric.type == 'gauge' and filename == ARCHIVE):
+                    continue
+                metric.merge(collected[name], values)
+        return collected
+
+    def archive_exited(self, directory):
+        """Add the counters and histograms of exited processes to the archive, drop their files."""
+        snapshots = {}
+        for filename in os.listdir(directory):
+            match = SNAPSHOT_NAME.match(filename)
+            if match is None:
+                continue
+            try:
+                mtime = os.stat(os.path.join(directory, filename)).st_mtime
+            except FileNotFoundError:
+                continue
+            snapshots.setdefault(int(match[1]), []).append((mtime, filename))
+
+        exited = []
+        for pid, files in snapshots.items():
+            files.sort()
+            # Of several processes that had one pid, only the last to flush can be alive.
+            exited += [filename for _, filename in (files if not pid_alive(pid) else files[:-1])]
+        if not exited:
+            return
+
+        # Concurrent scrapes take turns; a file another one archived is gone by then.
+        with open(os.path.join(directory, 'archive.lock'), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            path = os.path.join(directory, ARCHIVE)
+            try:
+                with open(path) as file:
+                    archive = json.load(file)
+            except FileNotFoundError:
+                archive = {}
+
+            archived = []
+            for filename in exited:
+                try:
+                    with open(os.path.join(directory, filename)) as file:
+                        snapshot = json.load(file)
+                except FileNotFoundError:
+                    continue
+                except ValueError:
+                    snapshot = {}
+                for name, values in snapshot.items():
+                    metric = self.metrics.get(name)
+                    if metric is not None and metric.type != 'gauge':
+                        metric.merge(archive.setdefault(name, {}), values)
+                archived.append(filename)
+
+            with open(f'{path}.tmp', 'w') as file:
+                json.dump(archive, file)
+            os.replace(f'{path}.tmp', path)
+            for filename in archived:
+                os.remove(os.path.join(directory, filename))
+
+    def exposition(self):
+        lines = []
+        for name, values in self.collect().items():
+            lines += self.metrics[name].exposition(values)
+        return '\n'.join(lines) + '\n'
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+REGISTRY = Registry()
+# A forked worker starts from zero instead of counting the parent's requests again.
+os.register_at_fork(after_in_child=REGISTRY.reset)
+
+REQUESTS = REGISTRY.register(Counter(
+    'kitchen_requests_total', 'Requests by URL name, method and status code.', ('route', 'method', 'status'),
+))
+REQUEST_DURATION = REGISTRY.register(Histogram(
+    'kitchen_request_duration_seconds', 'Time spent answering a request, by URL name.', ('route',),
+))
+REQUEST_QUERIES = REGISTRY.register(Histogram(
+    'kitchen_request_queries', 'SQL statements run per request, by URL name.', ('route',), buckets=QUERY_BUCKETS,
+))
+CACHE_REQUESTS = REGISTRY.register(Counter(
+    'kitchen_cache_requests_total', 'Cache lookups by cache and result, hit or miss.', ('cache', 'result'),
+))
+SERIALIZER_DURATION = REGISTRY.register(Histogram(
+    'kitchen_serializer_duration_seconds', 'Time spent rendering serializer data, by serializer.', ('serializer',),
+))
+
+# Every connection this process opened; the ones closed since are skipped when collected.
+_opened_connections = weakref.WeakSet()
+
+
+@receiver(connection_created)
+def track_connection(sender, connection, **kwargs):
+    _opened_connections.add(connection)
+
+
+def open_connections():
+    counts = {(alias,): 0 for alias in connections}
+    for wrapper in list(_opened_connections):
+        if wrapper.connection is not None:
+            counts[(wrapper.alias,)] = counts.get((wrapper.alias,), 0) + 1
+    return counts
+
+
+DB_CONNECTIONS = REGISTRY.register(Gauge(
+    'kitchen_db_connections', 'Open database connections by alias.', ('alias',), function=open_connections,
+))
+
+
+# Connections held by the pool, idle in it, and requests waiting for one.
+POOL_STATS = ('pool_size', 'pool_available', 'requests_waiting')
+
+
+def pool_stats():
+    # Only the stats of pools already created; importing the backend needs no psycopg 3.
+    from kitchen.postgresql_pool.base import DatabaseWrapper
+
+    stats = {}
+    for (alias, _), pool in list(DatabaseWrapper._connection_pools.items()):
+        for stat, value in pool.get_stats().items():
+            if stat in POOL_STATS:
+                stats[(alias, stat)] = value
+    return stats
+
+
+DB_POOL = REGISTRY.register(Gauge(
+    'kitchen_db_pool', 'Connection pool state by alias, see psycopg_pool get_stats().', ('alias', 'stat'),
+    function=pool_stats,
+))
+
+
+def cache_result(name, hit):
+    CACHE_REQUESTS.inc(name, 'hit' if hit else 'miss')
+
+
+class QueryCount:
+    def __init__(self):
+        self.count = 0
+
+    def record(self, sql, elapsed):
+        self.count += 1
+
+
+class MetricsMiddleware:
+    """Records the request metrics above; placed right after the SQL instrumentation."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        with collect_queries(QueryCount()) as queries:
+            response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - started, queries.count)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        # Collected through a contextvar, so the queries of sync_to_async threads count too.
+        with collect_queries(QueryCount()) as queries:
+            response = await self.get_response(request)
+        self.record(request, response, time.perf_counter() - started, queries.count)
+        return response
+
+    @staticmethod
+    def record(request, response, elapsed, queries):
+        match = request.resolver_match
+        # The URL name, not the path, so ids do not multiply the series.
+        route = match.view_name if match is not None else 'unmatched'
+        method = request.method if request.method in METHODS else 'other'
+        REQUESTS.inc(route, method, response.status_code)
+        REQUEST_DURATION.observe(route, value=elapsed)
+        REQUEST_QUERIES.observe(route, value=queries)
+        REGISTRY.maybe_flush()
+
+
+def scrape_allowed(request, networks):
+    if request.user.is_staff:
+        return True
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(network) for network in networks)
+
+
+def metrics_view(request):
+    if not scrape_allowed(request, metrics_settings()['ALLOWED_NETWORKS']):
+        return HttpResponseForbidden()
+    return HttpResponse(REGISTRY.exposition(), content_type=CONTENT_TYPE)
@@ -0,0 +1,45 @@
+# Generated by Django 5.0.4 on 2026-10-17 15:33
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kitchen_app', '0003_alter_ingredient_price_alter_recipe_category'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='cost',
+            field=models.IntegerField(db_index=True, default=0, editable=False, help_text='total price of the ingredients in rubles'),
+        ),
+        migrations.AlterField(
+            model_name='recipeingredient',
+            name='quantity',
+            field=models.IntegerField(default=1, help_text='amount in 100g portions', validators=[django.core.validators.MinValueValidator(1)]),
+        ),
+        migrations.AddIndex(
+            model_name='recipeingredient',
+            index=models.Index(fields=['ingredient'], include=('recipe', 'quantity'), name='recipes_ingr_ingredient_idx'),
+        ),
+        migrations.AlterField(
+            model_name='recipeingredient',
+            name='ingredient',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='kitchen_app.ingredient'),
+        ),
+        migrations.RunSQL(
+            """
+            UPDATE recipes SET cost = COALESCE((
+                SELECT SUM(ri.quantity * i.price)
+                FROM recipes_ingredients ri
+                JOIN ingredients i ON i.id = ri.ingredient_id
+                WHERE ri.recipe_id = recipes.id
+            ), 0)
+            """,
+            migrations.RunSQL.noop,
+        ),
+    ]
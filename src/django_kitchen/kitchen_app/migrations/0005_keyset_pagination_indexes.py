@@ -0,0 +1,32 @@
+# Generated by Django 5.0.4 on 2026-10-17 15:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kitchen_app', '0004_recipe_cost'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='cost',
+            field=models.IntegerField(default=0, editable=False, help_text='total price of the ingredients in rubles'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['published_on', 'id'], name='comments_published_on_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['created_at', 'id'], name='recipes_created_at_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['cost', 'id'], name='recipes_cost_id_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.4 on 2026-10-17 15:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kitchen_app', '0005_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Counter',
+            fields=[
+                ('key', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'counter',
+                'verbose_name_plural': 'counters',
+                'db_table': 'counters',
+            },
+        ),
+        migrations.RunSQL(
+            """
+            INSERT INTO counters (key, value)
+            SELECT 'recipes', COUNT(*) FROM recipes
+            UNION ALL
+            SELECT 'recipes:category:' || category_id, COUNT(*) FROM recipes
+            WHERE category_id IS NOT NULL GROUP BY category_id
+            UNION ALL
+            SELECT 'ingredients', COUNT(*) FROM ingredients
+            UNION ALL
+            SELECT 'ingredients:category:' || category_id, COUNT(*) FROM ingredients
+            GROUP BY category_id
+            """,
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.0.4 on 2026-10-17 15:42
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kitchen_app', '0008_ingredient_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngredientPostings',
+            fields=[
+                ('ingredient_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('recipe_ids', django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), default=list, size=None)),
+            ],
+            options={
+                'verbose_name': 'ingredient postings',
+                'verbose_name_plural': 'ingredient postings',
+                'db_table': 'ingredient_postings',
+            },
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='ingredient_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(
+            """
+            UPDATE recipes SET ingredient_count = (
+                SELECT COUNT(*) FROM recipes_ingredients ri WHERE ri.recipe_id = recipes.id
+            )
+            """,
+            migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            """
+            INSERT INTO ingredient_postings (ingredient_id, recipe_ids)
+            SELECT i.id, ARRAY(
+                SELECT ri.recipe_id FROM recipes_ingredients ri
+                WHERE ri.ingredient_id = i.id ORDER BY ri.recipe_id
+            )
+            FROM ingredients i
+            """,
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.0.4 on 2026-10-17 15:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kitchen_app', '0009_cookable_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Build the composite indexes before dropping the single-column FK indexes they replace.
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['recipe', 'published_on', 'id'], name='comments_recipe_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['category', 'created_at', 'id'], name='recipes_category_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='recipes_user_created_idx'),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='recipe',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, to='kitchen_app.recipe'),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='category',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, to='kitchen_app.recipecategory'),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='recipeingredient',
+            name='recipe',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='kitchen_app.recipe'),
+        ),
+    ]
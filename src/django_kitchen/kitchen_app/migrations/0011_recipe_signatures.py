@@ -0,0 +1,29 @@
+# Generated by Django 5.0.4 on 2026-10-17 17:22
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kitchen_app', '0010_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeSignature',
+            fields=[
+                ('recipe_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('signature', django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), default=list, size=None)),
+                ('bands', django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), default=list, size=None)),
+            ],
+            options={
+                'verbose_name': 'recipe signature',
+                'verbose_name_plural': 'recipe signatures',
+                'db_table': 'recipe_signatures',
+                'indexes': [django.contrib.postgres.indexes.GinIndex(fields=['bands'], name='recipe_signatures_bands_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.4 on 2026-10-17 17:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kitchen_app', '0011_recipe_signatures'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunSQL(
+            "UPDATE recipes SET updated_at = created_at",
+            migrations.RunSQL.noop,
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.4 on 2026-10-17 17:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kitchen_app', '0012_recipe_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='cost',
+            field=models.BigIntegerField(default=0, editable=False, help_text='total price of the ingredients in rubles'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.4 on 2026-10-17 17:50
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kitchen_app', '0013_recipe_cost_bigint'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipeingredient',
+            name='quantity',
+            field=models.IntegerField(default=1, help_text='amount in 100g portions', validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(2147483647)]),
+        ),
+    ]
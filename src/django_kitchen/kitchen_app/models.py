@@ -1,12 +1,45 @@
+import collections
+import functools
+import random
+
 from django.conf.global_settings import AUTH_USER_MODEL
-from django.core.validators import MinValueValidator
-from django.db import models
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import connections, models, router, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce, Now, Upper
+
+from .cache import bump_generations
+
+# Largest value of an integer column; PostgreSQL rejects anything above it.
+MAX_INTEGER = 2 ** 31 - 1
+
+
+class VersionedQuerySet(models.QuerySet):
+    """Bumps the table version on writes that bypass the model signals.
+
+    The version is what list endpoints use as their ETag, see `ConditionalGetMixin`.
+    """
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        Counter.objects.bump_versions(self.model)
+        return objs
+
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        if rows:
+            Counter.objects.bump_versions(self.model)
+        return rows
 
 
 class RecipeCategory(models.Model):
     id = models.AutoField(primary_key=True)
     name = models.CharField(max_length=64, null=False)
 
+    objects = VersionedQuerySet.as_manager()
+
     def __repr__(self):  # pragma: no cover
         return str(self.id)
 
@@ -23,6 +56,8 @@ class IngredientCategory(models.Model):
     id = models.AutoField(primary_key=True)
     name = models.CharField(max_length=64, null=False)
 
+    objects = VersionedQuerySet.as_manager()
+
     def __repr__(self):  # pragma: no cover
         return str(self.id)
 
@@ -35,15 +70,71 @@ class IngredientCategory(models.Model):
         verbose_name_plural = 'ingredient categories'
 
 
+class RecipeQuerySet(VersionedQuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        Counter.objects.increment(Counter.deltas_for(objs))
+        return objs
+
+    def refresh_totals(self):
+        # Recompute the stored cost and ingredient count from recipes_ingredients.
+        per_recipe = RecipeIngredient.objects.filter(recipe_id=OuterRef('pk')).values('recipe_id')
+        # In bigint, as quantity * price overflows an integer well within either column.
+        total = per_recipe.annotate(
+            total=Sum(Cast('quantity', models.BigIntegerField()) * F('ingredient__price')),
+        ).values('total')
+        count = per_recipe.annotate(count=Count('pk')).values('count')
+
+        # updated_at is the last-modified time of the recipe, see RecipeViewSet.
+        return self.update(
+            cost=Coalesce(Subquery(total), Value(0)),
+            ingredient_count=Coalesce(Subquery(count), Value(0)),
+            updated_at=Now(),
+        )
+
+    def shift_cost(self, ingredient_id, price_delta):
+        # Only the recipes using the ingredient are touched, each by its own quantity.
+        quantity = RecipeIngredient.objects.filter(
+            recipe_id=OuterRef('pk'),
+            ingredient_id=ingredient_id,
+        ).values('quantity')
+
+        return self.update(
+            cost=F('cost') + Cast(Subquery(quantity), models.BigIntegerField()) * price_delta,
+            updated_at=Now(),
+        )
+
+
 class Recipe(models.Model):
     id = models.AutoField(primary_key=True)
     name = models.CharField(max_length=64, null=False)
     description = models.TextField(null=False)
 
-    category = models.ForeignKey("RecipeCategory", null=True, on_delete=models.DO_NOTHING)
+    # Both foreign keys are served by the composite indexes in Meta.
+    category = models.ForeignKey("RecipeCategory", null=True, db_index=False, on_delete=models.DO_NOTHING)
     ingredients = models.ManyToManyField("Ingredient", through="RecipeIngredient")
-    user = models.ForeignKey(AUTH_USER_MODEL, on_delete=models.CASCADE)
-    created_at = models.DateTimeField(auto_now=True)
+    user = models.ForeignKey(AUTH_USER_MODEL, db_index=False, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Also bumped by refresh_totals() and shift_cost(); created_at orders the listings.
+    updated_at = models.DateTimeField(auto_now=True)
+    cost = models.BigIntegerField(
+        null=False,
+        default=0,
+        editable=False,
+        help_text="total price of the ingredients in rubles"
+    )
+    ingredient_count = models.IntegerField(null=False, default=0, editable=False)
+    # Computed by PostgreSQL on every write, the name weighted above the description.
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector("name", weight="A", config="english")
+            + SearchVector("description", weight="B", config="english")
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     def __str__(self) -> str:
         return f"{self.name} by {self.user}"
@@ -52,6 +143,22 @@ class Recipe(models.Model):
         db_table = "recipes"
         verbose_name = 'recipe'
         verbose_name_plural = 'recipes'
+        indexes = [
+            # Keyset pagination keys, see KeysetPagination.
+            models.Index(fields=["created_at", "id"], name="recipes_created_at_id_idx"),
+            models.Index(fields=["cost", "id"], name="recipes_cost_id_idx"),
+            # Per-category and per-author listings, newest first (scanned backwards).
+            models.Index(fields=["category", "created_at", "id"], name="recipes_category_created_idx"),
+            models.Index(fields=["user", "created_at", "id"], name="recipes_user_created_idx"),
+            GinIndex(fields=["search_vector"], name="recipes_search_vector_idx"),
+        ]
+
+
+class IngredientQuerySet(VersionedQuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        Counter.objects.increment(Counter.deltas_for(objs))
+        return objs
 
 
 class Ingredient(models.Model):
@@ -67,6 +174,8 @@ class Ingredient(models.Model):
         help_text="price per 100g in rubles"
     )
 
+    objects = IngredientQuerySet.as_manager()
+
     def __str__(self) -> str:  # pragma: no cover
         return self.name
 
@@ -74,6 +183,49 @@ class Ingredient(models.Model):
         db_table = "ingredients"
         verbose_name = 'ingredient'
         verbose_name_plural = 'ingredients'
+        indexes = [
+            # Trigram indexes for autocomplete: UPPER(name) serves the case-insensitive
+            # prefix match (istartswith), name itself the fuzzy word-similarity match.
+            GinIndex(OpClass(Upper("name"), name="gin_trgm_ops"), name="ingredients_name_upper_trgm"),
+            GinIndex(fields=["name"], opclasses=["gin_trgm_ops"], name="ingredients_name_trgm"),
+        ]
+
+
+class RecipeIngredientQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk_create() skips the post_save signal, so keep the derived data in sync here.
+        objs = super().bulk_create(objs, *args, **kwargs)
+        Recipe.objects.filter(pk__in={obj.recipe_id for obj in objs}).refresh_totals()
+        IngredientPostings.objects.add({(obj.ingredient_id, obj.recipe_id) for obj in objs})
+        RecipeSignature.objects.refresh({obj.recipe_id for obj in objs})
+        return objs
+
+    def shopping_list(self, servings):
+        """Return `(category_id, category, ingredient_id, ingredient, price, quantity, cost)` rows.
+
+        `servings` maps recipe ids to their multiplier. The quantities of all recipes are
+        summed in one GROUP BY, read along the unique (recipe, ingredient) index, so the
+        rows returned grow with the distinct ingredients rather than with the recipes.
+        """
+        if not servings:
+            return []
+
+        recipe_ids, multipliers = zip(*servings.items())
+        with connections[router.db_for_read(self.model)].cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT c.id, c.name, i.id, i.name, i.price, SUM(ri.quantity * s.multiplier) AS quantity,
+                       SUM(ri.quantity * s.multiplier) * i.price AS cost
+                FROM unnest(%s::integer[], %s::numeric[]) AS s(recipe_id, multiplier)
+                JOIN recipes_ingredients ri ON ri.recipe_id = s.recipe_id
+                JOIN ingredients i ON i.id = ri.ingredient_id
+                JOIN ingredient_categories c ON c.id = i.category_id
+                GROUP BY c.id, i.id
+                ORDER BY c.name, c.id, i.name
+                """,
+                [list(recipe_ids), list(multipliers)],
+            )
+            return cursor.fetchall()
 
 
 class RecipeIngredient(models.Model):
@@ -83,10 +235,15 @@ class RecipeIngredient(models.Model):
         default=1,
         validators=[
             MinValueValidator(1),
+            MaxValueValidator(MAX_INTEGER),
         ],
+        help_text="amount in 100g portions"
     )
-    recipe = models.ForeignKey("Recipe", on_delete=models.CASCADE)
-    ingredient = models.ForeignKey("Ingredient", on_delete=models.CASCADE)
+    # Lookups by recipe are served by the unique (recipe, ingredient) index.
+    recipe = models.ForeignKey("Recipe", db_index=False, on_delete=models.CASCADE)
+    ingredient = models.ForeignKey("Ingredient", db_index=False, on_delete=models.CASCADE)
+
+    objects = RecipeIngredientQuerySet.as_manager()
 
     def __str__(self) -> str:  # pragma: no cover
         return f"{self.ingredient.name} for {self.recipe.name}"
@@ -96,6 +253,14 @@ class RecipeIngredient(models.Model):
         unique_together = (
             ("recipe", "ingredient")
         )
+        indexes = [
+            # Reverse index used to find the recipes affected by an ingredient price change.
+            models.Index(
+                fields=["ingredient"],
+                include=["recipe", "quantity"],
+                name="recipes_ingr_ingredient_idx",
+            ),
+        ]
         verbose_name = 'relationship between recipe and ingredient'
         verbose_name_plural = 'relationships between recipes and ingredients'
 
@@ -105,9 +270,11 @@ class Comment(models.Model):
     text = models.TextField(null=False)
     published_on = models.DateTimeField(null=False, auto_now=True)
 
-    recipe = models.ForeignKey(to="Recipe", on_delete=models.DO_NOTHING)
+    recipe = models.ForeignKey(to="Recipe", db_index=False, on_delete=models.DO_NOTHING)
     user = models.ForeignKey(AUTH_USER_MODEL, on_delete=models.DO_NOTHING)
 
+    objects = VersionedQuerySet.as_manager()
+
     def __str__(self) -> str:  # pragma: no cover
         return f"Comment {self.id} to {self.recipe.name}"
 
@@ -115,3 +282,346 @@ class Comment(models.Model):
         db_table = "comments"
         verbose_name = 'comment'
         verbose_name_plural = 'comments'
+        indexes = [
+            models.Index(fields=["published_on", "id"], name="comments_published_on_id_idx"),
+            # Comments of one recipe in time order; also serves the recipe foreign key.
+            models.Index(fields=["recipe", "published_on", "id"], name="comments_recipe_published_idx"),
+        ]
+
+
+class IngredientPostingsQuerySet(models.QuerySet):
+    # Both take (ingredient_id, recipe_id) pairs and change the postings by those deltas
+    # only. ON CONFLICT DO UPDATE and UPDATE re-read a row another transaction changed
+    # after waiting for its lock, so concurrent writers never overwrite each other.
+
+    def add(self, pairs):
+        if not pairs:
+            return
+
+        ingredient_ids, recipe_ids = zip(*pairs)
+        with connections[router.db_for_write(self.model)].cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO ingredient_postings (ingredient_id, recipe_ids)
+                SELECT d.ingredient_id, array_agg(DISTINCT d.recipe_id ORDER BY d.recipe_id)
+                FROM unnest(%s::integer[], %s::integer[]) AS d(ingredient_id, recipe_id)
+                GROUP BY d.ingredient_id
+                ORDER BY d.ingredient_id
+                ON CONFLICT (ingredient_id) DO UPDATE SET recipe_ids = ARRAY(
+                    SELECT DISTINCT r FROM unnest(ingredient_postings.recipe_ids || EXCLUDED.recipe_ids) AS r
+                    ORDER BY r
+                )
+                """,
+                [list(ingredient_ids), list(recipe_ids)],
+            )
+
+    def remove(self, pairs):
+        if not pairs:
+            return
+
+        ingredient_ids, recipe_ids = zip(*pairs)
+        with connections[router.db_for_write(self.model)].cursor() as cursor:
+            # Rows are locked in ingredient order first, like add(), so writers cannot deadlock.
+            cursor.execute(
+                """
+                WITH d AS (
+                    SELECT ingredient_id, array_agg(recipe_id) AS recipe_ids
+                    FROM unnest(%s::integer[], %s::integer[]) AS d(ingredient_id, recipe_id)
+                    GROUP BY ingredient_id
+                ), locked AS (
+                    SELECT p.ingredient_id FROM ingredient_postings p
+                    WHERE p.ingredient_id IN (SELECT ingredient_id FROM d)
+                    ORDER BY p.ingredient_id
+                    FOR UPDATE
+                )
+                UPDATE ingredient_postings p SET recipe_ids = ARRAY(
+                    SELECT r FROM unnest(p.recipe_ids) AS r WHERE r <> ALL(d.recipe_ids) ORDER BY r
+                )
+                FROM d JOIN locked USING (ingredient_id)
+                WHERE p.ingredient_id = d.ingredient_id
+                """,
+                [list(ingredient_ids), list(recipe_ids)],
+            )
+
+    def cookable(self, have, max_missing=0, limit=20):
+        """Return `(recipe_id, matched, missing)` for the recipes best covered by `have`.
+
+        Only the postings of the given ingredients are read, so the cost follows the size
+        of the query rather than the size of the catalog.
+        """
+        with connections[router.db_for_read(self.model)].cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT r.id, m.matched, r.ingredient_count - m.matched AS missing
+                FROM (
+                    SELECT recipe_id, COUNT(*) AS matched
+                    FROM ingredient_postings p, unnest(p.recipe_ids) AS recipe_id
+                    WHERE p.ingredient_id = ANY(%s)
+                    GROUP BY recipe_id
+                ) m
+                JOIN recipes r ON r.id = m.recipe_id
+                WHERE r.ingredient_count - m.matched <= %s
+                ORDER BY missing, m.matched DESC, r.id
+                LIMIT %s
+                """,
+                [sorted(set(have)), max_missing, limit],
+            )
+            return cursor.fetchall()
+
+
+class IngredientPostings(models.Model):
+    """Inverted index from an ingredient to the sorted ids of the recipes using it.
+
+    Kept current by the RecipeIngredient signals and bulk_create() hook. The ingredient is
+    not a foreign key on purpose: postings are derived data and must not get in the way
+    of cascading deletes.
+    """
+    ingredient_id = models.IntegerField(primary_key=True)
+    recipe_ids = ArrayField(models.IntegerField(), null=False, default=list)
+
+    objects = IngredientPostingsQuerySet.as_manager()
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"Postings of ingredient {self.ingredient_id}"
+
+    class Meta:
+        db_table = "ingredient_postings"
+        verbose_name = 'ingredient postings'
+        verbose_name_plural = 'ingredient postings'
+
+
+class RecipeSignatureQuerySet(models.QuerySet):
+    def refresh(self, recipe_ids, batch_size=5000):
+        """Recompute the signatures of `recipe_ids` from their ingredients, in SQL.
+
+        Every recipe expands to PERMUTATIONS hash values per ingredient before they are
+        aggregated, so large sets, e.g. a seeded catalog, go `batch_size` at a time.
+        """
+        recipe_ids = sorted(recipe_ids)
+        for start in range(0, len(recipe_ids), batch_size):
+            self._refresh(recipe_ids[start:start + batch_size])
+
+    def _refresh(self, recipe_ids):
+        rows = RecipeSignature.ROWS_PER_BAND
+        with connections[router.db_for_write(self.model)].cursor() as cursor:
+            # A recipe's i-th MinHash value is the smallest (a_i * ingredient_id + b_i) mod
+            # p over its ingredients, and a band key hashes ROWS_PER_BAND consecutive values.
+            cursor.execute(
+                """
+                WITH hashes AS (
+                    SELECT ri.recipe_id, h.k, MIN((h.a * ri.ingredient_id + h.b) %% %s) AS value
+                    FROM recipes_ingredients ri
+                    CROSS JOIN unnest(%s::bigint[], %s::bigint[]) WITH ORDINALITY AS h(a, b, k)
+                    WHERE ri.recipe_id = ANY(%s)
+                    GROUP BY ri.recipe_id, h.k
+                ), signatures AS (
+                    SELECT recipe_id, array_agg(value ORDER BY k) AS signature
+                    FROM hashes GROUP BY recipe_id
+                )
+                INSERT INTO recipe_signatures (recipe_id, signature, bands)
+                SELECT recipe_id, signature, ARRAY(
+                    SELECT hashtextextended(array_to_string(signature[band * %s + 1:(band + 1) * %s], ','), band)
+                    FROM generate_series(0, %s) AS band ORDER BY band
+                )
+                FROM signatures
+                ON CONFLICT (recipe_id) DO UPDATE SET signature = EXCLUDED.signature, bands = EXCLUDED.bands
+                """,
+                [
+                    RecipeSignature.PRIME, *RecipeSignature.coefficients(), recipe_ids,
+                    rows, rows, RecipeSignature.BANDS - 1,
+                ],
+            )
+            # Recipes left without ingredients, deleted ones included, have no signature.
+            cursor.execute(
+                """
+                DELETE FROM recipe_signatures s WHERE s.recipe_id = ANY(%s)
+                AND NOT EXISTS (SELECT 1 FROM recipes_ingredients ri WHERE ri.recipe_id = s.recipe_id)
+                """,
+                [recipe_ids],
+            )
+
+    def rebuild(self, batch_size=5000):
+        """Recompute every signature, `batch_size` recipes per statement, and return the count."""
+        with transaction.atomic(using=router.db_for_write(self.model)):
+            recipe_ids = RecipeIngredient.objects.values_list('recipe_id', flat=True).distinct().order_by('recipe_id')
+            batch = list(recipe_ids[:batch_size])
+            while batch:
+                self.refresh(batch, batch_size)
+                batch = list(recipe_ids.filter(recipe_id__gt=batch[-1])[:batch_size])
+            self.exclude(recipe_id__in=RecipeIngredient.objects.values('recipe_id')).delete()
+            return self.count()
+
+    def similar(self, recipe_id, limit=5):
+        """Return `(recipe_id, similarity)` of the recipes most similar to `recipe_id`.
+
+        Only recipes sharing a band key are compared, found through the GIN index on
+        `bands`, so the cost follows the size of the buckets rather than of the catalog.
+        The similarity is the estimated Jaccard index of the ingredient sets.
+        """
+        with connections[router.db_for_read(self.model)].cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT s.recipe_id, (
+                    SELECT COUNT(*) FROM unnest(s.signature, t.signature) AS u(x, y) WHERE x = y
+                )::float / %s AS similarity
+                FROM recipe_signatures t
+                JOIN recipe_signatures s ON s.bands && t.bands AND s.recipe_id <> t.recipe_id
+                WHERE t.recipe_id = %s
+                ORDER BY similarity DESC, s.recipe_id
+                LIMIT %s
+                """,
+                [RecipeSignature.PERMUTATIONS, recipe_id, limit],
+            )
+            return cursor.fetchall()
+
+
+class RecipeSignature(models.Model):
+    """MinHash signature of a recipe's ingredient set and its LSH band keys.
+
+    Kept current by the RecipeIngredient signals and bulk_create() hook, like
+    `IngredientPostings`. Two recipes land in a common bucket, i.e. share a band key,
+    with a probability that rises steeply around a Jaccard similarity of
+    (1 / BANDS) ** (1 / ROWS_PER_BAND), 0.5 here. Changing the constants below
+    requires `manage.py rebuild_signatures`.
+    """
+    PERMUTATIONS = 64
+    BANDS = 16
+    ROWS_PER_BAND = PERMUTATIONS // BANDS
+    # Mersenne prime 2**31 - 1: a * ingredient_id + b stays within a bigint.
+    PRIME = 2_147_483_647
+
+    recipe_id = models.IntegerField(primary_key=True)
+    signature = ArrayField(models.BigIntegerField(), null=False, default=list)
+    bands = ArrayField(models.BigIntegerField(), null=False, default=list)
+
+    objects = RecipeSignatureQuerySet.as_manager()
+
+    @staticmethod
+    @functools.cache
+    def coefficients():
+        """Return the `(a, b)` lists of the hash functions, the same in every process."""
+        rng = random.Random(RecipeSignature.PERMUTATIONS)
+        a = [rng.randrange(1, RecipeSignature.PRIME) for _ in range(RecipeSignature.PERMUTATIONS)]
+        b = [rng.randrange(0, RecipeSignature.PRIME) for _ in range(RecipeSignature.PERMUTATIONS)]
+        return a, b
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"Signature of recipe {self.recipe_id}"
+
+    class Meta:
+        db_table = "recipe_signatures"
+        verbose_name = 'recipe signature'
+        verbose_name_plural = 'recipe signatures'
+        indexes = [
+            GinIndex(fields=["bands"], name="recipe_signatures_bands_idx"),
+        ]
+
+
+class CounterQuerySet(models.QuerySet):
+    def increment(self, deltas):
+        deltas = {key: delta for key, delta in deltas.items() if delta}
+        if not deltas:
+            return
+
+        # Sorted keys keep concurrent writers from deadlocking on the same rows.
+        keys, values = zip(*sorted(deltas.items()))
+        with connections[router.db_for_write(self.model)].cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO counters (key, value)
+                SELECT * FROM unnest(%s::varchar[], %s::bigint[])
+                ON CONFLICT (key) DO UPDATE SET value = counters.value + EXCLUDED.value
+                """,
+                [list(keys), list(values)],
+            )
+
+    def bump_versions(self, *models):
+        self.increment({Counter.version_key(model): 1 for model in models})
+        # Bumped again on commit, so nothing cached from the uncommitted rows survives it.
+        bump_generations(*models)
+        transaction.on_commit(
+            lambda: bump_generations(*models),
+            using=router.db_for_write(self.model),
+        )
+
+    def values_for(self, *keys):
+        values = dict.fromkeys(keys, 0)
+        values.update(self.filter(key__in=keys).values_list('key', 'value'))
+        return values
+
+    async def avalues_for(self, *keys):
+        values = dict.fromkeys(keys, 0)
+        values.update([row async for row in self.filter(key__in=keys).values_list('key', 'value')])
+        return values
+
+    def reconcile(self):
+        """Recount every counter from the source tables and return the corrected drift."""
+        with transaction.atomic(using=router.db_for_write(self.model)):
+            expected = collections.Counter()
+            for model in (Recipe, Ingredient):
+                # Block writers of the counted table so the recount is a consistent snapshot.
+                with connections[router.db_for_write(model)].cursor() as cursor:
+                    cursor.execute(f'LOCK TABLE {model._meta.db_table} IN SHARE MODE')
+
+                expected[Counter.key_for(model)] = model.objects.count()
+                per_category = model.objects.exclude(category=None).values_list(
+                    'category_id',
+                ).annotate(total=models.Count('pk')).order_by()
+                for category_id, total in per_category:
+                    expected[Counter.key_for(model, category_id)] = total
+
+            # Table versions only ever grow and are not recounted.
+            current = dict(
+                self.select_for_update().exclude(
+                    key__startswith=Counter.VERSION_PREFIX,
+                ).values_list('key', 'value'),
+            )
+            drift = {
+                key: expected[key] - current.get(key, 0)
+                for key in expected.keys() | current.keys()
+                if expected[key] != current.get(key, 0)
+            }
+            self.increment(drift)
+        return drift
+
+
+class Counter(models.Model):
+    """Row counts of recipes and ingredients, in total and per category, and table versions.
+
+    Maintained by the signals in `kitchen_app.signals` and the `bulk_create()` overrides
+    above, so pages can read a count by primary key instead of running `COUNT(*)`.
+    `manage.py reconcile_counters` repairs any drift, e.g. after `QuerySet.update()`.
+    A table version is bumped on every write to the table and never decreases.
+    """
+    VERSION_PREFIX = 'version:'
+
+    key = models.CharField(max_length=64, primary_key=True)
+    value = models.BigIntegerField(null=False, default=0)
+
+    objects = CounterQuerySet.as_manager()
+
+    @staticmethod
+    def key_for(model, category_id=None):
+        table = model._meta.db_table
+        return table if category_id is None else f'{table}:category:{category_id}'
+
+    @classmethod
+    def version_key(cls, model):
+        return f'{cls.VERSION_PREFIX}{model._meta.db_table}'
+
+    @classmethod
+    def deltas_for(cls, objs, delta=1):
+        deltas = collections.Counter()
+        for obj in objs:
+            deltas[cls.key_for(type(obj))] += delta
+            if obj.category_id is not None:
+                deltas[cls.key_for(type(obj), obj.category_id)] += delta
+        return deltas
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"{self.key} = {self.value}"
+
+    class Meta:
+        db_table = "counters"
+        verbose_name = 'counter'
+        verbose_name_plural = 'counters'
@@ -0,0 +1,230 @@
+import base64
+import binascii
+import datetime
+import decimal
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import (
+    FieldDoesNotExist,
+    ImproperlyConfigured,
+    ValidationError,
+)
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def ordering_keys(queryset):
+    """Return the ordering of `queryset` with the primary key appended as a tie-breaker."""
+    ordering = []
+    for key in queryset.query.order_by:
+        if not isinstance(key, str) or '__' in key:
+            raise ImproperlyConfigured(f'Keyset pagination needs plain field ordering, got {key!r}')
+        ordering.append('-id' if key == '-pk' else 'id' if key == 'pk' else key)
+
+    if not any(key.lstrip('-') == 'id' for key in ordering):
+        ordering.append('-id' if ordering and ordering[-1].startswith('-') else 'id')
+    return ordering
+
+
+def reverse_ordering(ordering):
+    return [key[1:] if key.startswith('-') else f'-{key}' for key in ordering]
+
+
+def keyset_filter(queryset, ordering, values):
+    """Keep the rows that come strictly after `values` in `ordering`.
+
+    Builds `k1 > v1 OR (k1 = v1 AND k2 > v2) OR ...` plus a redundant bound on the
+    leading key, so PostgreSQL can answer it with a range scan on a matching index.
+    """
+    condition = Q()
+    equal = {}
+    for key, value in zip(ordering, values):
+        name = key.lstrip('-')
+        lookup = 'lt' if key.startswith('-') else 'gt'
+        condition |= Q(**equal, **{f'{name}__{lookup}': value})
+        equal[name] = value
+
+    leading = ordering[0]
+    bound = 'lte' if leading.startswith('-') else 'gte'
+    return queryset.filter(**{f'{leading.lstrip("-")}__{bound}': values[0]}).filter(condition)
+
+
+def _key_field(queryset, name):
+    if name in queryset.query.annotations:
+        return queryset.query.annotations[name].output_field
+    return queryset.model._meta.get_field(name)
+
+
+def _dump_value(value):
+    # DjangoJSONEncoder truncates microseconds, which would break the equality part of the keyset.
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(values, reverse=False):
+    payload = {'v': [_dump_value(value) for value in values]}
+    if reverse:
+        payload['r'] = 1
+    data = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def decode_cursor(queryset, ordering, cursor):
+    """Return `(values, reverse)` for `cursor`, or raise NotFound if it is malformed."""
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(data)
+        values = payload['v']
+        if len(values) != len(ordering):
+            raise ValueError
+        values = [
+            _key_field(queryset, key.lstrip('-')).to_python(value)
+            for key, value in zip(ordering, values)
+        ]
+    except (binascii.Error, ValueError, TypeError, KeyError, FieldDoesNotExist, ValidationError):
+        raise NotFound(KeysetPagination.invalid_cursor_message)
+    return values, bool(payload.get('r'))
+
+
+def key_values(obj, ordering):
+    return [getattr(obj, key.lstrip('-')) for key in ordering]
+
+
+class OffsetPagination(LimitOffsetPagination):
+    default_limit = 20
+    max_limit = 100
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination over the queryset ordering, never running `COUNT(*)`.
+
+    Every page is fetched with `WHERE (keys) > (cursor) ORDER BY keys LIMIT n`, so the cost
+    does not depend on how deep the client has paged. Passing `?offset=` switches to
+    limit/offset pagination for clients that need random access and a total count.
+    """
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    offset_query_param = 'offset'
+    offset_pagination_class = OffsetPagination
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.prepare_queryset(queryset, request, view)
+        if self.offset_paginator is not None:
+            return self.offset_paginator.paginate_queryset(queryset, request, view)
+        return self.finish_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        queryset = self.prepare_queryset(queryset, request, view)
+        if self.offset_paginator is not None:
+            return await sync_to_async(self.offset_paginator.paginate_queryset)(queryset, request, view)
+        return self.finish_page([obj async for obj in queryset])
+
+    def prepare_queryset(self, queryset, request, view=None):
+        """Return the queryset that fetches the page, one row more to detect a next page."""
+        self.request = request
+        self.offset_paginator = None
+        if self.offset_query_param in request.query_params:
+            self.offset_paginator = self.offset_pagination_class()
+            return queryset
+
+        self.page_size = self.get_page_size(request)
+        self.ordering = ordering_keys(queryset)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        self.values, self.reverse = decode_cursor(queryset, self.ordering, cursor) if cursor else (None, False)
+
+        ordering = reverse_ordering(self.ordering) if self.reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if self.values is not None:
+            queryset = keyset_filter(queryset, ordering, self.values)
+        return queryset[:self.page_size + 1]
+
+    def finish_page(self, page):
+        has_more = len(page) > self.page_size
+        page = page[:self.page_size]
+
+        if self.reverse:
+            page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.values is not None
+
+        self.page = page
+        return page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        cursor = encode_cursor(key_values(self.page[-1], self.ordering))
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        url = self.request.build_absolute_uri()
+        if not self.page:
+            return remove_query_param(url, self.cursor_query_param)
+        cursor = encode_cursor(key_values(self.page[0], self.ordering), reverse=True)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        if self.offset_paginator is not None:
+            return self.offset_paginator.get_paginated_response(data)
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Number of results to return per page.',
+                'schema': {'type': 'integer'},
+            },
+            {
+                'name': self.offset_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Switch to limit/offset pagination starting at this index.',
+                'schema': {'type': 'integer'},
+            },
+        ]
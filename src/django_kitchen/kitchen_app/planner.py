@@ -0,0 +1,247 @@
+"""Plans the cheapest week of recipes over the whole catalog with NumPy.
+
+A menu fills required `RecipeCategory` slots, e.g. five mains and two desserts. Its
+score is the cost of its recipes plus their leftovers: every distinct ingredient is
+bought in whole portions and leaves up to one portion unused, priced at
+`Ingredient.price` and weighted by `waste`. Recipes sharing an ingredient use those
+leftovers up, so reuse lowers the score.
+
+The catalog is loaded once per process into arrays, the recipe × ingredient incidence
+as a CSR matrix, and reloaded when the Recipe or Ingredient generation changes (see
+`kitchen_app.cache`), menus being planned on the previous catalog until it is. Menus
+are built by beam search: every step extends the best `BEAM_WIDTH` partial menus with
+each candidate of the next slot and scores all of them with one matrix product. The
+candidates are the `POOL_SIZE` recipes of each category that are cheapest on their
+own. Configured with `settings.MENU_PLANNER`, see `DEFAULTS`.
+"""
+import dataclasses
+import functools
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.db import connections, router
+from django.dispatch import receiver
+
+from .cache import get_generations
+from .models import Ingredient, Recipe
+from .routers import primary_reads
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DEFAULTS = {
+    # Partial menus kept after every step.
+    'BEAM_WIDTH': 64,
+    # Candidates per category.
+    'POOL_SIZE': 200,
+}
+
+
+@functools.cache
+def planner_settings():
+    return {**DEFAULTS, **getattr(settings, 'MENU_PLANNER', {})}
+
+
+@receiver(setting_changed)
+def reset_planner_settings(setting, **kwargs):
+    if setting == 'MENU_PLANNER':
+        planner_settings.cache_clear()
+
+
+def parse_slots(value):
+    """Parse `3:5,7:2` into `{recipe category id: recipe count}`, counts 1 by default."""
+    slots = {}
+    for item in value.split(','):
+        if not item.strip():
+            continue
+        category_id, _, count = item.partition(':')
+        category_id, count = int(category_id), int(count or 1)
+        if count < 1:
+            raise ValueError(f'{item} asks for no recipes')
+        slots[category_id] = slots.get(category_id, 0) + count
+    return slots
+
+
+@dataclasses.dataclass(frozen=True)
+class Catalog:
+    recipe_ids: 'np.ndarray'
+    # Category id of every recipe, -1 for none.
+    categories: 'np.ndarray'
+    costs: 'np.ndarray'
+    # CSR rows: the ingredient columns of recipe i are indices[indptr[i]:indptr[i + 1]].
+    indptr: 'np.ndarray'
+    indices: 'np.ndarray'
+    # Price of every ingredient column.
+    prices: 'np.ndarray'
+    # Price of one portion of each ingredient of every recipe, its leftovers if cooked alone.
+    portion_costs: 'np.ndarray'
+
+    @classmethod
+    def build(cls, recipes, ingredients, links):
+        """Build the arrays from `(id, category_id, cost)`, `(id, price)` and `(recipe_id, ingredient_id)` rows."""
+        recipes = np.array(recipes, dtype=np.int64).reshape(-1, 3)
+        ingredients = np.array(ingredients, dtype=np.int64).reshape(-1, 2)
+        links = np.array(links, dtype=np.int64).reshape(-1, 2)
+        recipes = recipes[np.argsort(recipes[:, 0])]
+        ingredients = ingredients[np.argsort(ingredients[:, 0])]
+
+        rows = _positions(recipes[:, 0], links[:, 0])
+        columns = _positions(ingredients[:, 0], links[:, 1])
+        # Rows read one after another may disagree on recipes written in between.
+        known = (rows >= 0) & (columns >= 0)
+        rows, columns = rows[known], columns[known]
+        order = np.lexsort((columns, rows))
+        rows, columns = rows[order], columns[order]
+
+        counts = np.bincount(rows, minlength=len(recipes))
+        prices = ingredients[:, 1].astype(np.float64)
+        return cls(
+            recipe_ids=recipes[:, 0],
+            categories=recipes[:, 1],
+            costs=recipes[:, 2].astype(np.float64),
+            indptr=np.concatenate(([0], np.cumsum(counts))),
+            indices=columns,
+            prices=prices,
+            portion_costs=np.bincount(rows, weights=prices[columns], minlength=len(recipes)),
+        )
+
+    def rows(self, recipes):
+        """Return `(row, column)` of every ingredient of `recipes`, row being the position in `recipes`."""
+        lengths = self.indptr[recipes + 1] - self.indptr[recipes]
+        rows = np.repeat(np.arange(len(recipes)), lengths)
+        offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return rows, self.indices[np.repeat(self.indptr[recipes], lengths) + offsets]
+
+
+def _positions(ids, values):
+    """Return the index of every value in the sorted `ids`, -1 where it is missing."""
+    positions = np.searchsorted(ids, values)
+    found = positions < len(ids)
+    found[found] = ids[positions[found]] == values[found]
+    return np.where(found, positions, -1)
+
+
+def load_catalog():
+    if np is None:
+        raise ImproperlyConfigured("The menu planner requires NumPy, install the 'planner' extra.")
+
+    with connections[router.db_for_read(Recipe)].cursor() as cursor:
+        cursor.execute('SELECT id, COALESCE(category_id, -1), cost FROM recipes')
+        recipes = cursor.fetchall()
+        cursor.execute('SELECT id, price FROM ingredients')
+        ingredients = cursor.fetchall()
+        cursor.execute('SELECT recipe_id, ingredient_id FROM recipes_ingredients')
+        links = cursor.fetchall()
+    return Catalog.build(recipes, ingredients, links)
+
+
+_lock = threading.Lock()
+# The catalog of the current generations, and under 'latest' the last one loaded.
+_loaded = {}
+
+
+def get_catalog():
+    """Return the catalog of this process, reloaded after writes to recipes or ingredients.
+
+    A single thread reloads it; the others serve the previous catalog meanwhile, and
+    only wait when there is none yet, like `read_through()`.
+    """
+    generations = tuple(get_generations([Recipe, Ingredient]))
+    catalog = _loaded.get(generations)
+    if catalog is not None:
+        return catalog
+
+    if not _lock.acquire(blocking='latest' not in _loaded):
+        return _loaded['latest']
+    try:
+        catalog = _loaded.get(generations)
+        if catalog is None:
+            # From the primary, like every value kept under a generation.
+            with primary_reads():
+                catalog = load_catalog()
+            _loaded.clear()
+            _loaded.update({generations: catalog, 'latest': catalog})
+    finally:
+        _lock.release()
+    return catalog
+
+
+@dataclasses.dataclass(frozen=True)
+class Menu:
+    recipe_ids: list
+    cost: int
+    leftovers: float
+    # Ingredients used by more than one recipe of the menu.
+    shared_ingredients: int
+
+    @property
+    def score(self):
+        return self.cost + self.leftovers
+
+
+def plan(catalog, slots, waste=1.0, beam_width=None, pool_size=None):
+    """Return the best `Menu` found for `slots`, or None if a category has too few recipes."""
+    options = planner_settings()
+    beam_width = beam_width or options['BEAM_WIDTH']
+    pool_size = pool_size or options['POOL_SIZE']
+
+    pools = []
+    for category_id, count in slots.items():
+        members = np.flatnonzero(catalog.categories == category_id)
+        if len(members) < count:
+            return None
+        size = max(pool_size, count)
+        if len(members) > size:
+            alone = catalog.costs[members] + waste * catalog.portion_costs[members]
+            members = members[np.argpartition(alone, size - 1)[:size]]
+        pools.append((members, count))
+    if not pools:
+        return None
+
+    candidates = np.concatenate([members for members, _ in pools])
+    rows, columns = catalog.rows(candidates)
+    # Only the ingredients of the candidates, a few thousand columns at most.
+    columns, compact = np.unique(columns, return_inverse=True)
+    incidence = np.zeros((len(candidates), len(columns)), dtype=bool)
+    incidence[rows, compact] = True
+    prices = catalog.prices[columns]
+    # Cost of a candidate cooked alone, and the prices of its ingredients per column.
+    alone = catalog.costs[candidates] + waste * (incidence @ prices)
+    priced = incidence * (waste * prices)
+
+    menus = np.empty((1, 0), dtype=np.intp)
+    bought = np.zeros((1, len(columns)), dtype=bool)
+    scores = np.zeros(1)
+    start = 0
+    for members, count in pools:
+        pool = np.arange(start, start + len(members))
+        start += len(members)
+        for step in range(count):
+            # Leftovers of ingredients already bought are used up instead of wasted.
+            totals = scores[:, None] + alone[pool] - bought @ priced[pool].T
+            # The picks of a category are increasing candidate indices, so every set of
+            # recipes is scored once, and leave room for the picks still to come.
+            totals[:, len(pool) - (count - 1 - step):] = np.inf
+            if step:
+                totals[pool[None, :] <= menus[:, -1:]] = np.inf
+
+            flat = totals.ravel()
+            keep = min(beam_width, int(np.isfinite(flat).sum()))
+            best = np.argpartition(flat, keep - 1)[:keep] if keep < len(flat) else np.arange(len(flat))
+            best = best[np.argsort(flat[best], kind='stable')]
+            beams, picks = np.divmod(best, len(pool))
+            menus = np.hstack((menus[beams], pool[picks][:, None]))
+            bought = bought[beams] | incidence[pool[picks]]
+            scores = flat[best]
+
+    chosen = candidates[menus[0]]
+    return Menu(
+        recipe_ids=catalog.recipe_ids[chosen].tolist(),
+        cost=int(catalog.costs[chosen].sum()),
+        leftovers=float(waste * prices[bought[0]].sum()),
+        shared_ingredients=int((incidence[menus[0]].sum(axis=0) > 1).sum()),
+    )
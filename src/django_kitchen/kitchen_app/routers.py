@@ -0,0 +1,174 @@
+"""Sends the reads of safe requests to a replica and everything else to the primary.
+
+`ReplicaRoutingMiddleware` picks one replica per GET, HEAD or OPTIONS request, so a
+request reads from a single snapshot. Reads outside requests, in management commands
+and signal handlers, stay on the primary. The first write of a request moves its
+remaining reads to the primary as well, and pins the client there for
+`STICKY_SECONDS`, so it reads its own writes while the replicas catch up: with a
+cookie, and for an authenticated user with a `pin:<user id>` cache key too, which
+covers clients that drop cookies and the other clients of the same user. The user is
+only known once authentication has run, so a request checks its key at the first read
+after that. Configured with `settings.REPLICA_ROUTING`, see `DEFAULTS`.
+"""
+import contextlib
+import contextvars
+import functools
+import random
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import setting_changed
+from django.db import DEFAULT_DB_ALIAS
+from django.dispatch import receiver
+from django.utils.functional import LazyObject
+
+DEFAULTS = {
+    # Aliases of settings.DATABASES that replicate the primary.
+    'REPLICAS': [],
+    # How long a client reads from the primary after a write.
+    'STICKY_SECONDS': 5,
+    'COOKIE_NAME': 'pin_primary',
+}
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+@functools.cache
+def routing_settings():
+    return {**DEFAULTS, **getattr(settings, 'REPLICA_ROUTING', {})}
+
+
+@receiver(setting_changed)
+def reset_routing_settings(setting, **kwargs):
+    if setting == 'REPLICA_ROUTING':
+        routing_settings.cache_clear()
+
+
+def pin_key(user_id):
+    return f'pin:{user_id}'
+
+
+def identified_user(request):
+    """Return the user of `request` once authentication has run, without running it."""
+    user = getattr(request, 'user', None)
+    if isinstance(user, LazyObject):
+        # AuthenticationMiddleware's lazy user, evaluated or not yet.
+        user = getattr(request, '_cached_user', None) or getattr(request, '_acached_user', None)
+    return user
+
+
+class RoutingState:
+    __slots__ = ('replica', 'wrote', 'request')
+
+    def __init__(self, replica=None, request=None):
+        # None reads from the primary.
+        self.replica = replica
+        self.wrote = False
+        # Until its user is known and their pin checked.
+        self.request = request
+
+    def check_pin(self):
+        user = identified_user(self.request)
+        if user is None:
+            return
+        # First, as a database cache backend reads through the router too.
+        self.request = None
+        if user.is_authenticated and cache.get(pin_key(user.pk)):
+            self.replica = None
+
+
+# Shared with the threads sync_to_async() runs the ORM in, which copy the context.
+_state = contextvars.ContextVar('replica_routing', default=None)
+
+
+@contextlib.contextmanager
+def primary_reads():
+    """Read from the primary inside the block, e.g. to compute a value that gets cached."""
+    token = _state.set(RoutingState())
+    try:
+        yield
+    finally:
+        _state.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None:
+            return None
+        if state.replica is not None and state.request is not None:
+            state.check_pin()
+        # Explicit, so rows related to an instance read from a replica follow a later write.
+        return state.replica or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.replica = None
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every alias holds the same rows.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Replicas receive the schema through replication.
+        return False if db in routing_settings()['REPLICAS'] else None
+
+
+class ReplicaRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        options = routing_settings()
+        state = RoutingState(self.choose_replica(request, options), request)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state.wrote and (key := self.pin(request, response, options)):
+            cache.set(key, True, timeout=options['STICKY_SECONDS'])
+        return response
+
+    async def __acall__(self, request):
+        options = routing_settings()
+        state = RoutingState(self.choose_replica(request, options), request)
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state.wrote and (key := self.pin(request, response, options)):
+            await cache.aset(key, True, timeout=options['STICKY_SECONDS'])
+        return response
+
+    @staticmethod
+    def choose_replica(request, options):
+        if not options['REPLICAS'] or request.method not in SAFE_METHODS:
+            return None
+        if options['COOKIE_NAME'] in request.COOKIES:
+            return None
+        return random.choice(options['REPLICAS'])
+
+    @staticmethod
+    def pin(request, response, options):
+        """Set the pin cookie on `response`, and return the cache key pinning the user if there is one."""
+        response.set_cookie(
+            options['COOKIE_NAME'], '1', max_age=options['STICKY_SECONDS'], httponly=True, samesite='Lax',
+        )
+        user = identified_user(request)
+        if user is not None and user.is_authenticated:
+            return pin_key(user.pk)
+        return None
@@ -0,0 +1,97 @@
+import random
+import secrets
+from dataclasses import dataclass
+
+from django.contrib.auth.models import User
+from django.db import connection
+
+from .models import (
+    Comment,
+    Ingredient,
+    IngredientCategory,
+    Recipe,
+    RecipeCategory,
+    RecipeIngredient,
+)
+
+BATCH_SIZE = 2000
+
+
+@dataclass
+class SeedSize:
+    users: int = 50
+    categories: int = 20
+    ingredients: int = 1000
+    recipes: int = 20000
+    ingredients_per_recipe: int = 8
+    comments: int = 50000
+
+
+def seed_catalog(size, rng=None):
+    """Fill the catalog with random but realistic data for benchmarks and query plans.
+
+    Timestamps are spread out after the insert, since `auto_now` stamps every row of a
+    bulk_create() with the same time and would hide the cost of ordering by them.
+    """
+    rng = rng or random.Random(0)
+    # Unique per run, so seeding twice does not collide on unique names.
+    prefix = f'seed-{secrets.token_hex(4)}'
+
+    users = User.objects.bulk_create(
+        [User(username=f'{prefix}-user-{n}') for n in range(size.users)],
+        batch_size=BATCH_SIZE,
+    )
+    i_cats = IngredientCategory.objects.bulk_create(
+        [IngredientCategory(name=f'{prefix}-{n}') for n in range(size.categories)],
+    )
+    r_cats = RecipeCategory.objects.bulk_create(
+        [RecipeCategory(name=f'{prefix}-{n}') for n in range(size.categories)],
+    )
+    ingredients = Ingredient.objects.bulk_create(
+        [
+            Ingredient(name=f'{prefix}-ingredient-{n}', category=rng.choice(i_cats), price=rng.randint(1, 500))
+            for n in range(size.ingredients)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    recipes = Recipe.objects.bulk_create(
+        [
+            Recipe(
+                name=f'Recipe {n}',
+                description=f'Seeded recipe number {n}',
+                category=rng.choice(r_cats),
+                user=rng.choice(users),
+            )
+            for n in range(size.recipes)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+    per_recipe = min(size.ingredients_per_recipe, len(ingredients))
+    RecipeIngredient.objects.bulk_create(
+        [
+            RecipeIngredient(recipe=recipe, ingredient=ingredient, quantity=rng.randint(1, 5))
+            for recipe in recipes
+            for ingredient in rng.sample(ingredients, rng.randint(1, per_recipe))
+        ] if per_recipe else [],
+        batch_size=BATCH_SIZE,
+    )
+    comments = Comment.objects.bulk_create(
+        [
+            Comment(text=f'Comment {n}', recipe=rng.choice(recipes), user=rng.choice(users))
+            for n in range(size.comments)
+        ] if recipes else [],
+        batch_size=BATCH_SIZE,
+    )
+
+    with connection.cursor() as cursor:
+        for table, column, objs in (('recipes', 'created_at', recipes), ('comments', 'published_on', comments)):
+            cursor.execute(
+                f"UPDATE {table} SET {column} = {column} - random() * interval '365 days' WHERE id = ANY(%s)",
+                [[obj.id for obj in objs]],
+            )
+        # Fresh statistics, otherwise the planner still sees the tables as empty.
+        for model in (Recipe, RecipeIngredient, Comment):
+            cursor.execute(f'ANALYZE {model._meta.db_table}')
+
+    return {'users': users, 'recipe_categories': r_cats, 'recipes': recipes}
@@ -1,6 +1,10 @@
+import time
+
 from rest_framework import serializers
 
+from .metrics import SERIALIZER_DURATION
 from .models import (
+    MAX_INTEGER,
     Comment,
     Ingredient,
     IngredientCategory,
@@ -10,35 +14,57 @@ from .models import (
 )
 
 
-class IngredientCategorySerializer(serializers.HyperlinkedModelSerializer):
+class TimedDataMixin:
+    """Records the time spent rendering `.data` in `kitchen_serializer_duration_seconds`."""
+
+    @property
+    def data(self):
+        started = time.perf_counter()
+        try:
+            return super().data
+        finally:
+            SERIALIZER_DURATION.observe(self.metric_name(), value=time.perf_counter() - started)
+
+    def metric_name(self):
+        return type(self).__name__
+
+
+class TimedListSerializer(TimedDataMixin, serializers.ListSerializer):
+    # Set as `Meta.list_serializer_class`, so many=True is timed under the child's name.
+    def metric_name(self):
+        return type(self.child).__name__
+
+
+class IngredientCategorySerializer(TimedDataMixin, serializers.HyperlinkedModelSerializer):
     def __repr__(self):  # pragma: no cover
         return "ingredient-categories"
 
     class Meta:
         model = IngredientCategory
+        list_serializer_class = TimedListSerializer
         fields = [
             'id', 'name'
         ]
 
 
-class IngredientSerializer(serializers.HyperlinkedModelSerializer):
+class IngredientSerializer(TimedDataMixin, serializers.HyperlinkedModelSerializer):
     category = serializers.PrimaryKeyRelatedField(
         queryset=IngredientCategory.objects.all(),
         many=False)
 
     class Meta:
         model = Ingredient
+        list_serializer_class = TimedListSerializer
         fields = [
             'id', 'name', 'price', 'category'
         ]
 
 
 class RecipeIngredientSerializer(serializers.HyperlinkedModelSerializer):
-    ingredient_id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all(),
-        many=False, write_only=True)
+    # Resolved for the whole list at once in RecipeSerializer.validate_ingredients().
+    ingredient_id = serializers.IntegerField(write_only=True, min_value=1, max_value=MAX_INTEGER)
     id = serializers.PrimaryKeyRelatedField(read_only=True)
-    quantity = serializers.IntegerField(write_only=True)
+    quantity = serializers.IntegerField(write_only=True, min_value=1, max_value=MAX_INTEGER)
 
     class Meta:
         model = RecipeIngredient
@@ -47,12 +73,28 @@ class RecipeIngredientSerializer(serializers.HyperlinkedModelSerializer):
         ]
 
 
-class RecipeSerializer(serializers.HyperlinkedModelSerializer):
+class RecipeSerializer(TimedDataMixin, serializers.HyperlinkedModelSerializer):
     category = serializers.PrimaryKeyRelatedField(
         queryset=RecipeCategory.objects.all(),
         many=False)
 
     ingredients = RecipeIngredientSerializer(many=True, allow_null=True)
+    cost = serializers.IntegerField(read_only=True)
+
+    def validate_ingredients(self, value):
+        if not value:
+            return value
+
+        ids = [item['ingredient_id'] for item in value]
+        if len(set(ids)) != len(ids):
+            raise serializers.ValidationError('Duplicate ingredients.')
+
+        ingredients = Ingredient.objects.in_bulk(ids)
+        missing = [pk for pk in ids if pk not in ingredients]
+        if missing:
+            raise serializers.ValidationError(f'Invalid pk "{missing[0]}" - object does not exist.')
+
+        return [{**item, 'ingredient': ingredients[item['ingredient_id']]} for item in value]
 
     def update(self, instance: Recipe, validated_data):
         instance.name = validated_data.get('name', instance.name)
@@ -64,30 +106,41 @@ class RecipeSerializer(serializers.HyperlinkedModelSerializer):
 
     class Meta:
         model = Recipe
+        list_serializer_class = TimedListSerializer
         fields = [
             'id', 'name', 'description', 'user_id',
-            'created_at', 'category', 'ingredients'
+            'created_at', 'category', 'ingredients', 'cost'
         ]
 
 
-class RecipeCategorySerializer(serializers.HyperlinkedModelSerializer):
+class RecipeImportSerializer(serializers.Serializer):
+    # Field checks only; references are resolved per chunk by kitchen_app.importer.
+    name = serializers.CharField(max_length=64)
+    description = serializers.CharField()
+    category = serializers.IntegerField(allow_null=True, required=False, min_value=1, max_value=MAX_INTEGER)
+    ingredients = RecipeIngredientSerializer(many=True)
+
+
+class RecipeCategorySerializer(TimedDataMixin, serializers.HyperlinkedModelSerializer):
     def __repr__(self):  # pragma: no cover
         return "recipe-categories"
 
     class Meta:
         model = RecipeCategory
+        list_serializer_class = TimedListSerializer
         fields = [
             'id', 'name'
         ]
 
 
-class CommentSerializer(serializers.HyperlinkedModelSerializer):
+class CommentSerializer(TimedDataMixin, serializers.HyperlinkedModelSerializer):
     recipe_id = serializers.PrimaryKeyRelatedField(
         queryset=Recipe.objects.all(),
         many=False)
 
     class Meta:
         model = Comment
+        list_serializer_class = TimedListSerializer
         fields = [
             'id', 'text', 'user_id',
             'published_on', 'recipe_id'
@@ -0,0 +1,129 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import get_token_cache
+from .models import (
+    Comment,
+    Counter,
+    Ingredient,
+    IngredientCategory,
+    IngredientPostings,
+    Recipe,
+    RecipeCategory,
+    RecipeIngredient,
+    RecipeSignature,
+)
+
+# Fields whose previous value the post_save handlers below need to compare against.
+TRACKED_FIELDS = {
+    Ingredient: ('price', 'category_id'),
+    Recipe: ('category_id',),
+    RecipeIngredient: ('recipe_id', 'ingredient_id'),
+}
+
+
+@receiver(pre_save, sender=Ingredient)
+@receiver(pre_save, sender=Recipe)
+@receiver(pre_save, sender=RecipeIngredient)
+def remember_previous_values(sender, instance, **kwargs):
+    instance._previous = None
+    if instance._state.adding or instance.pk is None:
+        return
+
+    instance._previous = sender.objects.filter(pk=instance.pk).values(*TRACKED_FIELDS[sender]).first()
+
+
+@receiver(post_save, sender=Ingredient)
+def propagate_ingredient_price(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous', None)
+    if created or previous is None or previous['price'] == instance.price:
+        return
+
+    Recipe.objects.filter(
+        recipeingredient__ingredient_id=instance.pk,
+    ).shift_cost(instance.pk, instance.price - previous['price'])
+
+
+@receiver(post_save, sender=RecipeIngredient)
+def refresh_saved_recipe_ingredient(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous', None)
+    recipe_ids = {instance.recipe_id}
+    if created:
+        IngredientPostings.objects.add({(instance.ingredient_id, instance.recipe_id)})
+    elif previous is not None and (previous['ingredient_id'], previous['recipe_id']) != (
+        instance.ingredient_id, instance.recipe_id,
+    ):
+        IngredientPostings.objects.remove({(previous['ingredient_id'], previous['recipe_id'])})
+        IngredientPostings.objects.add({(instance.ingredient_id, instance.recipe_id)})
+        recipe_ids.add(previous['recipe_id'])
+
+    Recipe.objects.filter(pk__in=recipe_ids).refresh_totals()
+    RecipeSignature.objects.refresh(recipe_ids)
+
+
+@receiver(post_delete, sender=RecipeIngredient)
+def refresh_deleted_recipe_ingredient(sender, instance, **kwargs):
+    Recipe.objects.filter(pk=instance.recipe_id).refresh_totals()
+    IngredientPostings.objects.remove({(instance.ingredient_id, instance.recipe_id)})
+    RecipeSignature.objects.refresh({instance.recipe_id})
+
+
+@receiver(post_delete, sender=Ingredient)
+def drop_ingredient_postings(sender, instance, **kwargs):
+    IngredientPostings.objects.filter(ingredient_id=instance.pk).delete()
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_save, sender=Recipe)
+def count_saved(sender, instance, created, **kwargs):
+    if created:
+        Counter.objects.increment(Counter.deltas_for([instance]))
+        return
+
+    previous = getattr(instance, '_previous', None)
+    if previous is None or previous['category_id'] == instance.category_id:
+        return
+
+    deltas = {}
+    if previous['category_id'] is not None:
+        deltas[Counter.key_for(sender, previous['category_id'])] = -1
+    if instance.category_id is not None:
+        deltas[Counter.key_for(sender, instance.category_id)] = 1
+    Counter.objects.increment(deltas)
+
+
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+def count_deleted(sender, instance, **kwargs):
+    Counter.objects.increment(Counter.deltas_for([instance], delta=-1))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_save, sender=IngredientCategory)
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=RecipeCategory)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_delete, sender=IngredientCategory)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=RecipeCategory)
+def bump_version(sender, instance, **kwargs):
+    # Recipe ingredient changes go through refresh_totals(), which bumps the recipes.
+    Counter.objects.bump_versions(sender)
+
+
+@receiver(post_delete, sender=Token)
+def evict_deleted_token(sender, instance, **kwargs):
+    get_token_cache().delete(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+def evict_user_tokens(sender, instance, update_fields=None, **kwargs):
+    # Logins only touch last_login, which the cached user does not need to be exact on.
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    for key in Token.objects.filter(user_id=instance.pk).values_list('key', flat=True):
+        get_token_cache().delete(key)
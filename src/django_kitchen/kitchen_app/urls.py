@@ -17,12 +17,14 @@ urlpatterns = [
     path('recipes/', views.recipe_list_view, name='recipes'),
     path('recipe-categories/', views.RecipeCategoryListView.as_view(), name='recipe_categories'),
     path('recipe/', views.recipe_view, name='recipe'),
+    path('recipe/comments/', views.recipe_comments_view, name='recipe_comments'),
     path('comment/', views.comment_view, name='comment'),
     path('ingredient-categories/', views.IngredientCategoryListView.as_view(), name='ingredient_categories'),
     path('ingredients/', views.ingredient_list_view, name='ingredients'),
     path('ingredient/', views.ingredient_view, name='ingredient'),
     path('register/', views.register, name='register'),
     path('accounts/', include('django.contrib.auth.urls')),
+    path('api/export/<str:entity>/', views.export_view, name='export'),
     path('api/', include(router.urls), name='api'),
     path('profile/', views.profile, name='profile'),
     path(
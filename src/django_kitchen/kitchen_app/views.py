@@ -1,30 +1,70 @@
+import collections
+import decimal
+import re
 from typing import Any
 
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.models import User
-from django.core.paginator import Paginator
-from django.http import HttpResponseRedirect
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    TrigramWordSimilarity,
+)
+from django.core.handlers.asgi import ASGIRequest
+from django.core.paginator import Page, Paginator
+from django.db import transaction
+from django.db.models import Case, F, FloatField, Prefetch, Q, When
+from django.db.models.functions import Cast, Length
+from django.http import (
+    Http404,
+    HttpResponseRedirect,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.shortcuts import redirect, render
 from django.views.generic import ListView
 from rest_framework import authentication, permissions, viewsets
-from rest_framework.authtoken.models import Token
+from rest_framework.decorators import (
+    action,
+    api_view,
+    authentication_classes,
+    permission_classes,
+)
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
 
+from .authentication import CachedTokenAuthentication
+from .cache import read_through
+from .conditional import ConditionalGetMixin
+from .exporter import ENTITIES, FORMATS, aiterate, export
 from .forms import (
     CreateCommentForm,
     CreateIngredientForm,
     CreateRecipeForm,
     RegistrationForm,
 )
+from .importer import import_recipes
 from .models import (
     Comment,
+    Counter,
     Ingredient,
     IngredientCategory,
+    IngredientPostings,
     Recipe,
     RecipeCategory,
     RecipeIngredient,
+    RecipeSignature,
 )
+from .pagination import (
+    KeysetPagination,
+    decode_cursor,
+    encode_cursor,
+    key_values,
+    keyset_filter,
+    ordering_keys,
+)
+from .planner import get_catalog, parse_slots, plan
 from .serializers import (
     CommentSerializer,
     IngredientCategorySerializer,
@@ -35,50 +75,87 @@ from .serializers import (
 
 
 def home_page(request):
+    counts = Counter.objects.values_for(
+        Counter.key_for(Recipe),
+        Counter.key_for(Ingredient),
+    )
     return render(
         request,
         'index.html',
         context={
-            'recipes': Recipe.objects.count(),
-            'ingredients': Ingredient.objects.count(),
+            'recipes': counts[Counter.key_for(Recipe)],
+            'ingredients': counts[Counter.key_for(Ingredient)],
         }
     )
 
 
-def create_listview(model_class, template, plural_name):
+def create_listview(model_class, template, plural_name, counted_model):
     class View(LoginRequiredMixin, ListView):
         model = model_class
         template_name = template
-        paginate_by = 10
+        page_size = 10
         context_object_name = plural_name
         ordering = ['id']
 
         def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
             context = super().get_context_data(**kwargs)
-            instances = model_class.objects.all()
-            paginator = Paginator(instances, 10)
-            page = self.request.GET.get('page')
-            page_obj = paginator.get_page(page)
+            page = self.request.GET.get('page', '')
+            page = page if page.isdigit() or page == 'last' else '1'
+            # The counts change with the counted model, so both generations key the page.
+            items, number, count = read_through(
+                f'{plural_name}:page:{page}',
+                (model_class, counted_model),
+                lambda: self.get_page(page),
+            )
+
+            # Rebuilt around the cached rows, so the pagination links need no COUNT(*) either.
+            paginator = Paginator(range(count), self.page_size)
+            page_obj = Page(items, number, paginator)
+            context.update(
+                paginator=paginator,
+                page_obj=page_obj,
+                is_paginated=page_obj.has_other_pages(),
+            )
             context[f'{plural_name}_list'] = page_obj
             return context
 
+        def get_page(self, page):
+            instances = model_class.objects.order_by('id')
+            page_obj = Paginator(instances, self.page_size).get_page(page)
+
+            keys = {inst.id: Counter.key_for(counted_model, inst.id) for inst in page_obj}
+            counts = Counter.objects.values_for(*keys.values())
+            for inst in page_obj:
+                inst.items_count = counts[keys[inst.id]]
+            return list(page_obj), page_obj.number, page_obj.paginator.count
+
     return View
 
 
 def recipe_list_view(request):
-    target_category_id = request.GET.get('category_id', '')
+    if not request.user.is_authenticated:
+        return redirect('homepage')
 
-    category_inst = RecipeCategory.objects.get(id=target_category_id)
+    target_category_id = int(request.GET.get('category_id', ''))
 
-    target_instances = Recipe.objects.filter(category_id=target_category_id) if target_category_id else None
+    def load():
+        category_inst = RecipeCategory.objects.get(id=target_category_id)
+        # Author names are cached along with the recipes, so a rename shows up after the timeout.
+        target_instances = list(
+            Recipe.objects.filter(
+                category_id=target_category_id,
+            ).select_related('user').order_by('-created_at', '-id'),
+        )
+        return category_inst, target_instances
+
+    category_inst, target_instances = read_through(
+        f'recipes:category:{target_category_id}', (RecipeCategory, Recipe), load,
+    )
     context = {
         "recipes_list": target_instances,
         "category": category_inst
     }
 
-    if not request.user.is_authenticated:
-        return redirect('homepage')
-
     return render(
         request,
         "collections/recipes.html",
@@ -90,11 +167,16 @@ def ingredient_list_view(request):
     if not request.user.is_authenticated:
         return redirect('homepage')
 
-    target_category_id = request.GET.get('category_id', '')
+    target_category_id = int(request.GET.get('category_id', ''))
 
-    category_inst = IngredientCategory.objects.get(id=target_category_id)
+    def load():
+        category_inst = IngredientCategory.objects.get(id=target_category_id)
+        target_instances = list(Ingredient.objects.filter(category_id=target_category_id).order_by('id'))
+        return category_inst, target_instances
 
-    target_instances = Ingredient.objects.filter(category_id=target_category_id) if target_category_id else None
+    category_inst, target_instances = read_through(
+        f'ingredients:category:{target_category_id}', (IngredientCategory, Ingredient), load,
+    )
     context = {
         "ingredients_list": target_instances,
         "category": category_inst
@@ -110,12 +192,14 @@ def ingredient_list_view(request):
 RecipeCategoryListView = create_listview(
     RecipeCategory,
     'collections/recipe_categories.html',
-    'recipe_categories'
+    'recipe_categories',
+    Recipe,
 )
 IngredientCategoryListView = create_listview(
     IngredientCategory,
     'collections/ingredient_categories.html',
-    'ingredient_categories'
+    'ingredient_categories',
+    Ingredient,
 )
 
 
@@ -123,14 +207,11 @@ def recipe_view(request):
     if not request.user.is_authenticated:
         return redirect('homepage')
 
-    auth_token = Token.objects.get_or_create(user=request.user)
-    context = {
-        'auth_token': auth_token[0].key
-    }
+    context = {}
 
     target_id = request.GET.get('id', '')
     try:
-        target_instance = Recipe.objects.get(id=target_id) if target_id else None
+        target_instance = Recipe.objects.select_related('category', 'user').get(id=target_id) if target_id else None
         context['recipe'] = target_instance
     except Recipe.DoesNotExist:
         return render(
@@ -150,23 +231,24 @@ def recipe_view(request):
             )
         data = form.cleaned_data
 
-        new_recipe = Recipe.objects.create(
-            name=data['name'],
-            description=data['description'],
-            category=data['category'],
-            user=User.objects.get(id=request.user.id),
-        )
+        with transaction.atomic():
+            new_recipe = Recipe.objects.create(
+                name=data['name'],
+                description=data['description'],
+                category=data['category'],
+                user=request.user,
+            )
 
-        RecipeIngredient.objects.bulk_create(
-            [
-                RecipeIngredient(
-                    recipe=new_recipe,
-                    ingredient=ing,
-                    quantity=1,
-                )
-                for ing in data['ingredients']
-            ]
-        )
+            RecipeIngredient.objects.bulk_create(
+                [
+                    RecipeIngredient(
+                        recipe=new_recipe,
+                        ingredient=ing,
+                        quantity=1,
+                    )
+                    for ing in data['ingredients']
+                ]
+            )
 
         return redirect('profile')
 
@@ -175,7 +257,8 @@ def recipe_view(request):
     comment_form = CreateCommentForm()
     comment_form.fields['recipe'].choices = zip([target_instance.id], [target_instance])
     context['comment_form'] = comment_form
-    context['comments'] = Comment.objects.filter(recipe_id=target_instance.id)
+    context['comments'], context['next_cursor'] = comment_page(target_instance.id)
+    context['similar_recipes'] = similar_recipes(target_instance.id)
     return render(
         request,
         'entities/recipe.html',
@@ -201,9 +284,6 @@ def ingredient_view(request):
             {},
         )
 
-    auth_token = Token.objects.get_or_create(user=request.user)
-    context['auth_token'] = auth_token[0].key
-
     if request.method == 'POST':
         form = CreateIngredientForm(request.POST)
         if not form.is_valid():
@@ -235,6 +315,93 @@ def ingredient_view(request):
     )
 
 
+COMMENTS_PAGE_SIZE = 20
+
+
+def comment_page(recipe_id, cursor=None, page_size=COMMENTS_PAGE_SIZE):
+    """Return one page of a recipe's comments, newest first, and the cursor of the next one.
+
+    Pages are keyed on (published_on, id) like the API, so the thread is read along
+    comments_recipe_published_idx however deep the reader scrolls.
+    """
+    queryset, ordering = comments_after(recipe_id, cursor)
+    return split_page(list(queryset[:page_size + 1]), ordering, page_size)
+
+
+def comments_after(recipe_id, cursor):
+    # Returns the unevaluated queryset, so kitchen_app.async_views can await the same query.
+    queryset = Comment.objects.filter(recipe_id=recipe_id).select_related('user').order_by('-published_on', '-id')
+    ordering = ordering_keys(queryset)
+    if cursor:
+        try:
+            values, _ = decode_cursor(queryset, ordering, cursor)
+        except NotFound:
+            raise Http404('Invalid cursor')
+        queryset = keyset_filter(queryset, ordering, values)
+    return queryset, ordering
+
+
+def split_page(rows, ordering, page_size):
+    # `rows` holds one row more than a page when there is a next one.
+    if len(rows) <= page_size:
+        return rows, None
+    return rows[:page_size], encode_cursor(key_values(rows[page_size - 1], ordering))
+
+
+SIMILAR_RECIPES = 5
+
+
+def similar_recipes(recipe_id, limit=SIMILAR_RECIPES):
+    """Return the recipes sharing most ingredients with `recipe_id`, each with its `similarity`.
+
+    Read from the MinHash index, see `RecipeSignature`, never by comparing the recipe
+    against the whole catalog.
+    """
+    ranked = RecipeSignature.objects.similar(recipe_id, limit=limit)
+    if not ranked:
+        return []
+    recipes = Recipe.objects.only('id', 'name').in_bulk([pk for pk, _ in ranked])
+    results = []
+    for pk, similarity in ranked:
+        if pk in recipes:
+            recipes[pk].similarity = similarity
+            results.append(recipes[pk])
+    return results
+
+
+def recipe_comments_view(request):
+    # "Load more" endpoint of the recipe page: the next page of comments as HTML or JSON.
+    if not request.user.is_authenticated:
+        return redirect('homepage')
+
+    try:
+        recipe_id = int(request.GET.get('id', ''))
+    except ValueError:
+        raise Http404('Recipe not found')
+    comments, next_cursor = comment_page(recipe_id, request.GET.get('cursor'))
+
+    if request.GET.get('output') == 'json':
+        return JsonResponse({
+            'next': next_cursor,
+            'results': [
+                {
+                    'id': comment.id,
+                    'text': comment.text,
+                    'published_on': comment.published_on,
+                    'user_id': comment.user_id,
+                    'username': comment.user.username,
+                }
+                for comment in comments
+            ],
+        })
+
+    return render(
+        request,
+        'entities/comments_page.html',
+        {'recipe_id': recipe_id, 'comments': comments, 'next_cursor': next_cursor},
+    )
+
+
 def comment_view(request):
     if request.method == 'POST':
         form = CreateCommentForm(request.POST)
@@ -287,60 +454,265 @@ def permission_by_model(model_class):
 
 
 def create_viewset(model_class, serializer):
-    class ViewSet(viewsets.ModelViewSet):
-        queryset = model_class.objects.all()
+    class ViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+        queryset = model_class.objects.order_by('id')
         serializer_class = serializer
+        pagination_class = KeysetPagination
         permission_classes = [permission_by_model(model_class)]
-        authentication_classes = [authentication.TokenAuthentication, authentication.SessionAuthentication]
+        authentication_classes = [CachedTokenAuthentication, authentication.SessionAuthentication]
 
     return ViewSet
 
 
 RecipeCategoryViewSet = create_viewset(RecipeCategory, RecipeCategorySerializer)
 IngredientCategoryViewSet = create_viewset(IngredientCategory, IngredientCategorySerializer)
-IngredientViewSet = create_viewset(Ingredient, IngredientSerializer)
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
-    queryset = Recipe.objects.all()
+class IngredientViewSet(create_viewset(Ingredient, IngredientSerializer)):
+    autocomplete_limit = 10
+    autocomplete_max_limit = 50
+
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        params = request.query_params
+        search = params.get('q', '').strip()
+        try:
+            limit = min(int(params.get('limit', self.autocomplete_limit)), self.autocomplete_max_limit)
+            category_id = int(params['category']) if params.get('category') else None
+        except ValueError:
+            raise ValidationError({'detail': 'limit and category must be integers.'})
+
+        if not search or limit < 1:
+            return Response([])
+
+        # Both branches are answered by the trigram GIN indexes on ingredients.name.
+        queryset = Ingredient.objects.filter(
+            Q(name__istartswith=search) | Q(name__trigram_word_similar=search),
+        ).annotate(
+            is_prefix=Case(When(name__istartswith=search, then=True), default=False),
+            similarity=TrigramWordSimilarity(search, 'name'),
+        ).order_by('-is_prefix', '-similarity', Length('name'), 'name')
+        if category_id is not None:
+            queryset = queryset.filter(category_id=category_id)
+
+        return Response(self.get_serializer(queryset[:limit], many=True).data)
+
+
+class RecipeViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    # RecipeSerializer only renders the ingredient ids, so a single prefetch through
+    # recipes_ingredients is enough; category and user are read from their *_id columns.
+    queryset = Recipe.objects.prefetch_related(
+        Prefetch('ingredients', queryset=Ingredient.objects.only('id')),
+    ).order_by('-created_at', '-id')
     serializer_class = RecipeSerializer
+    pagination_class = KeysetPagination
     permission_classes = [permission_by_model(Recipe)]
-    authentication_classes = [authentication.TokenAuthentication, authentication.SessionAuthentication]
+    authentication_classes = [CachedTokenAuthentication, authentication.SessionAuthentication]
+    cost_filters = {'min_cost': 'cost__gte', 'max_cost': 'cost__lte'}
+    cost_orderings = ('cost', '-cost')
+    # Bumped by every save and by refresh_totals()/shift_cost(), so it tracks the whole body.
+    last_modified_field = 'updated_at'
+    cookable_limit = 20
+    cookable_max_limit = 100
+    cookable_max_have = 200
+    shopping_list_max_recipes = 500
+    shopping_list_max_servings = 100
+    menu_max_recipes = 21
+    menu_max_waste = 10
+    similar_limit = 10
+    similar_max_limit = 50
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        params = self.request.query_params
+
+        for param, lookup in self.cost_filters.items():
+            value = params.get(param)
+            if value is None:
+                continue
+            try:
+                queryset = queryset.filter(**{lookup: int(value)})
+            except ValueError:
+                raise ValidationError({param: 'A valid integer is required.'})
+
+        search = params.get('q', '').strip()
+        if search:
+            query = SearchQuery(search, search_type='websearch', config='english')
+            # ts_rank() returns a real; casting keeps the value exact in keyset cursors.
+            queryset = queryset.filter(search_vector=query).annotate(
+                rank=Cast(SearchRank(F('search_vector'), query), FloatField()),
+            ).order_by('-rank', '-id')
+
+        ordering = params.get('ordering')
+        if ordering is not None:
+            if ordering not in self.cost_orderings:
+                raise ValidationError({'ordering': f'Must be one of: {", ".join(self.cost_orderings)}.'})
+            # The tie-break follows the direction of the cost, so recipes_cost_id_idx serves either.
+            queryset = queryset.order_by(ordering, '-id' if ordering.startswith('-') else 'id')
+
+        return queryset
+
+    @action(detail=False, methods=['get'])
+    def cookable(self, request):
+        params = request.query_params
+        try:
+            have = {int(value) for value in params.get('have', '').split(',') if value.strip()}
+            missing = max(int(params.get('missing', 0)), 0)
+            limit = min(int(params.get('limit', self.cookable_limit)), self.cookable_max_limit)
+        except ValueError:
+            raise ValidationError({'detail': 'have must be a comma-separated list of ids; missing and limit integers.'})
+        if len(have) > self.cookable_max_have:
+            raise ValidationError({'have': f'At most {self.cookable_max_have} ingredients are allowed.'})
+
+        if not have or limit < 1:
+            return Response([])
+
+        # The ranking only reads the postings of the given ingredients, never the whole catalog.
+        ranked = IngredientPostings.objects.cookable(have, max_missing=missing, limit=limit)
+        recipes = super().get_queryset().in_bulk([recipe_id for recipe_id, _, _ in ranked])
+
+        results = []
+        for recipe_id, matched, missing_count in ranked:
+            if recipe_id not in recipes:
+                continue
+            data = self.get_serializer(recipes[recipe_id]).data
+            data.update(matched=matched, missing=missing_count)
+            results.append(data)
+        return Response(results)
+
+    @action(detail=False, methods=['get'], url_path='shopping-list')
+    def shopping_list(self, request):
+        # ?recipes=12:2,15:0.5,17 -- recipe ids with an optional servings multiplier, 1 by default.
+        servings = collections.defaultdict(decimal.Decimal)
+        try:
+            for item in request.query_params.get('recipes', '').split(','):
+                if not item.strip():
+                    continue
+                recipe_id, _, multiplier = item.partition(':')
+                recipe_id = int(recipe_id)
+                # Ids beyond the integer column would fail in the query instead.
+                if not 0 < recipe_id < 2 ** 31:
+                    raise ValueError(f'{recipe_id} is not a recipe id')
+                servings[recipe_id] += decimal.Decimal(multiplier or 1)
+        except (ValueError, decimal.InvalidOperation):
+            raise ValidationError({'recipes': 'Must be a comma-separated list of id[:servings].'})
+        if len(servings) > self.shopping_list_max_recipes:
+            raise ValidationError({'recipes': f'At most {self.shopping_list_max_recipes} recipes are allowed.'})
+        if not all(
+            value.is_finite() and 0 < value <= self.shopping_list_max_servings for value in servings.values()
+        ):
+            raise ValidationError({'recipes': f'Servings must be above 0 and at most {self.shopping_list_max_servings}.'})
+
+        categories = {}
+        for category_id, category, ingredient_id, name, price, quantity, cost in (
+            RecipeIngredient.objects.shopping_list(servings)
+        ):
+            entry = categories.get(category_id)
+            if entry is None:
+                entry = categories[category_id] = {'id': category_id, 'name': category, 'cost': 0, 'ingredients': []}
+            entry['ingredients'].append(
+                {'id': ingredient_id, 'name': name, 'price': price, 'quantity': quantity, 'cost': cost},
+            )
+            entry['cost'] += cost
+
+        return Response({
+            'categories': list(categories.values()),
+            'cost': sum(entry['cost'] for entry in categories.values()),
+        })
+
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        try:
+            limit = min(int(request.query_params.get('limit', self.similar_limit)), self.similar_max_limit)
+        except ValueError:
+            raise ValidationError({'limit': 'A valid integer is required.'})
+        recipe = self.get_object()
+        if limit < 1:
+            return Response([])
+
+        ranked = RecipeSignature.objects.similar(recipe.pk, limit=limit)
+        recipes = super().get_queryset().in_bulk([recipe_id for recipe_id, _ in ranked])
+
+        results = []
+        for recipe_id, similarity in ranked:
+            if recipe_id not in recipes:
+                continue
+            data = self.get_serializer(recipes[recipe_id]).data
+            data['similarity'] = similarity
+            results.append(data)
+        return Response(results)
+
+    @action(detail=False, methods=['get'])
+    def menu(self, request):
+        # ?slots=3:5,7:2&waste=1 -- recipe category ids with the number of recipes from each.
+        params = request.query_params
+        try:
+            slots = parse_slots(params.get('slots', ''))
+            waste = float(params.get('waste', 1))
+        except ValueError:
+            raise ValidationError({'detail': 'slots must be a comma-separated list of category_id[:count]; waste a number.'})
+        if not 0 < sum(slots.values()) <= self.menu_max_recipes:
+            raise ValidationError({'slots': f'Between 1 and {self.menu_max_recipes} recipes are allowed.'})
+        if not 0 <= waste <= self.menu_max_waste:
+            raise ValidationError({'waste': f'Must be between 0 and {self.menu_max_waste}.'})
+
+        menu = plan(get_catalog(), slots, waste=waste)
+        if menu is None:
+            raise ValidationError({'slots': 'A category has fewer recipes than requested.'})
+
+        recipes = super().get_queryset().in_bulk(menu.recipe_ids)
+        return Response({
+            'recipes': [
+                self.get_serializer(recipes[recipe_id]).data for recipe_id in menu.recipe_ids if recipe_id in recipes
+            ],
+            'cost': menu.cost,
+            'leftovers': menu.leftovers,
+            'shared_ingredients': menu.shared_ingredients,
+            'score': menu.score,
+        })
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def bulk_import(self, request):
+        # Read the NDJSON body line by line instead of parsing request.data in one go.
+        report = import_recipes(request.stream or [], request.user)
+        return Response(report.as_dict(), status=200)
 
     def create(self, request):
         if self.request.method == "POST":
-            data = request.data.copy()
-
-            serializer = self.serializer_class(data=data)
-            if not serializer.is_valid():
-                return Response({'errors': serializer.errors}, status=400)
-
-            new_recipe = Recipe.objects.create(
-                name=data['name'],
-                description=data['description'],
-                category=RecipeCategory(id=data['category']),
-                user=User.objects.get(id=self.request.user.id),
-            )
+            with transaction.atomic():
+                serializer = self.serializer_class(data=request.data)
+                if not serializer.is_valid():
+                    return Response({'errors': serializer.errors}, status=400)
+                data = serializer.validated_data
+
+                new_recipe = Recipe.objects.create(
+                    name=data['name'],
+                    description=data['description'],
+                    category=data['category'],
+                    user=request.user,
+                )
 
-            RecipeIngredient.objects.bulk_create(
-                [
-                    RecipeIngredient(
-                        recipe=new_recipe,
-                        ingredient=Ingredient.objects.get(id=ing['ingredient_id']),
-                        quantity=ing['quantity'],
-                    )
-                    for ing in data['ingredients']
-                ]
-            )
+                RecipeIngredient.objects.bulk_create(
+                    [
+                        RecipeIngredient(
+                            recipe=new_recipe,
+                            ingredient=ing['ingredient'],
+                            quantity=ing['quantity'],
+                        )
+                        for ing in data['ingredients'] or []
+                    ]
+                )
 
             return Response({'status': 'ok'}, status=201)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
-    queryset = Comment.objects.all()
+class CommentViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    queryset = Comment.objects.order_by('-published_on', '-id')
     serializer_class = CommentSerializer
+    last_modified_field = 'published_on'
+    pagination_class = KeysetPagination
     permission_classes = [permission_by_model(Comment)]
-    authentication_classes = [authentication.TokenAuthentication, authentication.SessionAuthentication]
+    authentication_classes = [CachedTokenAuthentication, authentication.SessionAuthentication]
 
     def create(self, request):
         if self.request.method == "POST":
@@ -359,6 +731,38 @@ class CommentViewSet(viewsets.ModelViewSet):
             return Response({'status': 'ok'}, status=201)
 
 
+ACCEPTS_GZIP = re.compile(r'\bgzip\b')
+
+
+@api_view(['GET'])
+@authentication_classes([CachedTokenAuthentication, authentication.SessionAuthentication])
+@permission_classes([permissions.IsAuthenticated])
+def export_view(request, entity):
+    # `format` is reserved by DRF's content negotiation, hence `output`.
+    fmt = request.query_params.get('output', 'ndjson')
+    if entity not in ENTITIES or fmt not in FORMATS:
+        raise NotFound()
+
+    compress = bool(ACCEPTS_GZIP.search(request.META.get('HTTP_ACCEPT_ENCODING', '')))
+    chunks = export(entity, fmt, compress=compress)
+    if isinstance(request._request, ASGIRequest):
+        chunks = aiterate(chunks)
+    response = StreamingHttpResponse(chunks, content_type=FORMATS[fmt])
+    response['Content-Disposition'] = f'attachment; filename="{entity}.{fmt}"'
+    response['Vary'] = 'Accept-Encoding'
+    if compress:
+        response['Content-Encoding'] = 'gzip'
+    return response
+
+
+# Read backwards along recipes_user_created_idx, no sort needed.
+PROFILE_RECIPES_SQL = """
+    SELECT * FROM recipes
+    WHERE user_id=%s
+    ORDER BY created_at DESC, id DESC
+"""
+
+
 @login_required
 def profile(request):
     client = User.objects.get(id=request.user.id)
@@ -370,7 +774,8 @@ def profile(request):
     }
 
     form = CreateRecipeForm()
-    form.fields['ingredients'].queryset = Ingredient.objects.all()
+    # Ingredient options are fetched from /api/ingredients/autocomplete/ as the user types.
+    form.fields['ingredients'].widget.choices = []
     form.fields['category'].queryset = RecipeCategory.objects.all()
 
     ing_form = CreateIngredientForm()
@@ -381,13 +786,7 @@ def profile(request):
         'pages/profile.html',
         {
             'client_data': client_data,
-            'client_recipes': Recipe.objects.raw(
-                """
-                SELECT * FROM recipes
-                WHERE user_id=%s
-                """,
-                [client.id],
-            ),
+            'client_recipes': Recipe.objects.raw(PROFILE_RECIPES_SQL, [client.id]),
             'form': form,
             'ing_form': ing_form
         }
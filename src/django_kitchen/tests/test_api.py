@@ -1,15 +1,26 @@
+import gzip
+import json
+from unittest import mock
+
 from django.contrib.auth.models import User
-from django.test import TestCase
+from django.db import DatabaseError, connection
+from django.test import AsyncClient, TestCase
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
 
+from kitchen_app import importer
 from kitchen_app.models import (
     Comment,
+    Counter,
     Ingredient,
     IngredientCategory,
+    IngredientPostings,
     Recipe,
     RecipeCategory,
+    RecipeIngredient,
+    RecipeSignature,
 )
 
 
@@ -353,3 +364,744 @@ class IngredientCategoryAPITest(TestCase):
             self.user, self.user_token,
             status.HTTP_403_FORBIDDEN, status.HTTP_403_FORBIDDEN, status.HTTP_403_FORBIDDEN
         )
+
+
+class RecipeCostAPITest(TestCase):
+    url = "/api/recipes/"
+
+    def setUp(self):
+        self.client = APIClient()
+
+        self.user = User(username='user', password='user')
+        self.user.save()
+        self.client.force_authenticate(user=self.user)
+
+        self.r_cat = RecipeCategory.objects.create(id=1, name='1')
+        i_cat = IngredientCategory.objects.create(id=1, name='a')
+        self.flour = Ingredient.objects.create(name='flour', category=i_cat, price=10)
+        self.sugar = Ingredient.objects.create(name='sugar', category=i_cat, price=30)
+
+    def create_recipe(self, name, ingredients):
+        response = self.client.post(
+            self.url,
+            {
+                'name': name,
+                'description': 'abcdefg',
+                'category': self.r_cat.id,
+                'ingredients': [
+                    {'ingredient_id': ing.id, 'quantity': quantity} for ing, quantity in ingredients
+                ],
+            },
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return Recipe.objects.get(name=name)
+
+    def test_cost_is_computed_on_create(self):
+        recipe = self.create_recipe('cake', [(self.flour, 3), (self.sugar, 2)])
+
+        self.assertEqual(recipe.cost, 3 * 10 + 2 * 30)
+        self.assertEqual(self.client.get(f'{self.url}{recipe.id}/').data['cost'], 90)
+
+    def test_cost_follows_recipe_ingredient_changes(self):
+        recipe = self.create_recipe('cake', [(self.flour, 3)])
+
+        RecipeIngredient.objects.create(recipe=recipe, ingredient=self.sugar, quantity=1)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.cost, 60)
+
+        RecipeIngredient.objects.filter(recipe=recipe, ingredient=self.flour).delete()
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.cost, 30)
+
+    def test_cost_follows_ingredient_price(self):
+        cake = self.create_recipe('cake', [(self.flour, 3), (self.sugar, 2)])
+        bread = self.create_recipe('bread', [(self.flour, 5)])
+        candy = self.create_recipe('candy', [(self.sugar, 1)])
+
+        self.flour.price = 12
+        self.flour.save()
+
+        for recipe, cost in ((cake, 3 * 12 + 2 * 30), (bread, 5 * 12), (candy, 30)):
+            recipe.refresh_from_db()
+            self.assertEqual(recipe.cost, cost)
+
+    def test_cost_beyond_integer(self):
+        # The largest quantity the column takes: the cost overflows an integer, not a bigint.
+        self.sugar.price = 500
+        self.sugar.save()
+        recipe = self.create_recipe('feast', [(self.sugar, 2 ** 31 - 1)])
+        self.assertEqual(recipe.cost, (2 ** 31 - 1) * 500)
+
+        self.sugar.price = 1000
+        self.sugar.save()
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.cost, (2 ** 31 - 1) * 1000)
+
+    def test_filter_and_order_by_cost(self):
+        self.create_recipe('cake', [(self.flour, 3), (self.sugar, 2)])
+        self.create_recipe('bread', [(self.flour, 5)])
+        self.create_recipe('candy', [(self.sugar, 1)])
+        self.create_recipe('toffee', [(self.sugar, 1)])
+
+        response = self.client.get(self.url, {'min_cost': 40, 'max_cost': 60, 'ordering': 'cost'})
+        self.assertEqual([r['name'] for r in response.data['results']], ['bread'])
+
+        # Equal costs are ordered by id in the same direction.
+        response = self.client.get(self.url, {'ordering': 'cost'})
+        self.assertEqual([r['name'] for r in response.data['results']], ['candy', 'toffee', 'bread', 'cake'])
+        response = self.client.get(self.url, {'ordering': '-cost'})
+        self.assertEqual([r['name'] for r in response.data['results']], ['cake', 'bread', 'toffee', 'candy'])
+
+        self.assertEqual(
+            self.client.get(self.url, {'min_cost': 'abc'}).status_code, status.HTTP_400_BAD_REQUEST
+        )
+        self.assertEqual(
+            self.client.get(self.url, {'ordering': 'name'}).status_code, status.HTTP_400_BAD_REQUEST
+        )
+
+
+class KeysetPaginationAPITest(TestCase):
+    url = "/api/comments/"
+
+    def setUp(self):
+        self.client = APIClient()
+
+        self.user = User(username='user', password='user')
+        self.user.save()
+        self.client.force_authenticate(user=self.user)
+
+        r_cat = RecipeCategory.objects.create(id=1, name='1')
+        recipe = Recipe.objects.create(name='A', description='afasfafssa', category=r_cat, user=self.user)
+        Comment.objects.bulk_create(
+            [Comment(text=f'comment {i}', user=self.user, recipe=recipe) for i in range(25)]
+        )
+        # bulk_create() gives every row the same published_on, so only the id breaks ties.
+        self.expected_ids = list(
+            Comment.objects.order_by('-published_on', '-id').values_list('id', flat=True)
+        )
+
+    def test_walks_all_pages_without_counting(self):
+        seen = []
+        url = f'{self.url}?page_size=10'
+        with CaptureQueriesContext(connection) as queries:
+            while url:
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                seen.extend(comment['id'] for comment in response.data['results'])
+                url = response.data['next']
+
+        self.assertEqual(seen, self.expected_ids)
+        self.assertFalse(any('COUNT(' in query['sql'].upper() for query in queries.captured_queries))
+
+    def test_previous_link(self):
+        first = self.client.get(self.url, {'page_size': 10}).data
+        self.assertIsNone(first['previous'])
+
+        second = self.client.get(first['next']).data
+        back = self.client.get(second['previous']).data
+        self.assertEqual(back['results'], first['results'])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_offset_opt_in(self):
+        response = self.client.get(self.url, {'offset': 20, 'limit': 10})
+
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual([c['id'] for c in response.data['results']], self.expected_ids[20:])
+
+
+class ListQueryCountAPITest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+        self.user = User(username='user', password='user')
+        self.user.save()
+        self.client.force_authenticate(user=self.user)
+
+        self.r_cat = RecipeCategory.objects.create(id=1, name='1')
+        i_cat = IngredientCategory.objects.create(id=1, name='a')
+        self.ingredients = [
+            Ingredient.objects.create(name=f'ingredient {i}', category=i_cat, price=i + 1) for i in range(3)
+        ]
+
+    def add_recipes(self, count):
+        for _ in range(count):
+            recipe = Recipe.objects.create(name='A', description='abc', category=self.r_cat, user=self.user)
+            recipe.ingredients.set(self.ingredients)
+            Comment.objects.create(text='bla bla', user=self.user, recipe=recipe)
+
+    def count_queries(self, url, page_size):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'page_size': page_size})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), page_size)
+        return len(queries)
+
+    def assert_constant_queries(self, url):
+        self.add_recipes(2)
+        small = self.count_queries(url, 2)
+        self.add_recipes(18)
+        self.assertEqual(self.count_queries(url, 20), small)
+
+    def test_recipes(self):
+        self.assert_constant_queries('/api/recipes/')
+
+    def test_comments(self):
+        self.assert_constant_queries('/api/comments/')
+
+
+class RecipeCreateAPITest(TestCase):
+    url = "/api/recipes/"
+
+    def setUp(self):
+        self.client = APIClient()
+
+        self.user = User(username='user', password='user')
+        self.user.save()
+        self.client.force_authenticate(user=self.user)
+
+        self.r_cat = RecipeCategory.objects.create(id=1, name='1')
+        i_cat = IngredientCategory.objects.create(id=1, name='a')
+        self.ingredients = Ingredient.objects.bulk_create([
+            Ingredient(name=f'ingredient {i}', category=i_cat, price=i + 1) for i in range(30)
+        ])
+
+    def payload(self, ingredient_ids):
+        return {
+            'name': 'Aaaaaa',
+            'description': 'abcdefg',
+            'category': self.r_cat.id,
+            'ingredients': [{'ingredient_id': pk, 'quantity': 2} for pk in ingredient_ids],
+        }
+
+    def round_trips(self, count):
+        ids = [ing.id for ing in self.ingredients[:count]]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, self.payload(ids), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return len(queries)
+
+    def test_round_trips_do_not_grow_with_ingredients(self):
+        self.assertEqual(self.round_trips(1), self.round_trips(30))
+
+        recipe = Recipe.objects.order_by('-id').first()
+        self.assertEqual(recipe.ingredients.count(), 30)
+        self.assertEqual(recipe.user, self.user)
+
+    def test_invalid_ingredients(self):
+        for ids in ([self.ingredients[0].id, 424242], [self.ingredients[0].id] * 2):
+            response = self.client.post(self.url, self.payload(ids), format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('ingredients', response.data['errors'])
+
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_atomic(self):
+        ids = [ing.id for ing in self.ingredients[:3]]
+        with mock.patch.object(RecipeIngredient.objects, 'bulk_create', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self.client.post(self.url, self.payload(ids), format='json')
+
+        self.assertFalse(Recipe.objects.exists())
+
+
+class RecipeImportAPITest(TestCase):
+    url = "/api/recipes/import/"
+
+    def setUp(self):
+        self.client = APIClient()
+
+        self.user = User(username='user', password='user')
+        self.user.save()
+        self.client.force_authenticate(user=self.user)
+
+        self.r_cat = RecipeCategory.objects.create(id=1, name='1')
+        i_cat = IngredientCategory.objects.create(id=1, name='a')
+        self.flour = Ingredient.objects.create(name='flour', category=i_cat, price=10)
+
+    def line(self, **overrides):
+        recipe = {
+            'name': 'bread',
+            'description': 'abcdefg',
+            'category': self.r_cat.id,
+            'ingredients': [{'ingredient_id': self.flour.id, 'quantity': 3}],
+        }
+        recipe.update(overrides)
+        return json.dumps(recipe)
+
+    def test_import_reports_bad_lines(self):
+        body = '\n'.join([
+            self.line(),
+            '{not json',
+            self.line(category=4242),
+            '',
+            self.line(name='x' * 65),
+            self.line(ingredients=[{'ingredient_id': 4242, 'quantity': 1}]),
+            self.line(name='cake'),
+        ])
+        response = self.client.post(self.url, body, content_type='application/x-ndjson')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([e['line'] for e in response.data['errors']], [2, 3, 5, 6])
+
+        recipes = Recipe.objects.order_by('id')
+        self.assertEqual([r.name for r in recipes], ['bread', 'cake'])
+        self.assertEqual([r.cost for r in recipes], [30, 30])
+        self.assertEqual(Counter.objects.values_for('recipes')['recipes'], 2)
+
+    def test_bad_line_rejects_only_itself(self):
+        # Each within its column, but together their cost overflows even a bigint.
+        saffron = Ingredient.objects.bulk_create([
+            Ingredient(name=f'saffron {n}', category_id=1, price=2 ** 31 - 1) for n in range(3)
+        ])
+        body = '\n'.join([
+            self.line(name='recipe 1'),
+            self.line(ingredients=[{'ingredient_id': i.id, 'quantity': 2 ** 31 - 1} for i in saffron]),
+            self.line(name='recipe 2'),
+            self.line(ingredients=[{'ingredient_id': self.flour.id, 'quantity': 2 ** 31}]),
+            self.line(name='recipe 3'),
+        ])
+        response = self.client.post(self.url, body, content_type='application/x-ndjson')
+
+        self.assertEqual(response.data['created'], 3)
+        self.assertEqual([e['line'] for e in response.data['errors']], [2, 4])
+        self.assertIn('quantity', str(response.data['errors'][1]['errors']))
+        self.assertEqual(
+            list(Recipe.objects.order_by('id').values_list('name', flat=True)), ['recipe 1', 'recipe 2', 'recipe 3'],
+        )
+
+    def test_import_in_chunks(self):
+        body = '\n'.join(self.line(name=f'recipe {i}') for i in range(25))
+        with (
+            mock.patch('kitchen_app.importer.DEFAULT_CHUNK_SIZE', 10),
+            mock.patch('kitchen_app.importer._import_chunk', wraps=importer._import_chunk) as import_chunk,
+        ):
+            response = self.client.post(self.url, body, content_type='application/x-ndjson')
+
+        self.assertEqual(import_chunk.call_count, 3)
+        self.assertEqual(response.data['created'], 25)
+        self.assertEqual(RecipeIngredient.objects.count(), 25)
+
+
+class ExportAPITest(TestCase):
+    url = "/api/export/"
+
+    def setUp(self):
+        self.client = APIClient()
+
+        self.user = User(username='user', password='user')
+        self.user.save()
+        self.client.force_authenticate(user=self.user)
+
+        r_cat = RecipeCategory.objects.create(id=1, name='1')
+        i_cat = IngredientCategory.objects.create(id=1, name='a')
+        self.flour = Ingredient.objects.create(name='flour', category=i_cat, price=10)
+        self.sugar = Ingredient.objects.create(name='sugar', category=i_cat, price=30)
+        self.bread = Recipe.objects.create(name='bread', description='abc', category=r_cat, user=self.user)
+        RecipeIngredient.objects.create(recipe=self.bread, ingredient=self.flour, quantity=5)
+        RecipeIngredient.objects.create(recipe=self.bread, ingredient=self.sugar, quantity=1)
+        self.water = Recipe.objects.create(name='water', description='abc', category=r_cat, user=self.user)
+
+    def fetch(self, entity, **kwargs):
+        response = self.client.get(f'{self.url}{entity}/', **kwargs)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_ndjson(self):
+        with CaptureQueriesContext(connection) as queries:
+            _, content = self.fetch('recipes')
+        rows = [json.loads(line) for line in content.decode().splitlines()]
+
+        self.assertEqual([row['name'] for row in rows], ['bread', 'water'])
+        self.assertEqual(rows[0]['ingredients'], [
+            {'ingredient_id': self.flour.id, 'quantity': 5},
+            {'ingredient_id': self.sugar.id, 'quantity': 1},
+        ])
+        self.assertEqual(rows[0]['cost'], 80)
+        self.assertEqual(rows[1]['ingredients'], [])
+        self.assertEqual(len(queries), 1)
+
+    def test_csv(self):
+        _, content = self.fetch('ingredients', data={'output': 'csv'})
+
+        self.assertEqual(content.decode().splitlines(), [
+            'id,name,category_id,price',
+            f'{self.flour.id},flour,1,10',
+            f'{self.sugar.id},sugar,1,30',
+        ])
+
+    def test_gzip(self):
+        Comment.objects.create(text='bla bla', user=self.user, recipe=self.bread)
+        response, content = self.fetch('comments', HTTP_ACCEPT_ENCODING='gzip, deflate')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(content))['text'], 'bla bla')
+
+    async def test_asgi(self):
+        client = AsyncClient()
+        await client.aforce_login(self.user)
+        response = await client.get(f'{self.url}ingredients/', {'output': 'csv'})
+
+        # Streamed chunk by chunk rather than collected into a list first.
+        self.assertTrue(response.is_async)
+        content = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(content.decode().splitlines()[1:], [
+            f'{self.flour.id},flour,1,10',
+            f'{self.sugar.id},sugar,1,30',
+        ])
+
+    def test_unknown(self):
+        self.assertEqual(self.client.get(f'{self.url}users/').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(
+            self.client.get(f'{self.url}recipes/', {'output': 'xml'}).status_code, status.HTTP_404_NOT_FOUND
+        )
+
+
+class RecipeSearchAPITest(TestCase):
+    url = "/api/recipes/"
+
+    def setUp(self):
+        self.client = APIClient()
+
+        self.user = User(username='user', password='user')
+        self.user.save()
+        self.client.force_authenticate(user=self.user)
+
+        r_cat = RecipeCategory.objects.create(id=1, name='1')
+        self.create = lambda name, description: Recipe.objects.create(
+            name=name, description=description, category=r_cat, user=self.user,
+        )
+
+    def search(self, q, **params):
+        response = self.client.get(self.url, {'q': q, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_name_ranks_above_description(self):
+        self.create('Pancakes', 'Flour, milk and eggs')
+        self.create('Tomato soup', 'Serve with pancakes')
+        self.create('Borscht', 'Beets and cabbage')
+
+        self.assertEqual([r['name'] for r in self.search('pancake')['results']], ['Pancakes', 'Tomato soup'])
+        self.assertEqual(self.search('"tomato soup" -borscht')['results'][0]['name'], 'Tomato soup')
+
+    def test_vector_follows_updates(self):
+        recipe = self.create('Pancakes', 'Flour, milk and eggs')
+        recipe.name = 'Waffles'
+        recipe.save()
+
+        self.assertEqual(self.search('pancakes')['results'], [])
+        self.assertEqual(len(self.search('waffles')['results']), 1)
+
+    def test_keyset_pagination_over_ranked_results(self):
+        for i in range(7):
+            self.create(f'Soup {i}', 'soup ' * (i % 3))
+
+        seen = []
+        data = self.search('soup', page_size=3)
+        while True:
+            seen.extend(r['id'] for r in data['results'])
+            if not data['next']:
+                break
+            data = self.client.get(data['next']).data
+
+        self.assertEqual(sorted(seen), sorted(Recipe.objects.values_list('id', flat=True)))
+        self.assertEqual(len(seen), 7)
+
+
+class IngredientAutocompleteAPITest(TestCase):
+    url = "/api/ingredients/autocomplete/"
+
+    def setUp(self):
+        self.client = APIClient()
+
+        self.user = User(username='user', password='user')
+        self.user.save()
+        self.client.force_authenticate(user=self.user)
+
+        vegetables = IngredientCategory.objects.create(id=1, name='vegetables')
+        self.fruits = IngredientCategory.objects.create(id=2, name='fruits')
+        Ingredient.objects.bulk_create([
+            Ingredient(name='Tomato', category=vegetables, price=1),
+            Ingredient(name='Cherry tomato', category=vegetables, price=1),
+            Ingredient(name='Potato', category=vegetables, price=1),
+            Ingredient(name='Tamarind', category=self.fruits, price=1),
+            Ingredient(name='Tomatillo', category=self.fruits, price=1),
+        ])
+
+    def names(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [ingredient['name'] for ingredient in response.data]
+
+    def test_prefix_before_fuzzy(self):
+        self.assertEqual(self.names(q='toma'), ['Tomato', 'Tomatillo', 'Cherry tomato'])
+
+    def test_typo(self):
+        self.assertIn('Tomato', self.names(q='tomatto'))
+
+    def test_category_and_limit(self):
+        self.assertEqual(self.names(q='t', category=self.fruits.id), ['Tamarind', 'Tomatillo'])
+        self.assertEqual(len(self.names(q='toma', limit=1)), 1)
+        self.assertEqual(self.names(q=' '), [])
+        self.assertEqual(self.client.get(self.url, {'q': 'a', 'limit': 'x'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CookableAPITest(TestCase):
+    url = "/api/recipes/cookable/"
+
+    def setUp(self):
+        self.client = APIClient()
+
+        self.user = User(username='user', password='user')
+        self.user.save()
+        self.client.force_authenticate(user=self.user)
+
+        i_cat = IngredientCategory.objects.create(id=1, name='1')
+        r_cat = RecipeCategory.objects.create(id=1, name='1')
+        self.eggs, self.milk, self.flour, self.salt = Ingredient.objects.bulk_create([
+            Ingredient(name=name, category=i_cat, price=1) for name in ('eggs', 'milk', 'flour', 'salt')
+        ])
+
+        def create(name, *ingredients):
+            recipe = Recipe.objects.create(name=name, description='', category=r_cat, user=self.user)
+            RecipeIngredient.objects.bulk_create([
+                RecipeIngredient(recipe=recipe, ingredient=ingredient) for ingredient in ingredients
+            ])
+            return recipe
+
+        self.omelette = create('Omelette', self.eggs, self.milk, self.salt)
+        self.pancakes = create('Pancakes', self.eggs, self.milk, self.flour)
+        self.boiled = create('Boiled eggs', self.eggs)
+
+    def cookable(self, have, **params):
+        response = self.client.get(self.url, {'have': ','.join(str(i.id) for i in have), **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(r['name'], r['matched'], r['missing']) for r in response.data]
+
+    def test_fully_covered(self):
+        self.assertEqual(self.cookable([self.eggs, self.milk, self.salt]), [
+            ('Omelette', 3, 0),
+            ('Boiled eggs', 1, 0),
+        ])
+
+    def test_missing_ranked_after_complete(self):
+        self.assertEqual(self.cookable([self.eggs, self.milk], missing=1), [
+            ('Boiled eggs', 1, 0),
+            ('Omelette', 2, 1),
+            ('Pancakes', 2, 1),
+        ])
+        self.assertEqual(self.cookable([self.eggs, self.milk], missing=1, limit=1), [('Boiled eggs', 1, 0)])
+
+    def test_index_follows_changes(self):
+        RecipeIngredient.objects.get(recipe=self.pancakes, ingredient=self.flour).delete()
+        self.assertIn(('Pancakes', 2, 0), self.cookable([self.eggs, self.milk]))
+
+        RecipeIngredient.objects.create(recipe=self.boiled, ingredient=self.salt)
+        self.assertEqual(self.cookable([self.eggs]), [])
+
+        self.salt.delete()
+        self.assertFalse(IngredientPostings.objects.filter(ingredient_id=self.salt.id).exists())
+        self.assertEqual(self.cookable([self.eggs]), [('Boiled eggs', 1, 0)])
+
+    def test_postings_follow_moved_link(self):
+        link = RecipeIngredient.objects.get(recipe=self.boiled, ingredient=self.eggs)
+        link.ingredient = self.salt
+        link.save()
+
+        postings = dict(IngredientPostings.objects.values_list('ingredient_id', 'recipe_ids'))
+        self.assertEqual(postings[self.eggs.id], sorted([self.omelette.id, self.pancakes.id]))
+        self.assertEqual(postings[self.salt.id], sorted([self.omelette.id, self.boiled.id]))
+
+    def test_bad_input(self):
+        self.assertEqual(self.client.get(self.url).data, [])
+        self.assertEqual(self.client.get(self.url, {'have': '1,x'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ConditionalGetAPITest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+        self.user = User(username='user', password='user')
+        self.user.save()
+        self.client.force_authenticate(user=self.user)
+
+        self.i_cat = IngredientCategory.objects.create(id=1, name='1')
+        self.r_cat = RecipeCategory.objects.create(id=1, name='1')
+        self.flour = Ingredient.objects.create(name='flour', category=self.i_cat, price=10)
+        self.recipe = Recipe.objects.create(name='bread', description='', category=self.r_cat, user=self.user)
+
+    def get(self, url, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(url, **headers)
+
+    def assertRevalidates(self, url):
+        response = self.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+
+        with self.assertNumQueries(1):
+            not_modified = self.get(url, etag)
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(not_modified['ETag'], etag)
+        self.assertEqual(not_modified.content, b'')
+        return etag
+
+    def test_recipe_detail(self):
+        url = f'/api/recipes/{self.recipe.id}/'
+        etag = self.assertRevalidates(url)
+        self.assertIn('Last-Modified', self.get(url))
+
+        RecipeIngredient.objects.create(recipe=self.recipe, ingredient=self.flour, quantity=2)
+        self.assertEqual(self.get(url, etag).status_code, status.HTTP_200_OK)
+
+        etag = self.get(url)['ETag']
+        self.flour.price = 20
+        self.flour.save()
+        response = self.get(url, etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['cost'], 40)
+
+        # Derived updates leave the creation time, and so the listing order, alone.
+        created_at = Recipe.objects.values_list('created_at', flat=True).get(pk=self.recipe.pk)
+        self.assertEqual(created_at, self.recipe.created_at)
+
+    def test_detail_etag_per_media_type(self):
+        url = f'/api/recipes/{self.recipe.id}/'
+        etag = self.get(url)['ETag']
+        browsable = self.client.get(url, HTTP_ACCEPT='text/html')
+        self.assertNotEqual(browsable['ETag'], etag)
+        self.assertEqual(
+            self.client.get(url, HTTP_ACCEPT='text/html', HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK,
+        )
+
+    def test_lists_follow_table_version(self):
+        url = '/api/ingredients/'
+        etag = self.assertRevalidates(url)
+        self.assertNotEqual(self.get(f'{url}?page_size=1')['ETag'], etag)
+
+        Ingredient.objects.bulk_create([Ingredient(name='salt', category=self.i_cat, price=1)])
+        self.assertEqual(self.get(url, etag).status_code, status.HTTP_200_OK)
+
+        url = '/api/recipe-categories/'
+        etag = self.assertRevalidates(url)
+        RecipeCategory.objects.filter(pk=self.r_cat.pk).update(name='2')
+        self.assertEqual(self.get(url, etag).status_code, status.HTTP_200_OK)
+
+    def test_table_version_survives_reconcile(self):
+        etag = self.get('/api/ingredients/')['ETag']
+        Counter.objects.reconcile()
+        self.assertEqual(self.get('/api/ingredients/', etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_missing_object(self):
+        self.assertEqual(self.get('/api/recipes/999/', '"x"').status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ShoppingListAPITest(TestCase):
+    url = "/api/recipes/shopping-list/"
+
+    def setUp(self):
+        self.client = APIClient()
+
+        self.user = User(username='user', password='user')
+        self.user.save()
+        self.client.force_authenticate(user=self.user)
+
+        dairy = IngredientCategory.objects.create(id=1, name='Dairy')
+        grocery = IngredientCategory.objects.create(id=2, name='Grocery')
+        r_cat = RecipeCategory.objects.create(id=1, name='1')
+        self.eggs = Ingredient.objects.create(name='eggs', category=dairy, price=2)
+        self.milk = Ingredient.objects.create(name='milk', category=dairy, price=3)
+        self.flour = Ingredient.objects.create(name='flour', category=grocery, price=1)
+
+        def create(name, **quantities):
+            recipe = Recipe.objects.create(name=name, description='', category=r_cat, user=self.user)
+            RecipeIngredient.objects.bulk_create([
+                RecipeIngredient(recipe=recipe, ingredient=getattr(self, key), quantity=quantity)
+                for key, quantity in quantities.items()
+            ])
+            return recipe
+
+        self.omelette = create('Omelette', eggs=3, milk=1)
+        self.pancakes = create('Pancakes', eggs=2, milk=2, flour=4)
+
+    def shopping_list(self, recipes):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {'recipes': recipes})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            len([q for q in queries.captured_queries if 'recipes_ingredients' in q['sql']]), 1,
+        )
+        return json.loads(response.content)
+
+    def test_sums_across_recipes(self):
+        data = self.shopping_list(f'{self.omelette.id}:2,{self.pancakes.id}')
+        self.assertEqual([c['name'] for c in data['categories']], ['Dairy', 'Grocery'])
+        dairy, grocery = data['categories']
+        self.assertEqual(
+            [(i['name'], float(i['quantity']), float(i['cost'])) for i in dairy['ingredients']],
+            [('eggs', 8, 16), ('milk', 4, 12)],
+        )
+        self.assertEqual(float(dairy['cost']), 28)
+        self.assertEqual(float(grocery['cost']), 4)
+        self.assertEqual(float(data['cost']), 32)
+
+    def test_repeated_recipe_adds_up(self):
+        data = self.shopping_list(f'{self.pancakes.id}:0.5,{self.pancakes.id}:0.5')
+        self.assertEqual(float(data['cost']), 14)
+
+    def test_bad_input(self):
+        self.assertEqual(self.client.get(self.url).data, {'categories': [], 'cost': 0})
+        for recipes in (
+            '1,x', '0', '-1', str(2 ** 31), f'{self.omelette.id}:0', f'{self.omelette.id}:NaN', f'{self.omelette.id}:101',
+        ):
+            response = self.client.get(self.url, {'recipes': recipes})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, recipes)
+        response = self.client.get(self.url, {'recipes': ','.join(str(pk) for pk in range(1, 502))})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SimilarRecipesAPITest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+        self.user = User(username='user', password='user')
+        self.user.save()
+        self.client.force_authenticate(user=self.user)
+
+        i_cat = IngredientCategory.objects.create(id=1, name='1')
+        r_cat = RecipeCategory.objects.create(id=1, name='1')
+        ingredients = Ingredient.objects.bulk_create([
+            Ingredient(name=f'ingredient {n}', category=i_cat, price=1) for n in range(6)
+        ])
+
+        def create(name, *numbers):
+            recipe = Recipe.objects.create(name=name, description='', category=r_cat, user=self.user)
+            RecipeIngredient.objects.bulk_create([
+                RecipeIngredient(recipe=recipe, ingredient=ingredients[n]) for n in numbers
+            ])
+            return recipe
+
+        self.pancakes = create('Pancakes', 0, 1, 2)
+        self.crepes = create('Crepes', 0, 1, 2)
+        self.salad = create('Salad', 3, 4, 5)
+
+    def test_similar(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/recipes/{self.pancakes.id}/similar/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([(r['name'], r['similarity']) for r in response.data], [('Crepes', 1)])
+        # The recipes are compared through the index, never by their ingredients.
+        self.assertFalse([q for q in queries.captured_queries if 'recipes_ingredients' in q['sql']])
+        self.assertTrue(RecipeSignature.objects.filter(recipe_id=self.salad.id).exists())
+
+    def test_bad_input(self):
+        self.assertEqual(self.client.get('/api/recipes/999/similar/').status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(f'/api/recipes/{self.pancakes.id}/similar/', {'limit': 'x'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(f'/api/recipes/{self.pancakes.id}/similar/', {'limit': 0}).data, [])
@@ -0,0 +1,98 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, override_settings
+from rest_framework import status
+
+from kitchen_app.models import (
+    Comment,
+    Ingredient,
+    IngredientCategory,
+    Recipe,
+    RecipeCategory,
+    RecipeIngredient,
+)
+from kitchen_app.views import COMMENTS_PAGE_SIZE
+from tests import test_api
+
+ASYNC_URLS = override_settings(ROOT_URLCONF='kitchen_app.async_urls')
+
+
+# The API suites again, against the async list/retrieve actions.
+
+@ASYNC_URLS
+class AsyncRecipeAPITest(test_api.RecipeAPITest):
+    pass
+
+
+@ASYNC_URLS
+class AsyncCommentAPITest(test_api.CommentAPITest):
+    pass
+
+
+@ASYNC_URLS
+class AsyncKeysetPaginationAPITest(test_api.KeysetPaginationAPITest):
+    pass
+
+
+@ASYNC_URLS
+class AsyncConditionalGetAPITest(test_api.ConditionalGetAPITest):
+    pass
+
+
+@ASYNC_URLS
+class AsyncPagesTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = AsyncClient()
+
+        self.user = User.objects.create(username='user', password='user')
+        self.client.force_login(self.user)
+
+        self.r_cat = RecipeCategory.objects.create(id=1, name='Recipe cat 1')
+        i_cat = IngredientCategory.objects.create(id=1, name='Ing cat 1')
+        self.ingredient = Ingredient.objects.create(id=1, name='Ing1', category=i_cat, price=123)
+        self.recipe = Recipe.objects.create(name='bread', description='', category=self.r_cat, user=self.user)
+        RecipeIngredient.objects.create(recipe=self.recipe, ingredient=self.ingredient, quantity=1)
+        Comment.objects.bulk_create(
+            [Comment(text=f'comment {i}', user=self.user, recipe=self.recipe) for i in range(COMMENTS_PAGE_SIZE + 1)]
+        )
+
+    async def test_homepage(self):
+        response = await self.client.get('/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.context['recipes'], 1)
+        self.assertEqual(response.context['ingredients'], 1)
+        self.assertContains(response, 'Hello')
+
+    async def test_recipe(self):
+        response = await self.client.get('/recipe/', {'id': self.recipe.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.context['recipe'], self.recipe)
+        self.assertEqual(response.context['recipe_ingredients'], [self.ingredient])
+        self.assertEqual(len(response.context['comments']), COMMENTS_PAGE_SIZE)
+        self.assertIsNotNone(response.context['next_cursor'])
+        # The only recipe has nothing similar.
+        self.assertEqual(response.context['similar_recipes'], [])
+
+        missing = await self.client.get('/recipe/', {'id': 999})
+        self.assertIsNone(missing.context.get('recipe'))
+
+    async def test_recipe_list(self):
+        response = await self.client.get('/recipes/', {'category_id': self.r_cat.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.context['category'], self.r_cat)
+        self.assertEqual(response.context['recipes_list'], [self.recipe])
+
+    async def test_ingredient(self):
+        response = await self.client.get('/ingredient/', {'id': self.ingredient.id})
+        self.assertEqual(response.context['ingredient'], self.ingredient)
+
+    async def test_login_required(self):
+        await self.client.alogout()
+        for url in ('/recipe/', '/recipes/', '/ingredient/'):
+            self.assertEqual((await self.client.get(url)).status_code, status.HTTP_302_FOUND)
+
+    async def test_post_goes_to_sync_view(self):
+        response = await self.client.post('/ingredient/', {'name': 'salt', 'category': 1, 'price': 5})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(await Ingredient.objects.filter(name='salt').aexists())
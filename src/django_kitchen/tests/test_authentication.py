@@ -0,0 +1,76 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from kitchen_app.authentication import TokenCache, get_token_cache
+
+
+class TokenCacheTest(SimpleTestCase):
+    def test_least_recently_used_evicted(self):
+        cache = TokenCache(max_size=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual((cache.get('a'), cache.get('b'), cache.get('c')), (1, None, 3))
+
+    def test_expiry(self):
+        cache = TokenCache(max_size=2, ttl=60)
+        with mock.patch('time.monotonic', return_value=0):
+            cache.set('a', 1)
+        with mock.patch('time.monotonic', return_value=61):
+            self.assertIsNone(cache.get('a'))
+
+
+class CachedTokenAuthenticationTest(TestCase):
+    url = '/api/recipe-categories/'
+
+    def setUp(self):
+        get_token_cache().clear()
+        self.user = User.objects.create(username='user', password='user')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def assertStatus(self, code):
+        self.assertEqual(self.client.get(self.url).status_code, code)
+
+    def test_hit_skips_token_query(self):
+        self.assertStatus(status.HTTP_200_OK)
+        with self.assertNumQueries(2):
+            self.assertStatus(status.HTTP_200_OK)
+
+        with override_settings(TOKEN_AUTH_CACHE={'ENABLED': False}), self.assertNumQueries(3):
+            self.assertStatus(status.HTTP_200_OK)
+
+    def test_deleted_token(self):
+        self.assertStatus(status.HTTP_200_OK)
+        self.token.delete()
+        self.assertStatus(status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user(self):
+        self.assertStatus(status.HTTP_200_OK)
+        self.user.is_active = False
+        self.user.save()
+        self.assertStatus(status.HTTP_401_UNAUTHORIZED)
+
+    def test_unknown_token_not_cached(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Token nope')
+        self.assertStatus(status.HTTP_401_UNAUTHORIZED)
+        self.assertIsNone(get_token_cache().get('nope'))
+
+    @override_settings(
+        TOKEN_AUTH_CACHE={'CACHE_ALIAS': 'default'},
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'auth'}},
+    )
+    def test_shared_cache(self):
+        self.assertStatus(status.HTTP_200_OK)
+        # Another process starts with an empty local LRU but finds the shared entry.
+        get_token_cache().clear()
+        with self.assertNumQueries(2):
+            self.assertStatus(status.HTTP_200_OK)
@@ -0,0 +1,164 @@
+import gzip
+import json
+import tempfile
+import unittest
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from kitchen_app.management.commands.bench_endpoints import regressions
+from kitchen_app.models import (
+    Ingredient,
+    IngredientCategory,
+    Recipe,
+    RecipeCategory,
+)
+from kitchen_app.planner import np
+
+
+class ImportRecipesCommandTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='user', password='user')
+        self.r_cat = RecipeCategory.objects.create(name='1')
+        i_cat = IngredientCategory.objects.create(name='a')
+        self.flour = Ingredient.objects.create(name='flour', category=i_cat, price=10)
+
+    def test_import(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson') as file:
+            for i in range(5):
+                recipe = {
+                    'name': f'recipe {i}',
+                    'description': 'abc',
+                    'category': self.r_cat.id,
+                    'ingredients': [{'ingredient_id': self.flour.id, 'quantity': i + 1}],
+                }
+                file.write(json.dumps(recipe) + '\n')
+            file.write('[]\n')
+            file.flush()
+
+            out, err = StringIO(), StringIO()
+            call_command('import_recipes', file.name, user='user', chunk_size=2, stdout=out, stderr=err)
+
+        self.assertIn('Imported 5 recipes, 1 failed.', out.getvalue())
+        self.assertIn('line 6', err.getvalue())
+        self.assertEqual(sorted(Recipe.objects.values_list('cost', flat=True)), [10, 20, 30, 40, 50])
+
+    def test_unknown_user(self):
+        with self.assertRaises(CommandError):
+            call_command('import_recipes', '-', user='nobody')
+
+
+class ExportCatalogCommandTest(TestCase):
+    def test_export(self):
+        i_cat = IngredientCategory.objects.create(name='a')
+        Ingredient.objects.bulk_create([
+            Ingredient(name=f'ingredient {i}', category=i_cat, price=i + 1) for i in range(5)
+        ])
+
+        with tempfile.NamedTemporaryFile(suffix='.ndjson.gz') as file:
+            call_command('export_catalog', 'ingredients', gzip=True, output=file.name)
+            rows = [json.loads(line) for line in gzip.decompress(file.read()).splitlines()]
+
+        self.assertEqual([row['price'] for row in rows], [1, 2, 3, 4, 5])
+
+
+class ExplainQueriesCommandTest(TestCase):
+    def test_explain_seeded_dataset(self):
+        out = StringIO()
+        call_command(
+            'explain_queries',
+            users=2, categories=2, ingredients=5, recipes=20, ingredients_per_recipe=3, comments=30,
+            stdout=out,
+        )
+
+        output = out.getvalue()
+        self.assertIn('recipe_view: comments of a recipe', output)
+        self.assertIn('Buffers:', output)
+        # The seeded rows are rolled back.
+        self.assertFalse(Recipe.objects.exists())
+        self.assertFalse(User.objects.exists())
+
+    def test_nothing_to_explain(self):
+        with self.assertRaises(CommandError):
+            call_command('explain_queries', no_seed=True, stdout=StringIO())
+
+
+class BenchAuthCommandTest(TestCase):
+    def test_bench(self):
+        out = StringIO()
+        call_command('bench_auth', requests=5, stdout=out)
+
+        self.assertIn('cache on', out.getvalue())
+        self.assertIn('Speedup', out.getvalue())
+        self.assertFalse(User.objects.exists())
+
+
+class BenchEndpointsCommandTest(TestCase):
+    size = dict(users=2, categories=2, ingredients=5, recipes=10, ingredients_per_recipe=3, comments=20)
+
+    def test_baseline_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            baseline = Path(directory) / 'baseline.json'
+            call_command(
+                'bench_endpoints', requests=2, warmup=0, baseline=baseline, save=True, stdout=StringIO(), **self.size,
+            )
+
+            recorded = json.loads(baseline.read_text())['endpoints']
+            self.assertIn('api-recipes-list', recorded)
+            self.assertIn('recipe', recorded)
+            self.assertNotIn('comment', recorded)
+
+            out = StringIO()
+            # Timings of two requests are noise, only the deterministic metrics are held to the baseline.
+            call_command(
+                'bench_endpoints', requests=2, warmup=0, baseline=baseline, threshold=1000, stdout=out, **self.size,
+            )
+            self.assertIn('No regressions', out.getvalue())
+
+            with self.assertRaises(CommandError):
+                call_command('bench_endpoints', requests=3, baseline=baseline, stdout=StringIO(), **self.size)
+
+        # The seeded rows are rolled back.
+        self.assertFalse(Recipe.objects.exists())
+        self.assertFalse(User.objects.exists())
+
+    def test_regressions(self):
+        metrics = {'p50_ms': 10, 'p95_ms': 20, 'p99_ms': 30, 'sql_ms': 5, 'queries': 3, 'bytes': 1000}
+        baseline = {'recipe': metrics}
+
+        self.assertEqual(list(regressions(baseline, {'recipe': metrics}, 0.2, 1)), [])
+        self.assertEqual(
+            list(regressions(baseline, {'recipe': {**metrics, 'queries': 4, 'p99_ms': 40}}, 0.2, 1)),
+            [('recipe', 'p99_ms', 30, 40), ('recipe', 'queries', 3, 4)],
+        )
+        # Within the threshold, or below the absolute floor for timings.
+        within = {**metrics, 'p50_ms': 11.5, 'sql_ms': 5.9}
+        self.assertEqual(list(regressions(baseline, {'recipe': within}, 0.2, 1)), [])
+        self.assertEqual(list(regressions(baseline, {'new': metrics}, 0.2, 1)), [])
+
+
+class BenchDbPoolCommandTest(TestCase):
+    def test_bench(self):
+        out = StringIO()
+        call_command('bench_db_pool', requests=3, warmup=1, stdout=out)
+
+        self.assertIn('new connection', out.getvalue())
+        self.assertIn('persistent', out.getvalue())
+
+
+@unittest.skipUnless(np is not None, 'The planner requires NumPy.')
+class BenchPlannerCommandTest(TestCase):
+    def test_bench(self):
+        out = StringIO()
+        call_command(
+            'bench_planner', runs=2, users=2, categories=3, ingredients=10, recipes=30,
+            ingredients_per_recipe=3, stdout=out,
+        )
+
+        self.assertIn('Catalog of 30 recipes', out.getvalue())
+        self.assertIn('Planning p50', out.getvalue())
+        # The seeded rows are rolled back.
+        self.assertFalse(Recipe.objects.exists())
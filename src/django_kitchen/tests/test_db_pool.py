@@ -0,0 +1,49 @@
+import copy
+import unittest
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.db.backends.postgresql.psycopg_any import is_psycopg3
+from django.test import SimpleTestCase, TestCase
+
+from kitchen.postgresql_pool.base import DatabaseWrapper
+
+
+def pooled_wrapper(settings_dict, **pool):
+    settings_dict = copy.deepcopy(settings_dict)
+    settings_dict.update(CONN_MAX_AGE=0, OPTIONS={**settings_dict['OPTIONS'], 'pool': pool or True})
+    return DatabaseWrapper(settings_dict, 'default')
+
+
+class PoolSettingsTest(SimpleTestCase):
+    def test_persistent_connections_rejected(self):
+        wrapper = pooled_wrapper(connection.settings_dict)
+        wrapper.settings_dict['CONN_MAX_AGE'] = 60
+        with self.assertRaises(ImproperlyConfigured):
+            wrapper.pool
+
+    def test_without_pool(self):
+        settings_dict = copy.deepcopy(connection.settings_dict)
+        settings_dict['OPTIONS'].pop('pool', None)
+        self.assertIsNone(DatabaseWrapper(settings_dict, 'default').pool)
+
+
+@unittest.skipUnless(is_psycopg3, 'The pool requires psycopg 3.')
+class PoolTest(TestCase):
+    def tearDown(self):
+        DatabaseWrapper.close_pools()
+
+    def test_connection_returned_to_pool(self):
+        first = pooled_wrapper(connection.settings_dict, min_size=1, max_size=1, timeout=1)
+        with first.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        raw = first.connection
+        first.close()
+        self.assertIsNone(first.connection)
+
+        # With max_size=1, a second checkout only succeeds on the returned connection.
+        second = pooled_wrapper(connection.settings_dict, min_size=1, max_size=1, timeout=1)
+        with second.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        self.assertIs(second.connection, raw)
+        second.close()
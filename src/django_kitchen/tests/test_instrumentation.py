@@ -0,0 +1,77 @@
+import re
+
+from django.contrib.auth.models import User
+from django.test import AsyncClient, SimpleTestCase, TestCase, override_settings
+
+from kitchen_app.instrumentation import QueryStats
+from kitchen_app.models import RecipeCategory
+
+
+class QueryStatsTest(SimpleTestCase):
+    def test_repeated_statements(self):
+        stats = QueryStats()
+        execute = lambda sql, params, many, context: None  # noqa: E731
+        for pk in range(3):
+            stats(execute, 'SELECT * FROM recipes WHERE id = %s', (pk,), False, {})
+        stats(execute, 'SELECT 1', (), False, {})
+
+        self.assertEqual(stats.count, 4)
+        self.assertEqual(stats.repeated, 2)
+        self.assertEqual(stats.most_repeated(5), [('SELECT * FROM recipes WHERE id = %s', 3)])
+        self.assertEqual(len(stats.slowest(1)), 1)
+
+
+TIMING = r'^sql;dur=[\d.]+;desc="(\d+) queries, \d+ repeated", total;dur=[\d.]+$'
+
+
+@override_settings(SQL_INSTRUMENTATION={'SAMPLE_RATE': 1})
+class SQLInstrumentationMiddlewareTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='user', password='user', is_staff=True)
+        self.client.force_login(self.user)
+        RecipeCategory.objects.create(name='Recipe cat 1')
+
+    def test_server_timing(self):
+        response = self.client.get('/api/recipe-categories/')
+
+        self.assertRegex(response['Server-Timing'], TIMING)
+        self.assertGreater(int(re.match(TIMING, response['Server-Timing'])[1]), 0)
+
+    def test_header_only_for_staff(self):
+        self.client.force_login(User.objects.create(username='other', password='other'))
+        response = self.client.get('/api/recipe-categories/')
+        self.assertNotIn('Server-Timing', response)
+
+        with override_settings(DEBUG=True):
+            response = self.client.get('/api/recipe-categories/')
+        self.assertIn('Server-Timing', response)
+
+    @override_settings(SQL_INSTRUMENTATION={'SAMPLE_RATE': 0})
+    def test_not_sampled(self):
+        response = self.client.get('/api/recipe-categories/')
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(SQL_INSTRUMENTATION={'SAMPLE_RATE': 1, 'BUDGET_MS': 0, 'HEADER': False})
+    def test_over_budget_logged(self):
+        with self.assertLogs('kitchen_app.instrumentation', 'WARNING') as logs:
+            response = self.client.get('/api/recipe-categories/')
+
+        self.assertNotIn('Server-Timing', response)
+        self.assertIn('GET /api/recipe-categories/ took', logs.output[0])
+        self.assertIn('slowest', logs.output[0])
+
+
+@override_settings(SQL_INSTRUMENTATION={'SAMPLE_RATE': 1}, ROOT_URLCONF='kitchen_app.async_urls')
+class AsyncSQLInstrumentationMiddlewareTest(TestCase):
+    def setUp(self):
+        self.client = AsyncClient()
+        self.user = User.objects.create(username='user', password='user', is_staff=True)
+        self.client.force_login(self.user)
+        RecipeCategory.objects.create(name='Recipe cat 1')
+
+    async def test_server_timing_counts_executor_queries(self):
+        # The ORM runs in the sync_to_async thread, on a connection of its own.
+        response = await self.client.get('/api/recipe-categories/')
+
+        self.assertRegex(response['Server-Timing'], TIMING)
+        self.assertGreater(int(re.match(TIMING, response['Server-Timing'])[1]), 0)
@@ -0,0 +1,134 @@
+import json
+import os
+import tempfile
+
+from django.contrib.auth.models import User
+from django.test import AsyncClient, SimpleTestCase, TestCase, override_settings
+
+from kitchen_app.metrics import REGISTRY, Counter, Gauge, Histogram, Registry
+from kitchen_app.models import RecipeCategory
+
+
+class RegistryTest(SimpleTestCase):
+    def setUp(self):
+        self.registry = Registry()
+        self.requests = self.registry.register(Counter('requests_total', 'Requests.', ('route',)))
+        self.latency = self.registry.register(Histogram('latency_seconds', 'Latency.', ('route',), buckets=(0.1, 1)))
+        self.workers = self.registry.register(Gauge('workers', 'Workers.'))
+
+    def test_exposition(self):
+        self.requests.inc('recipe/')
+        self.requests.inc('recipe/')
+        self.latency.observe('recipe/', value=0.05)
+        self.latency.observe('recipe/', value=5)
+
+        lines = self.registry.exposition().splitlines()
+        self.assertIn('# TYPE requests_total counter', lines)
+        self.assertIn('requests_total{route="recipe/"} 2', lines)
+        self.assertIn('latency_seconds_bucket{route="recipe/",le="0.1"} 1', lines)
+        self.assertIn('latency_seconds_bucket{route="recipe/",le="1"} 1', lines)
+        self.assertIn('latency_seconds_bucket{route="recipe/",le="+Inf"} 2', lines)
+        self.assertIn('latency_seconds_count{route="recipe/"} 2', lines)
+        self.assertIn('latency_seconds_sum{route="recipe/"} 5.05', lines)
+
+    def dead_worker(self, directory, filename, requests=3):
+        with open(os.path.join(directory, filename), 'w') as file:
+            json.dump({
+                'requests_total': {'["recipe/"]': requests},
+                'latency_seconds': {'["recipe/"]': [[1, 0, 0], 0.05]},
+                'workers': {'[]': 1},
+            }, file)
+
+    def test_multiprocess(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS={'MULTIPROCESS_DIR': directory}):
+            # The snapshot of a worker that has exited since, named before files had a token.
+            self.dead_worker(directory, '999999999.json')
+
+            self.requests.inc('recipe/')
+            self.latency.observe('recipe/', value=0.5)
+            self.workers.set(value=1)
+            lines = self.registry.exposition().splitlines()
+
+            # Its counts moved to the archive, and are not counted twice on the next scrape.
+            self.assertEqual(sorted(os.listdir(directory)), sorted([
+                'archive.json', 'archive.lock', f'{os.getpid()}-{self.registry.token}.json',
+            ]))
+            self.assertEqual(self.registry.exposition().splitlines(), lines)
+
+        self.assertIn('requests_total{route="recipe/"} 4', lines)
+        self.assertIn('latency_seconds_bucket{route="recipe/",le="1"} 2', lines)
+        # Gauges of dead processes are dropped.
+        self.assertIn('workers 1', lines)
+
+    def test_reused_pid(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS={'MULTIPROCESS_DIR': directory}):
+            # An exited worker that had the pid of this process.
+            self.dead_worker(directory, f'{os.getpid()}-exited.json')
+            os.utime(os.path.join(directory, f'{os.getpid()}-exited.json'), (0, 0))
+
+            self.requests.inc('recipe/')
+            self.workers.set(value=1)
+            lines = self.registry.exposition().splitlines()
+            self.assertNotIn(f'{os.getpid()}-exited.json', os.listdir(directory))
+
+        self.assertIn('requests_total{route="recipe/"} 4', lines)
+        self.assertIn('workers 1', lines)
+
+
+class MetricsViewTest(TestCase):
+    def setUp(self):
+        REGISTRY.reset()
+        self.user = User.objects.create(username='user', password='user')
+        self.client.force_login(self.user)
+        RecipeCategory.objects.create(name='Recipe cat 1')
+
+    def test_metrics(self):
+        self.client.get('/api/recipe-categories/')
+        self.client.get('/api/recipe-categories/')
+
+        response = self.client.get('/metrics')
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('kitchen_requests_total{route="recipecategory-list",method="GET",status="200"} 2', body)
+        self.assertIn('kitchen_request_duration_seconds_count{route="recipecategory-list"} 2', body)
+        self.assertIn('kitchen_request_queries_bucket{route="recipecategory-list",le="+Inf"} 2', body)
+        self.assertIn('kitchen_serializer_duration_seconds_count{serializer="RecipeCategorySerializer"} 2', body)
+        self.assertIn('kitchen_db_connections{alias="default"}', body)
+
+    def test_access(self):
+        # Neither staff nor from an allowed network.
+        response = self.client.get('/metrics', REMOTE_ADDR='203.0.113.5')
+        self.assertEqual(response.status_code, 403)
+
+        with override_settings(METRICS={'ALLOWED_NETWORKS': ['203.0.113.0/24']}):
+            self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='203.0.113.5').status_code, 200)
+
+        self.user.is_staff = True
+        self.user.save()
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='203.0.113.5').status_code, 200)
+
+    def test_unknown_methods_share_a_series(self):
+        self.client.generic('FOO1', '/api/recipe-categories/')
+        self.client.generic('FOO2', '/api/recipe-categories/')
+
+        body = self.client.get('/metrics').content.decode()
+        self.assertRegex(body, r'kitchen_requests_total\{route="recipecategory-list",method="other",status="\d+"\} 2')
+        self.assertNotIn('FOO1', body)
+
+
+@override_settings(ROOT_URLCONF='kitchen_app.async_urls')
+class AsyncMetricsViewTest(TestCase):
+    def setUp(self):
+        REGISTRY.reset()
+        self.client = AsyncClient()
+        self.user = User.objects.create(username='user', password='user')
+        self.client.force_login(self.user)
+        RecipeCategory.objects.create(name='Recipe cat 1')
+
+    async def test_queries_of_async_views(self):
+        # The ORM runs in the sync_to_async thread, on a connection of its own.
+        await self.client.get('/api/recipe-categories/')
+
+        body = REGISTRY.exposition()
+        self.assertIn('kitchen_request_queries_bucket{route="recipecategory-list",le="+Inf"} 1', body)
+        self.assertIn('kitchen_request_queries_bucket{route="recipecategory-list",le="0"} 0', body)
@@ -0,0 +1,136 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+
+from kitchen_app.models import (
+    Counter,
+    Ingredient,
+    IngredientCategory,
+    Recipe,
+    RecipeCategory,
+    RecipeIngredient,
+    RecipeSignature,
+)
+
+
+class CounterTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='user', password='user')
+        self.soups = RecipeCategory.objects.create(name='soups')
+        self.salads = RecipeCategory.objects.create(name='salads')
+        self.vegetables = IngredientCategory.objects.create(name='vegetables')
+
+    def counts(self):
+        rows = Counter.objects.exclude(value=0).exclude(key__startswith=Counter.VERSION_PREFIX)
+        return dict(rows.values_list('key', 'value'))
+
+    def create_recipe(self, category):
+        return Recipe.objects.create(name='A', description='abc', category=category, user=self.user)
+
+    def test_save_and_delete(self):
+        soup = self.create_recipe(self.soups)
+        self.create_recipe(self.soups)
+        self.create_recipe(None)
+        Ingredient.objects.create(name='carrot', category=self.vegetables, price=5)
+
+        self.assertEqual(self.counts(), {
+            'recipes': 3,
+            f'recipes:category:{self.soups.id}': 2,
+            'ingredients': 1,
+            f'ingredients:category:{self.vegetables.id}': 1,
+        })
+
+        soup.category = self.salads
+        soup.save()
+        self.assertEqual(Counter.objects.values_for(
+            Counter.key_for(Recipe, self.soups.id),
+            Counter.key_for(Recipe, self.salads.id),
+        ), {
+            f'recipes:category:{self.soups.id}': 1,
+            f'recipes:category:{self.salads.id}': 1,
+        })
+
+        Recipe.objects.filter(category=self.soups).delete()
+        soup.delete()
+        self.assertEqual(self.counts(), {
+            'recipes': 1,
+            'ingredients': 1,
+            f'ingredients:category:{self.vegetables.id}': 1,
+        })
+
+    def test_bulk_create(self):
+        Ingredient.objects.bulk_create([
+            Ingredient(name=f'ingredient {i}', category=self.vegetables, price=5) for i in range(3)
+        ])
+
+        self.assertEqual(self.counts(), {
+            'ingredients': 3,
+            f'ingredients:category:{self.vegetables.id}': 3,
+        })
+
+    def test_reconcile(self):
+        self.create_recipe(self.soups)
+        # QuerySet.update() bypasses the signals, which is what the command is for.
+        Recipe.objects.update(category=self.salads)
+        Counter.objects.filter(key='recipes').update(value=42)
+
+        out = StringIO()
+        call_command('reconcile_counters', stdout=out)
+
+        self.assertIn('recipes: -41', out.getvalue())
+        self.assertEqual(self.counts(), {
+            'recipes': 1,
+            f'recipes:category:{self.salads.id}': 1,
+        })
+
+
+class RecipeSignatureTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='user', password='user')
+        category = RecipeCategory.objects.create(name='soups')
+        vegetables = IngredientCategory.objects.create(name='vegetables')
+        self.ingredients = Ingredient.objects.bulk_create([
+            Ingredient(name=f'ingredient {n}', category=vegetables, price=1) for n in range(12)
+        ])
+
+        def create(name, *numbers):
+            recipe = Recipe.objects.create(name=name, description='', category=category, user=self.user)
+            RecipeIngredient.objects.bulk_create([
+                RecipeIngredient(recipe=recipe, ingredient=self.ingredients[n]) for n in numbers
+            ])
+            return recipe
+
+        self.borscht = create('Borscht', 0, 1, 2, 3, 4, 5)
+        self.shchi = create('Shchi', 0, 1, 2, 3, 4, 5, 6)
+        self.okroshka = create('Okroshka', 0, 7, 8, 9, 10, 11)
+
+    def similar(self, recipe):
+        return dict(RecipeSignature.objects.similar(recipe.id))
+
+    def test_similar(self):
+        similar = self.similar(self.borscht)
+        self.assertIn(self.shchi.id, similar)
+        # Jaccard index 6/7; the estimate is exact only in expectation.
+        self.assertAlmostEqual(similar[self.shchi.id], 6 / 7, delta=0.2)
+        self.assertLess(similar.get(self.okroshka.id, 0), similar[self.shchi.id])
+
+    def test_follows_changes(self):
+        # Identical sets have identical signatures.
+        RecipeIngredient.objects.get(recipe=self.shchi, ingredient=self.ingredients[6]).delete()
+        self.assertEqual(self.similar(self.borscht)[self.shchi.id], 1)
+
+        RecipeIngredient.objects.filter(recipe=self.shchi).delete()
+        self.assertFalse(RecipeSignature.objects.filter(recipe_id=self.shchi.id).exists())
+        self.assertNotIn(self.shchi.id, self.similar(self.borscht))
+
+    def test_rebuild(self):
+        before = dict(RecipeSignature.objects.values_list('recipe_id', 'signature'))
+        RecipeSignature.objects.update(signature=[], bands=[])
+        RecipeSignature.objects.create(recipe_id=12345)
+
+        out = StringIO()
+        call_command('rebuild_signatures', batch_size=2, stdout=out)
+        self.assertIn('3 recipes', out.getvalue())
+        self.assertEqual(dict(RecipeSignature.objects.values_list('recipe_id', 'signature')), before)
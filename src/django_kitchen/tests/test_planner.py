@@ -0,0 +1,155 @@
+import unittest
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from kitchen_app import planner
+from kitchen_app.models import (
+    Ingredient,
+    IngredientCategory,
+    Recipe,
+    RecipeCategory,
+    RecipeIngredient,
+)
+from kitchen_app.planner import Catalog, get_catalog, np, parse_slots, plan
+
+
+class ParseSlotsTest(SimpleTestCase):
+    def test_parse(self):
+        self.assertEqual(parse_slots('3:5,7:2, 3'), {3: 6, 7: 2})
+        self.assertEqual(parse_slots(''), {})
+        for value in ('x', '3:x', '3:0'):
+            with self.assertRaises(ValueError):
+                parse_slots(value)
+
+
+@unittest.skipUnless(np is not None, 'The planner requires NumPy.')
+class PlanTest(SimpleTestCase):
+    # Ingredient id -> price.
+    prices = {1: 5, 2: 5, 3: 1, 4: 40}
+
+    def catalog(self, *recipes):
+        """Build a catalog from `(id, category_id, ingredient ids)`, recipe cost being their prices."""
+        return Catalog.build(
+            [(pk, category, sum(self.prices[i] for i in ingredients)) for pk, category, ingredients in recipes],
+            list(self.prices.items()),
+            [(pk, i) for pk, _, ingredients in recipes for i in ingredients],
+        )
+
+    def test_cheapest_per_category(self):
+        catalog = self.catalog((1, 1, [4]), (2, 1, [3]), (3, 2, [1]), (4, 2, [4]), (5, 2, [2]))
+        menu = plan(catalog, {1: 1, 2: 2})
+        self.assertEqual(sorted(menu.recipe_ids), [2, 3, 5])
+        self.assertEqual(menu.cost, 11)
+        self.assertEqual(menu.leftovers, 11)
+        self.assertEqual(menu.shared_ingredients, 0)
+
+    def test_shared_ingredients_win(self):
+        # 1 and 2 are the cheapest pair, but 1 and 3 buy a single ingredient.
+        catalog = self.catalog((1, 1, [1]), (2, 1, [2]), (3, 1, [1, 3]))
+        menu = plan(catalog, {1: 2})
+        self.assertEqual(sorted(menu.recipe_ids), [1, 3])
+        self.assertEqual((menu.cost, menu.leftovers, menu.shared_ingredients), (11, 6, 1))
+
+        # Without leftovers only the cost counts.
+        self.assertEqual(sorted(plan(catalog, {1: 2}, waste=0).recipe_ids), [1, 2])
+
+    def test_matches_exhaustive_search(self):
+        rng = np.random.default_rng(0)
+        recipes = [
+            (pk, int(rng.integers(1, 3)), rng.choice(list(self.prices), int(rng.integers(1, 4)), replace=False).tolist())
+            for pk in range(1, 13)
+        ]
+        catalog = self.catalog(*recipes)
+        menu = plan(catalog, {1: 2, 2: 2}, beam_width=1000)
+
+        ingredients = {pk: set(i) for pk, _, i in recipes}
+        costs = {pk: sum(self.prices[i] for i in i_set) for pk, i_set in ingredients.items()}
+        by_category = {c: [pk for pk, category, _ in recipes if category == c] for c in (1, 2)}
+        best = min(
+            sum(costs[pk] for pk in (a, b, c, d)) + sum(self.prices[i] for i in set().union(
+                *(ingredients[pk] for pk in (a, b, c, d)),
+            ))
+            for a in by_category[1] for b in by_category[1] if a < b
+            for c in by_category[2] for d in by_category[2] if c < d
+        )
+        self.assertEqual(menu.score, best)
+
+    def test_too_few_recipes(self):
+        catalog = self.catalog((1, 1, [1]), (2, 2, [2]))
+        self.assertIsNone(plan(catalog, {1: 2}))
+        self.assertIsNone(plan(catalog, {3: 1}))
+
+    def test_rows_of_unknown_recipes_are_dropped(self):
+        catalog = Catalog.build([(1, 1, 5)], [(1, 5)], [(1, 1), (2, 1), (1, 9)])
+        self.assertEqual(catalog.indptr.tolist(), [0, 1])
+        self.assertEqual(catalog.indices.tolist(), [0])
+
+
+@unittest.skipUnless(np is not None, 'The planner requires NumPy.')
+class MenuAPITest(TestCase):
+    url = "/api/recipes/menu/"
+
+    def setUp(self):
+        self.client = APIClient()
+
+        self.user = User(username='user', password='user')
+        self.user.save()
+        self.client.force_authenticate(user=self.user)
+
+        i_cat = IngredientCategory.objects.create(id=1, name='1')
+        self.mains = RecipeCategory.objects.create(id=1, name='Mains')
+        self.desserts = RecipeCategory.objects.create(id=2, name='Desserts')
+        self.eggs, self.milk, self.beef = Ingredient.objects.bulk_create([
+            Ingredient(name=name, category=i_cat, price=price) for name, price in (('eggs', 2), ('milk', 3), ('beef', 50))
+        ])
+
+        def create(name, category, *ingredients):
+            recipe = Recipe.objects.create(name=name, description='', category=category, user=self.user)
+            RecipeIngredient.objects.bulk_create([
+                RecipeIngredient(recipe=recipe, ingredient=ingredient) for ingredient in ingredients
+            ])
+            return recipe
+
+        self.omelette = create('Omelette', self.mains, self.eggs, self.milk)
+        self.steak = create('Steak', self.mains, self.beef)
+        self.custard = create('Custard', self.desserts, self.eggs, self.milk)
+
+    def test_menu(self):
+        response = self.client.get(self.url, {'slots': f'{self.mains.id},{self.desserts.id}'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['name'] for r in response.data['recipes']], ['Omelette', 'Custard'])
+        self.assertEqual(response.data['cost'], 10)
+        self.assertEqual(response.data['leftovers'], 5)
+        self.assertEqual(response.data['shared_ingredients'], 2)
+
+    def test_catalog_follows_changes(self):
+        first = get_catalog()
+        self.assertIs(get_catalog(), first)
+
+        RecipeIngredient.objects.create(recipe=self.steak, ingredient=self.eggs)
+        self.assertIsNot(get_catalog(), first)
+        self.assertEqual(len(get_catalog().indices), 6)
+
+    def test_previous_catalog_while_reloading(self):
+        first = get_catalog()
+        RecipeIngredient.objects.create(recipe=self.steak, ingredient=self.eggs)
+
+        # Another thread is reloading it.
+        with planner._lock:
+            self.assertIs(get_catalog(), first)
+        self.assertIsNot(get_catalog(), first)
+
+    def test_bad_input(self):
+        for params in (
+            {},
+            {'slots': 'x'},
+            {'slots': f'{self.mains.id}:22'},
+            {'slots': f'{self.mains.id}:3'},
+            {'slots': f'{self.mains.id}', 'waste': '-1'},
+            {'slots': f'{self.mains.id}', 'waste': 'nan'},
+        ):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
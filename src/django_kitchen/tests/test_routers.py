@@ -0,0 +1,126 @@
+import unittest
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connections
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+
+from kitchen_app.models import Recipe, RecipeCategory
+from kitchen_app.routers import (
+    ReplicaRouter,
+    ReplicaRoutingMiddleware,
+    primary_reads,
+)
+
+# `replica` is a second connection to the test database, see kitchen/test_settings.py.
+WITH_REPLICA = override_settings(REPLICA_ROUTING={'REPLICAS': ['replica'], 'STICKY_SECONDS': 5})
+
+
+@WITH_REPLICA
+class ReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+        cache.clear()
+
+    def route(self, request, write=False):
+        """Return the read aliases of a request before and after an optional write, and the response."""
+        reads = []
+
+        def view(request):
+            reads.append(self.router.db_for_read(Recipe))
+            if write:
+                self.assertEqual(self.router.db_for_write(Recipe), 'default')
+                reads.append(self.router.db_for_read(Recipe))
+            return HttpResponse()
+
+        response = ReplicaRoutingMiddleware(view)(request)
+        return reads, response
+
+    def test_safe_request_reads_from_replica(self):
+        reads, response = self.route(self.factory.get('/'))
+        self.assertEqual(reads, ['replica'])
+        self.assertNotIn('pin_primary', response.cookies)
+
+    def test_write_pins_to_primary(self):
+        reads, response = self.route(self.factory.post('/'), write=True)
+        self.assertEqual(reads, ['default', 'default'])
+        self.assertEqual(response.cookies['pin_primary']['max-age'], 5)
+
+        # The write moves the rest of a GET to the primary too.
+        reads, _ = self.route(self.factory.get('/'), write=True)
+        self.assertEqual(reads, ['replica', 'default'])
+
+    def test_pinned_client_reads_from_primary(self):
+        request = self.factory.get('/')
+        request.COOKIES['pin_primary'] = '1'
+        reads, _ = self.route(request)
+        self.assertEqual(reads, ['default'])
+
+    def test_pinned_user_reads_from_primary(self):
+        request = self.factory.post('/')
+        request.user = User(pk=1, username='user')
+        self.route(request, write=True)
+
+        # Without the cookie, e.g. from another device of the same user.
+        request = self.factory.get('/')
+        request.user = User(pk=1, username='user')
+        reads, _ = self.route(request)
+        self.assertEqual(reads, ['default'])
+
+        request = self.factory.get('/')
+        request.user = User(pk=2, username='other')
+        reads, _ = self.route(request)
+        self.assertEqual(reads, ['replica'])
+
+    def test_outside_requests(self):
+        self.assertIsNone(self.router.db_for_read(Recipe))
+        with primary_reads():
+            self.assertEqual(self.router.db_for_read(Recipe), 'default')
+
+    def test_no_migrations_on_replicas(self):
+        self.assertIs(self.router.allow_migrate('replica', 'kitchen_app'), False)
+        self.assertIsNone(self.router.allow_migrate('default', 'kitchen_app'))
+
+
+@unittest.skipUnless('replica' in settings.DATABASES, 'Run with --settings=kitchen.test_settings.')
+@WITH_REPLICA
+class ReplicaRoutingTest(TransactionTestCase):
+    # Committed rows, so the replica connection sees them.
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='admin', is_superuser=True)
+        self.client.force_login(self.user)
+        RecipeCategory.objects.create(name='Recipe cat 1')
+
+    def test_read_your_writes(self):
+        with CaptureQueriesContext(connections['replica']) as replica:
+            response = self.client.get('/api/recipe-categories/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(replica.captured_queries)
+
+        response = self.client.post('/api/recipe-categories/', {'name': 'Recipe cat 2'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIn('pin_primary', response.cookies)
+
+        with CaptureQueriesContext(connections['replica']) as replica:
+            response = self.client.get('/api/recipe-categories/')
+        self.assertEqual(len(response.json()['results']), 2)
+        self.assertEqual(replica.captured_queries, [])
+
+        # Pinned by the user as well, for clients that drop the cookie.
+        del self.client.cookies['pin_primary']
+        with CaptureQueriesContext(connections['replica']) as replica:
+            self.client.get('/api/recipe-categories/')
+        self.assertEqual(replica.captured_queries, [])
@@ -1,12 +1,18 @@
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
+from rest_framework.authtoken.models import Token
 
 from kitchen_app.models import (
+    Comment,
     Ingredient,
     IngredientCategory,
     Recipe,
     RecipeCategory,
+    RecipeIngredient,
 )
 
 
@@ -24,6 +30,16 @@ class HomepageViewTest(TestCase):
     def test_get_homepage(self):
         self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
 
+    def test_counts_without_scanning(self):
+        category = IngredientCategory.objects.create(id=1, name='Ing cat 1')
+        Ingredient.objects.create(name='Ing1', category=category, price=123)
+
+        self.client.logout()
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.context['ingredients'], 1)
+        self.assertEqual(response.context['recipes'], 0)
+
 
 class ProfileViewTest(TestCase):
     url = "/profile/"
@@ -270,3 +286,152 @@ class CommentViewTest(TestCase):
         }
 
         self.assertEqual(status.HTTP_302_FOUND, self.client.post(target_url, data=creation_attrs).status_code)
+
+
+class RecipeCommentsViewTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+
+        self.user = User.objects.create(username='user', password='user')
+        self.client.force_login(user=self.user)
+        self.recipe = Recipe.objects.create(
+            name='Recipe 1',
+            description='Just a sample recipe',
+            category=RecipeCategory.objects.create(name='Recipe cat 1'),
+            user=self.user,
+        )
+
+    def add_comments(self, count):
+        start = User.objects.count()
+        users = User.objects.bulk_create([User(username=f'commenter {start + n}') for n in range(count)])
+        Comment.objects.bulk_create([
+            Comment(text=f'comment {n}', recipe=self.recipe, user=user) for n, user in enumerate(users)
+        ])
+
+    def get_page(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/recipe/?id={self.recipe.id}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, len(queries)
+
+    def test_fixed_number_of_queries(self):
+        self.add_comments(1)
+        _, few = self.get_page()
+
+        self.add_comments(60)
+        response, many = self.get_page()
+
+        self.assertEqual(few, many)
+        self.assertEqual(len(response.context['comments']), 20)
+        self.assertIsNotNone(response.context['next_cursor'])
+
+    def test_load_more(self):
+        self.add_comments(45)
+        cursor = self.get_page()[0].context['next_cursor']
+
+        seen = []
+        while cursor:
+            response = self.client.get('/recipe/comments/', {'id': self.recipe.id, 'cursor': cursor, 'output': 'json'})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen += [comment['text'] for comment in response.json()['results']]
+            cursor = response.json()['next']
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(len(set(seen)), 25)
+
+    def test_fragment(self):
+        self.add_comments(3)
+        response = self.client.get('/recipe/comments/', {'id': self.recipe.id})
+        self.assertContains(response, 'commenter 2')
+        self.assertNotContains(response, 'load more')
+
+        self.assertEqual(self.client.get('/recipe/comments/', {'id': self.recipe.id, 'cursor': '!'}).status_code, 404)
+
+
+class ListingCacheViewTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+        self.user = User.objects.create(username='user', password='user')
+        self.client.force_login(user=self.user)
+        self.category = RecipeCategory.objects.create(name='Soups')
+        Recipe.objects.create(name='Borscht', description='', category=self.category, user=self.user)
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, len(queries)
+
+    def test_recipe_list(self):
+        url = f'/recipes/?category_id={self.category.id}'
+        _, cold = self.get(url)
+        response, warm = self.get(url)
+        self.assertEqual(cold - warm, 2)
+        self.assertContains(response, 'Borscht')
+
+        Recipe.objects.create(name='Shchi', description='', category=self.category, user=self.user)
+        self.assertContains(self.get(url)[0], 'Shchi')
+
+    def test_category_list_counts(self):
+        _, cold = self.get('/recipe-categories/')
+        response, warm = self.get('/recipe-categories/')
+        # Count, page and counters.
+        self.assertEqual(cold - warm, 3)
+        self.assertContains(response, 'Soups</a> (1)')
+
+        Recipe.objects.create(name='Shchi', description='', category=self.category, user=self.user)
+        self.assertContains(self.get('/recipe-categories/')[0], 'Soups</a> (2)')
+
+    def test_category_list_pages(self):
+        RecipeCategory.objects.bulk_create([RecipeCategory(name=f'Category {n}') for n in range(12)])
+
+        response, _ = self.get('/recipe-categories/')
+        self.assertEqual(len(response.context['recipe_categories_list']), 10)
+        self.assertContains(response, 'Page 1 of 2.')
+
+        response, _ = self.get('/recipe-categories/?page=2')
+        self.assertEqual(len(response.context['recipe_categories_list']), 3)
+        self.assertContains(response, 'Page 2 of 2.')
+
+
+class RecipePageDeleteTest(TestCase):
+    def setUp(self):
+        self.client = Client(enforce_csrf_checks=True)
+
+        self.user = User.objects.create(username='user', password='user')
+        self.client.force_login(user=self.user)
+        self.recipe = Recipe.objects.create(
+            name='Recipe 1',
+            description='Just a sample recipe',
+            category=RecipeCategory.objects.create(name='Recipe cat 1'),
+            user=self.user,
+        )
+        self.comment = Comment.objects.create(text='Tasty', recipe=self.recipe, user=self.user)
+
+    def test_similar_recipes(self):
+        ingredient = Ingredient.objects.create(
+            name='Ing1', category=IngredientCategory.objects.create(name='Ing cat 1'), price=1,
+        )
+        twin = Recipe.objects.create(name='Recipe 2', description='', category=self.recipe.category, user=self.user)
+        RecipeIngredient.objects.bulk_create([
+            RecipeIngredient(recipe=recipe, ingredient=ingredient) for recipe in (self.recipe, twin)
+        ])
+
+        response = self.client.get(f'/recipe/?id={self.recipe.id}')
+        self.assertEqual(response.context['similar_recipes'], [twin])
+        self.assertContains(response, 'You might also like')
+
+    def test_render_does_no_token_work(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/recipe/?id={self.recipe.id}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse([query for query in queries if 'authtoken_token' in query['sql']])
+        self.assertFalse(Token.objects.exists())
+
+    def test_delete_with_session_and_csrf(self):
+        csrf_token = str(self.client.get(f'/recipe/?id={self.recipe.id}').context['csrf_token'])
+        url = f'/api/comments/{self.comment.id}/'
+
+        self.assertEqual(self.client.delete(url).status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.client.delete(url, HTTP_X_CSRFTOKEN=csrf_token).status_code, status.HTTP_204_NO_CONTENT)